@@ -0,0 +1,81 @@
+"""Scope legacy email keys
+
+Revision ID: 3a9c5e7b1d40
+Revises: b7d3e9a1c6f4
+Create Date: 2026-10-18 09:10:00.000000
+
+Emails stored before multi-account polling used the bare IMAP UID of the primary
+mailbox's INBOX as ``message_id``. They are rewritten to the ``<uidvalidity.uid@mailbox>``
+key used now, so re-fetched messages match them. The mailbox and its UIDVALIDITY come
+from the INBOX sync checkpoint in ``mailbox_sync_states``, which only the primary
+mailbox had at that point; the migration does not read the application settings.
+
+Without exactly one INBOX checkpoint the mailbox cannot be told, and the bare keys are
+left alone. So are rows stored in between under an RFC Message-ID, which cannot be
+mapped back to a UID. Either way their UIDs lie below the saved checkpoint, so those
+messages are only fetched again if the checkpoint is reset.
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "3a9c5e7b1d40"
+down_revision: str | Sequence[str] | None = "b7d3e9a1c6f4"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    affixes = _legacy_key_affixes()
+    if affixes is None:
+        return
+    prefix, suffix = affixes
+    op.execute(
+        sa.text(
+            "UPDATE emails SET message_id = :prefix || message_id || :suffix "
+            "WHERE message_id NOT LIKE '<%'"
+        ).bindparams(prefix=prefix, suffix=suffix)
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    affixes = _legacy_key_affixes()
+    if affixes is None:
+        return
+    prefix, suffix = affixes
+    op.execute(
+        sa.text(
+            "UPDATE emails SET message_id = substr("
+            "message_id, :prefix_length + 1, "
+            "length(message_id) - :prefix_length - :suffix_length) "
+            "WHERE substr(message_id, 1, :prefix_length) = :prefix "
+            "AND substr(message_id, length(message_id) - :suffix_length + 1) = :suffix"
+        ).bindparams(
+            prefix=prefix,
+            suffix=suffix,
+            prefix_length=len(prefix),
+            suffix_length=len(suffix),
+        )
+    )
+
+
+def _legacy_key_affixes() -> tuple[str, str] | None:
+    """Return what goes around a bare UID, from the single INBOX checkpoint if any."""
+    checkpoints = (
+        op.get_bind()
+        .execute(
+            sa.text(
+                "SELECT mailbox, uid_validity FROM mailbox_sync_states WHERE folder = 'INBOX'"
+            )
+        )
+        .all()
+    )
+    if len(checkpoints) != 1:
+        return None
+    mailbox, uid_validity = checkpoints[0]
+    return f"<{uid_validity}.", f"@{mailbox}>"
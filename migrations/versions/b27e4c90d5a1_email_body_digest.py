@@ -0,0 +1,30 @@
+"""Email body digest
+
+Revision ID: b27e4c90d5a1
+Revises: 3d9b1f7c2a15
+Create Date: 2026-10-17 11:40:00.000000
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "b27e4c90d5a1"
+down_revision: str | Sequence[str] | None = "3d9b1f7c2a15"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("emails", sa.Column("body_digest", sa.String(length=64), nullable=True))
+    op.create_index(op.f("ix_emails_body_digest"), "emails", ["body_digest"], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f("ix_emails_body_digest"), table_name="emails")
+    op.drop_column("emails", "body_digest")
@@ -0,0 +1,58 @@
+"""Email work queue
+
+Revision ID: b7d3e9a1c6f4
+Revises: e41a6c0d8b52
+Create Date: 2026-10-17 19:20:00.000000
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "b7d3e9a1c6f4"
+down_revision: str | Sequence[str] | None = "e41a6c0d8b52"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # The status column is a plain VARCHAR wide enough for the new CLAIMED and FAILED values.
+    op.add_column("emails", sa.Column("claimed_by", sa.String(length=200), nullable=True))
+    op.add_column("emails", sa.Column("claimed_at", sa.DateTime(timezone=True), nullable=True))
+    op.add_column(
+        "emails", sa.Column("lease_expires_at", sa.DateTime(timezone=True), nullable=True)
+    )
+    op.add_column(
+        "emails", sa.Column("attempts", sa.Integer(), server_default="0", nullable=False)
+    )
+    op.add_column("emails", sa.Column("last_error", sa.Text(), nullable=True))
+    op.create_index(
+        "ix_emails_status_received_at", "emails", ["status", "received_at"], unique=False
+    )
+    # Nothing set PROCESSED before, so every stored email is still RECEIVED. Emails that
+    # were routed, extracted or linked are done; only the rest should reach queue workers.
+    op.execute(
+        "UPDATE emails SET status = 'PROCESSED' "
+        "WHERE status = 'RECEIVED' AND ("
+        "edition_id IS NOT NULL "
+        "OR EXISTS (SELECT 1 FROM email_events WHERE email_events.email_id = emails.id) "
+        "OR EXISTS (SELECT 1 FROM email_announcements "
+        "WHERE email_announcements.email_id = emails.id) "
+        "OR EXISTS (SELECT 1 FROM extraction_stats WHERE extraction_stats.email_id = emails.id))"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Claimed emails go back to the queue and failed ones get another try.
+    op.execute("UPDATE emails SET status = 'RECEIVED' WHERE status IN ('CLAIMED', 'FAILED')")
+    op.drop_index("ix_emails_status_received_at", table_name="emails")
+    op.drop_column("emails", "last_error")
+    op.drop_column("emails", "attempts")
+    op.drop_column("emails", "lease_expires_at")
+    op.drop_column("emails", "claimed_at")
+    op.drop_column("emails", "claimed_by")
@@ -0,0 +1,30 @@
+"""Extraction stat kinds
+
+Revision ID: c5f1a8e2d7b9
+Revises: 3a9c5e7b1d40
+Create Date: 2026-10-18 10:05:00.000000
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c5f1a8e2d7b9"
+down_revision: str | Sequence[str] | None = "3a9c5e7b1d40"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Existing rows stay NULL: whether triage narrowed their request is unknown, so they
+    # do not count towards sender history.
+    op.add_column("extraction_stats", sa.Column("kinds", sa.String(length=50), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("extraction_stats", "kinds")
@@ -0,0 +1,44 @@
+"""Email simhash
+
+Revision ID: e41a6c0d8b52
+Revises: 9f4b7d2e6a13
+Create Date: 2026-10-17 17:40:00.000000
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "e41a6c0d8b52"
+down_revision: str | Sequence[str] | None = "9f4b7d2e6a13"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("emails", sa.Column("simhash", sa.BigInteger(), nullable=True))
+    op.create_table(
+        "email_simhash_bands",
+        sa.Column("email_id", sa.Integer(), nullable=False),
+        sa.Column("band", sa.SmallInteger(), nullable=False),
+        sa.Column("value", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["email_id"], ["emails.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("email_id", "band"),
+    )
+    op.create_index(
+        "ix_email_simhash_bands_band_value",
+        "email_simhash_bands",
+        ["band", "value"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_email_simhash_bands_band_value", table_name="email_simhash_bands")
+    op.drop_table("email_simhash_bands")
+    op.drop_column("emails", "simhash")
@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import click
+from flask import Flask
+
+
+def register_benchmark_commands(app: Flask) -> None:
+    """Register benchmark CLI commands on the Flask app.
+
+    The benchmarks pull in the pipelines, Prefect and the fake IMAP server, so each
+    command imports them when it runs rather than when the web app starts.
+    """
+
+    @app.cli.command("benchmark-ingest")
+    @click.option(
+        "--sizes",
+        default="100,1000,10000",
+        show_default=True,
+        help="Comma-separated mailbox sizes to benchmark.",
+    )
+    @click.option(
+        "--fixtures",
+        type=click.Path(exists=True, file_okay=False),
+        default=None,
+        help="Directory of .eml files to fill the mailbox with (default: a sample newsletter).",
+    )
+    @click.option("--latency-ms", default=0.0, show_default=True, help="Latency per IMAP command.")
+    @click.option(
+        "--chunk-size",
+        default=None,
+        type=int,
+        help="Messages fetched per round trip (default: the ingest pipeline's chunk size).",
+    )
+    def benchmark_ingest_command(
+        sizes: str, fixtures: str | None, latency_ms: float, chunk_size: int | None
+    ) -> None:
+        """Benchmark email fetch and persist against an in-process IMAP server."""
+        from town_digest.benchmarks.fake_imap import load_fixtures
+        from town_digest.benchmarks.ingest import benchmark_ingest, build_sample_newsletter
+        from town_digest.pipelines.ingest_emails import DEFAULT_STREAM_CHUNK_SIZE
+
+        messages = load_fixtures(fixtures) if fixtures else [build_sample_newsletter()]
+        for size in (int(value) for value in sizes.split(",") if value.strip()):
+            result = benchmark_ingest(
+                messages,
+                mailbox_size=size,
+                latency=latency_ms / 1000,
+                chunk_size=chunk_size or DEFAULT_STREAM_CHUNK_SIZE,
+            )
+            click.echo(
+                f"mailbox={result.mailbox_size} "
+                f"messages={result.messages} "
+                f"seconds={result.seconds:.2f} "
+                f"messages/sec={result.messages_per_second:.1f} "
+                f"round_trips={result.round_trips} "
+                f"peak_memory_mb={result.peak_memory_bytes / 1024 / 1024:.1f}"
+            )
+
+    @app.cli.command("benchmark-extraction")
+    @click.option(
+        "--fixtures",
+        type=click.Path(exists=True, file_okay=False),
+        required=True,
+        help="Directory of .eml files to extract.",
+    )
+    @click.option(
+        "--recordings",
+        type=click.Path(file_okay=False),
+        required=True,
+        help="Directory holding recorded OpenAI responses.",
+    )
+    @click.option(
+        "--record", is_flag=True, help="Call OpenAI and save its responses instead of replaying."
+    )
+    @click.option("--latency-ms", default=0.0, show_default=True, help="Latency per replayed call.")
+    @click.option("--workers", default=None, type=int, help="Extraction threads.")
+    def benchmark_extraction_command(
+        fixtures: str, recordings: str, record: bool, latency_ms: float, workers: int | None
+    ) -> None:
+        """Benchmark LLM extraction against recorded OpenAI responses."""
+        from town_digest.benchmarks.extraction import benchmark_extraction, fixture_texts
+        from town_digest.benchmarks.fake_imap import load_fixtures
+
+        result = benchmark_extraction(
+            fixture_texts(load_fixtures(fixtures)),
+            recordings_dir=recordings,
+            record=record,
+            latency=latency_ms / 1000,
+            max_workers=workers,
+        )
+        click.echo(
+            f"emails={result.emails} "
+            f"requests={result.requests} "
+            f"failures={result.failures} "
+            f"seconds={result.seconds:.2f} "
+            f"emails/sec={result.emails_per_second:.1f} "
+            f"input_tokens={result.input_tokens} "
+            f"output_tokens={result.output_tokens}"
+        )
@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+from datetime import UTC, datetime, timedelta
+
+import click
+from flask import Flask
+
+from town_digest.db import get_session_factory
+
+
+def register_report_commands(app: Flask) -> None:
+    """Register reporting CLI commands on the Flask app."""
+
+    @app.cli.command("extraction-report")
+    @click.option(
+        "--by",
+        "group_by",
+        type=click.Choice(["edition", "sender", "day"]),
+        default="edition",
+        show_default=True,
+        help="How to group extraction requests.",
+    )
+    @click.option("--days", default=30, show_default=True, help="Only include the last N days.")
+    @click.option("--limit", default=20, show_default=True, help="Maximum rows to show.")
+    def extraction_report_command(group_by: str, days: int, limit: int) -> None:
+        """Show LLM token usage, latency and estimated cost, most expensive first."""
+        # Imported here so the web app does not load the OpenAI client at startup.
+        from town_digest.utils.extraction_stats import summarize_extraction_stats
+
+        since = datetime.now(UTC) - timedelta(days=days) if days > 0 else None
+        session_factory = get_session_factory()
+        with session_factory() as session:
+            rows = summarize_extraction_stats(session, group_by=group_by, since=since)
+        if not rows:
+            click.echo("No extraction stats recorded.")
+            return
+        for row in rows[:limit]:
+            cost = f"${row.cost_usd:.4f}" if row.cost_usd is not None else "unknown"
+            click.echo(
+                f"{row.key}: "
+                f"emails={row.emails} "
+                f"requests={row.requests} "
+                f"cached={row.cached_requests} "
+                f"input_tokens={row.input_tokens} "
+                f"output_tokens={row.output_tokens} "
+                f"avg_seconds={row.average_duration_seconds:.2f} "
+                f"retries={row.retries} "
+                f"cost={cost}"
+            )
@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import time
+from collections.abc import Sequence
+from dataclasses import dataclass
+from email import policy
+from email.parser import BytesParser
+from pathlib import Path
+
+from town_digest.utils.email_text import compact_email_text
+from town_digest.utils.llm_recording import RecordingSettings
+from town_digest.utils.newsletter_extractor import (
+    ExtractionUsage,
+    extract_newsletter_items_concurrently,
+)
+from town_digest.utils.openai_client import create_openai_client
+
+
+@dataclass(frozen=True, slots=True)
+class ExtractionBenchmarkResult:
+    emails: int
+    requests: int
+    failures: int
+    seconds: float
+    input_tokens: int
+    output_tokens: int
+
+    @property
+    def emails_per_second(self) -> float:
+        return self.emails / self.seconds if self.seconds else 0.0
+
+
+def fixture_texts(fixtures: Sequence[bytes]) -> list[str]:
+    """Return the compacted extraction text of each raw ``.eml`` message."""
+    texts = []
+    for raw in fixtures:
+        message = BytesParser(policy=policy.default).parsebytes(raw)
+        text_part = message.get_body(preferencelist=("plain",))
+        html_part = message.get_body(preferencelist=("html",))
+        texts.append(
+            compact_email_text(
+                text_part.get_content() if text_part is not None else None,
+                html_part.get_content() if html_part is not None else None,
+            ).text
+        )
+    return texts
+
+
+def benchmark_extraction(
+    email_texts: Sequence[str],
+    *,
+    recordings_dir: Path | str,
+    record: bool = False,
+    latency: float = 0.0,
+    max_workers: int | None = None,
+) -> ExtractionBenchmarkResult:
+    """Measure the LLM extraction stage against recorded OpenAI responses.
+
+    With ``record`` the requests go to OpenAI once and their responses are saved to
+    ``recordings_dir``; afterwards the same texts replay offline with ``latency``
+    seconds per request, so runs are repeatable and need no network access. The
+    benchmark uses its own client and bypasses the extraction cache, so every email
+    issues its requests and the process-wide client and settings are left alone.
+    Only ``extract_newsletter_items_concurrently`` is timed: the texts are compacted
+    beforehand, and routing, triage and database writes are not part of the run.
+    """
+    recording = RecordingSettings("record" if record else "replay", recordings_dir, latency)
+    usages: list[list[ExtractionUsage]] = [[] for _ in email_texts]
+    with create_openai_client(recording=recording) as client:
+        started = time.perf_counter()
+        results = extract_newsletter_items_concurrently(
+            email_texts, max_workers=max_workers, usages=usages, client=client, use_cache=False
+        )
+        seconds = time.perf_counter() - started
+
+    requests = [usage for email_usages in usages for usage in email_usages]
+    return ExtractionBenchmarkResult(
+        emails=len(email_texts),
+        requests=len(requests),
+        failures=sum(1 for result in results if isinstance(result, Exception)),
+        seconds=seconds,
+        input_tokens=sum(usage.input_tokens for usage in requests),
+        output_tokens=sum(usage.output_tokens for usage in requests),
+    )
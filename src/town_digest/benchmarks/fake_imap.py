@@ -0,0 +1,279 @@
+from __future__ import annotations
+
+import re
+import time
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass, field
+from email import policy
+from email.message import Message
+from email.parser import BytesParser
+from pathlib import Path
+
+from imapclient.response_types import BodyData
+
+_SECTION_PATTERN = re.compile(r"^BODY\.PEEK\[(?P<section>[^\]]*)\](?:<0\.(?P<limit>\d+)>)?$")
+_CAPABILITIES = frozenset({"IDLE", "MOVE", "UIDPLUS"})
+
+
+@dataclass(slots=True)
+class _Fixture:
+    header: bytes
+    body: bytes
+    structure: BodyData
+    sections: dict[str, bytes]
+
+
+@dataclass(slots=True)
+class FakeImapStats:
+    """Commands issued against a ``FakeImapServer`` since it was created."""
+
+    commands: dict[str, int] = field(default_factory=dict)
+
+    @property
+    def round_trips(self) -> int:
+        return sum(self.commands.values())
+
+    def record(self, command: str) -> None:
+        self.commands[command] = self.commands.get(command, 0) + 1
+
+
+class FakeImapServer:
+    """In-process stand-in for an IMAP server, for benchmarks and offline tests.
+
+    The mailbox holds ``size`` messages cycled from ``fixtures`` (raw RFC 5322
+    bytes), each with a unique Message-ID, and builds message bytes lazily so large
+    mailboxes do not need to fit in memory. Every command sleeps for ``latency``
+    seconds to simulate a round trip to a remote server and is counted in
+    ``stats``. ``connect`` matches ``ImapMailClient``'s ``imap_client_factory``.
+    """
+
+    def __init__(
+        self,
+        fixtures: Sequence[bytes],
+        *,
+        size: int | None = None,
+        latency: float = 0.0,
+        uid_validity: int = 1,
+    ) -> None:
+        if not fixtures:
+            raise ValueError("FakeImapServer needs at least one fixture message.")
+        self._fixtures = [_load_fixture(raw) for raw in fixtures]
+        self.size = len(fixtures) if size is None else size
+        self.latency = latency
+        self.uid_validity = uid_validity
+        self.stats = FakeImapStats()
+        self.flags: dict[int, set[str]] = {}
+        self.moved: dict[int, str] = {}
+
+    @classmethod
+    def from_directory(cls, directory: Path | str, **kwargs: object) -> FakeImapServer:
+        """Load every ``*.eml`` file in ``directory`` as a fixture."""
+        return cls(load_fixtures(directory), **kwargs)
+
+    def connect(self, host: str, port: int) -> FakeImapConnection:
+        return FakeImapConnection(self)
+
+    def uids(self) -> list[int]:
+        return [uid for uid in range(1, self.size + 1) if uid not in self.moved]
+
+    def exists(self, uid: int) -> bool:
+        return 1 <= uid <= self.size and uid not in self.moved
+
+    def fixture(self, uid: int) -> _Fixture:
+        return self._fixtures[(uid - 1) % len(self._fixtures)]
+
+    def header(self, uid: int) -> bytes:
+        return f"Message-ID: <{uid}.{self.uid_validity}@fake-imap.local>\r\n".encode() + (
+            self.fixture(uid).header
+        )
+
+
+class FakeImapConnection:
+    """One client connection to a ``FakeImapServer``, mimicking ``IMAPClient``."""
+
+    def __init__(self, server: FakeImapServer) -> None:
+        self._server = server
+        self._selected: str | None = None
+
+    def login(self, username: str, password: str) -> bytes:
+        self._command("LOGIN")
+        return b"LOGIN completed"
+
+    def logout(self) -> bytes:
+        self._command("LOGOUT")
+        return b"LOGOUT completed"
+
+    def shutdown(self) -> None:
+        pass
+
+    def has_capability(self, capability: str) -> bool:
+        return capability.upper() in _CAPABILITIES
+
+    def select_folder(self, folder: str, readonly: bool = False) -> dict[bytes, object]:
+        self._command("EXAMINE" if readonly else "SELECT")
+        self._selected = folder
+        return {
+            b"EXISTS": self._server.size - len(self._server.moved),
+            b"UIDVALIDITY": self._server.uid_validity,
+            b"UIDNEXT": self._server.size + 1,
+            b"READ-WRITE": not readonly,
+        }
+
+    def search(self, criteria: Sequence[str] | str = "ALL") -> list[int]:
+        self._command("SEARCH")
+        terms = [criteria] if isinstance(criteria, str) else list(criteria)
+        uids = self._server.uids()
+        if terms[:1] == ["UNSEEN"]:
+            return [uid for uid in uids if "\\Seen" not in self._server.flags.get(uid, set())]
+        if terms[:1] == ["UID"]:
+            matched = set(_parse_uid_set(terms[1], max(uids, default=0)))
+            # Like real servers, "n:*" always includes the highest UID.
+            return [uid for uid in uids if uid in matched] or uids[-1:]
+        return uids
+
+    def fetch(
+        self, messages: Iterable[int] | str, data: Sequence[str]
+    ) -> dict[int, dict[bytes, object]]:
+        self._command("FETCH")
+        return {
+            uid: dict(self._fetch_item(uid, item) for item in data)
+            for uid in self._resolve(messages)
+            if self._server.exists(uid)
+        }
+
+    def add_flags(self, messages: Iterable[int] | str, flags: str, silent: bool = False) -> dict:
+        self._command("STORE")
+        for uid in self._resolve(messages):
+            self._server.flags.setdefault(uid, set()).add(flags)
+        return {}
+
+    def move(self, messages: Iterable[int] | str, folder: str) -> None:
+        self._command("MOVE")
+        for uid in self._resolve(messages):
+            self._server.moved[uid] = folder
+
+    def noop(self) -> tuple[bytes, list[tuple[int, bytes]]]:
+        self._command("NOOP")
+        return b"NOOP completed", []
+
+    def idle(self) -> None:
+        self._command("IDLE")
+
+    def idle_check(self, timeout: float | None = None) -> list[tuple[int, bytes]]:
+        time.sleep(min(timeout or 0.0, 0.01))
+        return []
+
+    def idle_done(self) -> tuple[bytes, list]:
+        return b"IDLE terminated", []
+
+    def _command(self, name: str) -> None:
+        self._server.stats.record(name)
+        if self._server.latency:
+            time.sleep(self._server.latency)
+
+    def _resolve(self, messages: Iterable[int] | str) -> list[int]:
+        if isinstance(messages, str):
+            return _parse_uid_set(messages, self._server.size)
+        return [int(uid) for uid in messages]
+
+    def _fetch_item(self, uid: int, item: str) -> tuple[bytes, object]:
+        fixture = self._server.fixture(uid)
+        header = self._server.header(uid)
+        if item == "BODYSTRUCTURE":
+            return b"BODYSTRUCTURE", fixture.structure
+        if item in {"RFC822", "BODY.PEEK[]"}:
+            key = b"RFC822" if item == "RFC822" else b"BODY[]"
+            return key, header + b"\r\n" + fixture.body
+        if item.startswith("BODY.PEEK[HEADER.FIELDS"):
+            return item.replace(".PEEK", "").encode(), header + b"\r\n"
+        match = _SECTION_PATTERN.match(item)
+        if match is None:
+            raise ValueError(f"FakeImapServer does not support fetch item {item!r}.")
+        section = match["section"]
+        if section == "HEADER":
+            return b"BODY[HEADER]", header + b"\r\n"
+        payload = fixture.sections.get(section, b"")
+        if match["limit"] is not None:
+            return f"BODY[{section}]<0>".encode(), payload[: int(match["limit"])]
+        return f"BODY[{section}]".encode(), payload
+
+
+def load_fixtures(directory: Path | str) -> list[bytes]:
+    """Read every ``*.eml`` file in ``directory``, in name order."""
+    return [path.read_bytes() for path in sorted(Path(directory).glob("*.eml"))]
+
+
+def _parse_uid_set(uid_set: str, highest: int) -> list[int]:
+    uids: list[int] = []
+    for chunk in uid_set.split(","):
+        start, _, end = chunk.partition(":")
+        first = highest if start == "*" else int(start)
+        last = first if not end else highest if end == "*" else int(end)
+        low, high = sorted((first, last))
+        uids.extend(range(low, high + 1))
+    return uids
+
+
+def _load_fixture(raw: bytes) -> _Fixture:
+    normalized = raw.replace(b"\r\n", b"\n").replace(b"\n", b"\r\n")
+    header, _, body = normalized.partition(b"\r\n\r\n")
+    # Message-IDs are assigned per UID so repeated fixtures are not de-duplicated.
+    header_lines = [
+        line
+        for line in re.split(rb"\r\n(?![ \t])", header)
+        if not line.lower().startswith(b"message-id:")
+    ]
+    message = BytesParser(policy=policy.compat32).parsebytes(normalized)
+    sections: dict[str, bytes] = {}
+    structure = _body_structure(message, "", sections)
+    return _Fixture(
+        header=b"\r\n".join(header_lines) + b"\r\n",
+        body=body,
+        structure=BodyData.create(structure),
+        sections=sections,
+    )
+
+
+def _body_structure(part: Message, section: str, sections: dict[str, bytes]) -> tuple:
+    maintype = part.get_content_maintype()
+    subtype = part.get_content_subtype()
+    if maintype == "multipart":
+        children = tuple(
+            _body_structure(child, f"{section}.{index}" if section else str(index), sections)
+            for index, child in enumerate(part.get_payload(), start=1)
+        )
+        boundary = (part.get_boundary() or "").encode()
+        return (*children, subtype.upper().encode(), (b"BOUNDARY", boundary), None, None, None)
+
+    section = section or "1"
+    if maintype == "message" and subtype == "rfc822":
+        inner = part.get_payload()[0]
+        inner_section = section if inner.get_content_maintype() == "multipart" else f"{section}.1"
+        inner_structure = _body_structure(inner, inner_section, sections)
+        size = len(inner.as_bytes())
+        return (b"MESSAGE", b"RFC822", None, None, None, b"7BIT", size, None, inner_structure, 0)
+
+    payload = part.get_payload(decode=False)
+    payload_bytes = payload.encode("utf-8", "surrogateescape") if isinstance(payload, str) else b""
+    sections[section] = payload_bytes
+    # The first entry of get_params() is the content type itself.
+    params = tuple(
+        item
+        for key, value in (part.get_params() or [])[1:]
+        for item in (key.upper().encode(), str(value).encode())
+    )
+    encoding = (part.get("Content-Transfer-Encoding") or "7BIT").upper().encode()
+    disposition_value = part.get_content_disposition()
+    disposition = (disposition_value.upper().encode(), None) if disposition_value else None
+    basic = (
+        maintype.upper().encode(),
+        subtype.upper().encode(),
+        params or None,
+        None,
+        None,
+        encoding,
+        len(payload_bytes),
+    )
+    if maintype == "text":
+        return (*basic, payload_bytes.count(b"\n"), None, disposition, None, None)
+    return (*basic, None, disposition, None, None)
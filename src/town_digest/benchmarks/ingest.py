@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import os
+import tempfile
+import time
+import tracemalloc
+from collections.abc import Iterator, Sequence
+from contextlib import contextmanager
+from dataclasses import dataclass
+from email.message import EmailMessage
+
+from town_digest.benchmarks.fake_imap import FakeImapServer
+from town_digest.db import get_engine, reset_db_caches
+from town_digest.models import Base
+from town_digest.pipelines.ingest_emails import (
+    DEFAULT_STREAM_CHUNK_SIZE,
+    INBOX_FOLDER,
+    iter_email_chunks,
+    persist_emails,
+    save_sync_checkpoint,
+)
+from town_digest.utils.email_client import ImapMailClient
+
+BENCHMARK_MAILBOX = "benchmark@fake-imap.local"
+
+
+@dataclass(frozen=True, slots=True)
+class IngestBenchmarkResult:
+    mailbox_size: int
+    messages: int
+    seconds: float
+    round_trips: int
+    peak_memory_bytes: int
+
+    @property
+    def messages_per_second(self) -> float:
+        return self.messages / self.seconds if self.seconds else 0.0
+
+
+def benchmark_ingest(
+    fixtures: Sequence[bytes],
+    *,
+    mailbox_size: int,
+    latency: float = 0.0,
+    chunk_size: int = DEFAULT_STREAM_CHUNK_SIZE,
+) -> IngestBenchmarkResult:
+    """Measure the fetch → persist path against an in-process IMAP server.
+
+    Runs the same chunked loop as ``stream_emails`` (fetch, persist, checkpoint,
+    flag) over a fake mailbox of ``mailbox_size`` messages and a scratch SQLite
+    database, so results are comparable between runs and need no network access.
+    """
+    server = FakeImapServer(fixtures, size=mailbox_size, latency=latency)
+    client = ImapMailClient(
+        "fake-imap.local",
+        "benchmark",
+        "",
+        imap_client_factory=server.connect,
+    )
+    messages = 0
+    with _scratch_database():
+        tracemalloc.start()
+        started = time.perf_counter()
+        try:
+            with client:
+                for checkpoint, imap_emails in iter_email_chunks(
+                    client, None, chunk_size=chunk_size, limit=mailbox_size
+                ):
+                    persist_emails.fn(imap_emails, checkpoint.uid_validity)
+                    save_sync_checkpoint.fn(checkpoint, INBOX_FOLDER, BENCHMARK_MAILBOX)
+                    client.mark_seen_many(imap_email.id for imap_email in imap_emails)
+                    messages += len(imap_emails)
+            seconds = time.perf_counter() - started
+            _, peak_memory = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+    return IngestBenchmarkResult(
+        mailbox_size=mailbox_size,
+        messages=messages,
+        seconds=seconds,
+        round_trips=server.stats.round_trips,
+        peak_memory_bytes=peak_memory,
+    )
+
+
+def build_sample_newsletter(*, html_kb: int = 20, attachment_kb: int = 200) -> bytes:
+    """Build a newsletter-shaped message: text and HTML alternatives plus a PDF."""
+    message = EmailMessage()
+    message["From"] = "Township Newsletter <news@example.org>"
+    message["To"] = "tdigest+east-windsor@example.com"
+    message["Subject"] = "This week in town"
+    message["Date"] = "Mon, 16 Feb 2026 10:00:00 +0000"
+    paragraph = "<p>Council meets Tuesday at 7pm in the municipal building.</p>\n"
+    message.set_content("Council meets Tuesday at 7pm in the municipal building.\n")
+    message.add_alternative(
+        "<html><body>" + paragraph * max(1, html_kb * 1024 // len(paragraph)) + "</body></html>",
+        subtype="html",
+    )
+    message.add_attachment(
+        os.urandom(attachment_kb * 1024),
+        maintype="application",
+        subtype="pdf",
+        filename="flyer.pdf",
+    )
+    return message.as_bytes()
+
+
+@contextmanager
+def _scratch_database() -> Iterator[None]:
+    previous_url = os.environ.get("DATABASE_URL")
+    with tempfile.TemporaryDirectory() as directory:
+        os.environ["DATABASE_URL"] = f"sqlite+pysqlite:///{directory}/benchmark.db"
+        reset_db_caches()
+        try:
+            Base.metadata.create_all(get_engine())
+            yield
+        finally:
+            get_engine().dispose()
+            if previous_url is None:
+                os.environ.pop("DATABASE_URL", None)
+            else:
+                os.environ["DATABASE_URL"] = previous_url
+            reset_db_caches()
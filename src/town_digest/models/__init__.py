@@ -4,7 +4,11 @@ from town_digest.models.base import Base, TimestampedMixin
 from town_digest.models.edition import Edition
 from town_digest.models.email import Email, EmailStatus
 from town_digest.models.email_alias import EmailAlias
+from town_digest.models.email_simhash_band import EmailSimhashBand
 from town_digest.models.event import Event
+from town_digest.models.extraction_stat import ExtractionStat
+from town_digest.models.llm_extraction_cache_entry import LlmExtractionCacheEntry
+from town_digest.models.mailbox_sync_state import MailboxSyncState
 
 __all__ = [
     "Announcement",
@@ -12,8 +16,12 @@ __all__ = [
     "Edition",
     "Email",
     "EmailAlias",
+    "EmailSimhashBand",
     "EmailStatus",
     "Event",
+    "ExtractionStat",
+    "LlmExtractionCacheEntry",
+    "MailboxSyncState",
     "TimestampedMixin",
     "email_announcements",
     "email_events",
@@ -3,7 +3,7 @@ from __future__ import annotations
 from datetime import datetime
 from enum import StrEnum
 
-from sqlalchemy import DateTime, ForeignKey, String, Text
+from sqlalchemy import BigInteger, DateTime, ForeignKey, Index, Integer, String, Text
 from sqlalchemy import Enum as SAEnum
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -12,18 +12,23 @@ from town_digest.models.associations import email_announcements, email_events
 from town_digest.models.base import Base, TimestampedMixin
 from town_digest.models.edition import Edition
 from town_digest.models.email_alias import EmailAlias
+from town_digest.models.email_simhash_band import EmailSimhashBand
 from town_digest.models.event import Event
+from town_digest.utils.message_store import get_message_store
 
 
 class EmailStatus(StrEnum):
     RECEIVED = "received"
+    CLAIMED = "claimed"
     PROCESSED = "processed"
+    FAILED = "failed"
 
 
 class Email(TimestampedMixin, Base):
     """A received email associated with an edition and alias."""
 
     __tablename__ = "emails"
+    __table_args__ = (Index("ix_emails_status_received_at", "status", "received_at"),)
 
     id: Mapped[int] = mapped_column(primary_key=True)
     edition_id: Mapped[int] = mapped_column(ForeignKey("editions.id"), nullable=True)
@@ -35,14 +40,27 @@ class Email(TimestampedMixin, Base):
     to_emails: Mapped[str | None] = mapped_column(String(1000), nullable=True)
     message_id: Mapped[str | None] = mapped_column(String(500), nullable=True, unique=True)
     received_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
-    body_text: Mapped[str | None] = mapped_column(Text, nullable=True)
-    body_html: Mapped[str | None] = mapped_column(Text, nullable=True)
+    # Bodies are deferred so listing or updating emails does not load them.
+    body_text: Mapped[str | None] = mapped_column(Text, nullable=True, deferred=True)
+    body_html: Mapped[str | None] = mapped_column(Text, nullable=True, deferred=True)
+    # SHA-256 of the bodies in the message store, when they are kept outside the table.
+    body_digest: Mapped[str | None] = mapped_column(String(64), nullable=True, index=True)
+    # 64-bit SimHash of the compacted text as a signed integer, for near-duplicate lookup.
+    simhash: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
     status: Mapped[EmailStatus] = mapped_column(
         SAEnum(EmailStatus, name="email_status", native_enum=False),
         nullable=False,
         default=EmailStatus.RECEIVED,
         server_default=EmailStatus.RECEIVED.value,
     )
+    # Work queue lease, see ``town_digest.utils.email_queue``.
+    claimed_by: Mapped[str | None] = mapped_column(String(200), nullable=True)
+    claimed_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    lease_expires_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    last_error: Mapped[str | None] = mapped_column(Text, nullable=True)
 
     edition: Mapped[Edition] = relationship(back_populates="emails")
     email_alias: Mapped[EmailAlias] = relationship(back_populates="emails")
@@ -54,6 +72,22 @@ class Email(TimestampedMixin, Base):
         secondary=email_announcements,
         back_populates="emails",
     )
+    simhash_bands: Mapped[list[EmailSimhashBand]] = relationship(
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+    )
+
+    def load_bodies(self) -> tuple[str | None, str | None]:
+        """Return the ``(text, html)`` bodies, reading the message store if needed."""
+        if self.body_digest is None:
+            return self.body_text, self.body_html
+        store = get_message_store()
+        if store is None:
+            raise RuntimeError(
+                f"Email {self.id} keeps its body in the message store, "
+                "but MESSAGE_STORE_PATH is not configured."
+            )
+        return store.get_bodies(self.body_digest)
 
     def __repr__(self) -> str:
         return f"Email(id={self.id!r}, subject={self.subject!r})"
@@ -0,0 +1,26 @@
+from __future__ import annotations
+
+from sqlalchemy import ForeignKey, Index, Integer, SmallInteger
+from sqlalchemy.orm import Mapped, mapped_column
+
+from town_digest.models.base import Base
+
+
+class EmailSimhashBand(Base):
+    """One slice of an email's SimHash, indexed to look up near-duplicate candidates.
+
+    Hashes within ``NEAR_DUPLICATE_MAX_DISTANCE`` bits of each other share at least one
+    band value, see ``town_digest.utils.near_duplicates``.
+    """
+
+    __tablename__ = "email_simhash_bands"
+    __table_args__ = (Index("ix_email_simhash_bands_band_value", "band", "value"),)
+
+    email_id: Mapped[int] = mapped_column(
+        ForeignKey("emails.id", ondelete="CASCADE"), primary_key=True
+    )
+    band: Mapped[int] = mapped_column(SmallInteger, primary_key=True)
+    value: Mapped[int] = mapped_column(Integer, nullable=False)
+
+    def __repr__(self) -> str:
+        return f"EmailSimhashBand(email_id={self.email_id!r}, band={self.band!r})"
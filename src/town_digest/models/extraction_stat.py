@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+from sqlalchemy import Boolean, Float, ForeignKey, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from town_digest.models.base import Base, TimestampedMixin
+
+
+class ExtractionStat(TimestampedMixin, Base):
+    """Token usage and latency of one LLM extraction request made for an email."""
+
+    __tablename__ = "extraction_stats"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    email_id: Mapped[int] = mapped_column(
+        ForeignKey("emails.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    model: Mapped[str] = mapped_column(String(100), nullable=False)
+    input_tokens: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    output_tokens: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    duration_seconds: Mapped[float] = mapped_column(Float, nullable=False)
+    retries: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    # Served from the extraction cache, so no tokens were billed.
+    cached: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
+    # Comma-separated extraction kinds the request asked for; unknown for older rows.
+    kinds: Mapped[str | None] = mapped_column(String(50), nullable=True)
+
+    def __repr__(self) -> str:
+        return (
+            f"ExtractionStat(email_id={self.email_id!r}, model={self.model!r}, "
+            f"input_tokens={self.input_tokens!r}, output_tokens={self.output_tokens!r})"
+        )
@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy import DateTime, String, Text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from town_digest.models.base import Base, TimestampedMixin
+
+
+class LlmExtractionCacheEntry(TimestampedMixin, Base):
+    """A cached structured-output response, keyed by input text, model and prompt version."""
+
+    __tablename__ = "llm_extraction_cache_entries"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    cache_key: Mapped[str] = mapped_column(String(64), nullable=False, unique=True)
+    model: Mapped[str] = mapped_column(String(100), nullable=False)
+    prompt_version: Mapped[str] = mapped_column(String(64), nullable=False)
+    output_text: Mapped[str] = mapped_column(Text, nullable=False)
+    expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    last_used_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, index=True
+    )
+
+    def __repr__(self) -> str:
+        return (
+            f"LlmExtractionCacheEntry(cache_key={self.cache_key!r}, model={self.model!r}, "
+            f"prompt_version={self.prompt_version!r})"
+        )
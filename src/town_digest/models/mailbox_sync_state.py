@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+from sqlalchemy import BigInteger, String, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+from town_digest.models.base import Base, TimestampedMixin
+
+
+class MailboxSyncState(TimestampedMixin, Base):
+    """The last IMAP UID ingested from a mailbox folder, scoped to its UIDVALIDITY."""
+
+    __tablename__ = "mailbox_sync_states"
+    __table_args__ = (UniqueConstraint("mailbox", "folder"),)
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    mailbox: Mapped[str] = mapped_column(String(320), nullable=False)
+    folder: Mapped[str] = mapped_column(String(200), nullable=False)
+    uid_validity: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    last_uid: Mapped[int] = mapped_column(BigInteger, nullable=False)
+
+    def __repr__(self) -> str:
+        return (
+            f"MailboxSyncState(mailbox={self.mailbox!r}, folder={self.folder!r}, "
+            f"last_uid={self.last_uid!r})"
+        )
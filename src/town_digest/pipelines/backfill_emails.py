@@ -0,0 +1,210 @@
+from __future__ import annotations
+
+import os
+import tempfile
+from datetime import timedelta
+from pathlib import Path
+
+import prefect
+from prefect.logging import get_run_logger
+
+from town_digest.db import get_session_factory
+from town_digest.models.announcement import Announcement
+from town_digest.models.email import Email, EmailStatus
+from town_digest.models.event import Event
+from town_digest.pipelines.ingest_email import (
+    assign_email_to_edition,
+    build_models,
+    extraction_text,
+    fetch_email,
+    fetch_email_alias,
+    link_near_duplicate,
+    log_triage_skip_rates,
+    persist_models,
+    triage_extraction,
+)
+from town_digest.utils.batch_extractor import (
+    DEFAULT_BATCH_POLL_INTERVAL_SECONDS,
+    DEFAULT_BATCH_TIMEOUT_SECONDS,
+    BatchBackend,
+    OpenAIBatchBackend,
+    run_batch_extraction,
+)
+from town_digest.utils.email_queue import (
+    DEFAULT_QUEUE_LEASE,
+    claim_emails,
+    default_worker_id,
+    queue_max_attempts,
+    release_claims,
+)
+from town_digest.utils.extraction_stats import record_extraction_usage
+from town_digest.utils.near_duplicates import group_near_duplicates, link_to_original
+from town_digest.utils.newsletter_extractor import ExtractionUsage
+
+# Queue workers must leave claimed emails alone until the batch job is done with them.
+BACKFILL_LEASE = timedelta(seconds=DEFAULT_BATCH_TIMEOUT_SECONDS) + DEFAULT_QUEUE_LEASE
+
+
+def _batch_backend() -> BatchBackend:
+    return OpenAIBatchBackend()
+
+
+def _batch_request_dir() -> Path:
+    configured = os.environ.get("EXTRACTION_BATCH_DIR", "")
+    return Path(configured) if configured else Path(tempfile.gettempdir()) / "town-digest-batches"
+
+
+@prefect.task(name="Claim emails to backfill")
+def claim_backfill_emails(worker_id: str, email_ids: list[int] | None = None) -> list[int]:
+    """Claim the received emails, or those of ``email_ids`` still received, for backfill.
+
+    The claim works like a queue worker's, with a lease long enough for the batch job,
+    so ``process_email_queue`` workers do not extract the same emails meanwhile.
+    """
+    session_factory = get_session_factory()
+    with session_factory() as session:
+        return claim_emails(
+            session,
+            worker_id,
+            limit=None,
+            lease=BACKFILL_LEASE,
+            max_attempts=queue_max_attempts(),
+            email_ids=email_ids,
+        )
+
+
+@prefect.task(name="Extract emails in a batch job")
+def extract_emails_in_batch(
+    emails: list[Email], poll_interval: float = DEFAULT_BATCH_POLL_INTERVAL_SECONDS
+) -> tuple[dict[int, list[Announcement | Event]], dict[int, str]]:
+    """Extract all ``emails`` through one batch job.
+
+    Each email is triaged first, like on the live path, and only the kinds it needs are
+    requested; long emails are sent as one request per chunk. The token usage of the
+    batch requests is recorded as extraction stats. Returns the models built per
+    extracted email id and the error per failed email id.
+    """
+    logger = get_run_logger()
+    texts = {email.id: extraction_text(email) for email in emails}
+    session_factory = get_session_factory()
+    with session_factory() as session:
+        decisions = {
+            email.id: triage_extraction(session, email, texts[email.id]) for email in emails
+        }
+    log_triage_skip_rates(list(decisions.values()))
+    usages: dict[int, list[ExtractionUsage]] = {email.id: [] for email in emails}
+    results = run_batch_extraction(
+        texts,
+        backend=_batch_backend(),
+        request_dir=_batch_request_dir(),
+        kinds={email_id: decision.kinds for email_id, decision in decisions.items()},
+        usages=usages,
+        poll_interval=poll_interval,
+    )
+    record_extraction_usage(usages)
+    models_by_email: dict[int, list[Announcement | Event]] = {}
+    failures: dict[int, str] = {}
+    for email in emails:
+        result = results[email.id]
+        if isinstance(result, Exception):
+            logger.error("Batch extraction failed for email with id %d: %s", email.id, result)
+            failures[email.id] = str(result)
+            continue
+        models_by_email[email.id] = build_models(email, result)
+    return models_by_email, failures
+
+
+@prefect.task(name="Link backfilled near-duplicates")
+def link_backfilled_copies(originals: dict[int, int]) -> None:
+    """Give each copy in ``originals`` the items extracted from its original email.
+
+    ``originals`` maps copy ids to original ids, for copies found within the backfill
+    whose originals were extracted by it.
+    """
+    session_factory = get_session_factory()
+    with session_factory() as session:
+        for copy_id, original_id in originals.items():
+            copy = session.get(Email, copy_id)
+            linked = link_to_original(session, copy, session.get(Email, original_id))
+            copy.status = EmailStatus.PROCESSED
+            get_run_logger().info(
+                "Email %d is a near-duplicate of email %d, linked %d backfilled items",
+                copy_id,
+                original_id,
+                linked,
+            )
+        session.commit()
+
+
+@prefect.task(name="Release backfilled emails")
+def release_backfill_claims(worker_id: str, email_ids: list[int], failures: dict[int, str]) -> None:
+    """Mark the claimed emails processed, and those in ``failures`` failed.
+
+    Failed emails are not retried, so later backfills do not bill them again.
+    """
+    session_factory = get_session_factory()
+    with session_factory() as session:
+        release_claims(session, worker_id, email_ids, failures, max_attempts=1)
+
+
+@prefect.flow(name="Backfill Emails")
+def backfill_emails(
+    email_ids: list[int] | None = None,
+    poll_interval: float = DEFAULT_BATCH_POLL_INTERVAL_SECONDS,
+) -> None:
+    """Extract a backlog of stored emails through the OpenAI Batch API.
+
+    Meant for importing archived newsletters, where batch pricing and throughput matter
+    more than latency. Without ``email_ids`` every received email is included. The
+    emails are claimed like queue work first. Near-duplicates of emails extracted
+    earlier, or of other emails in the backlog, are linked to their originals' items
+    instead of being sent. The models are inserted and their emails marked processed in
+    one transaction; emails whose batch request failed are marked failed.
+    """
+    logger = get_run_logger()
+    worker_id = default_worker_id()
+    email_ids = claim_backfill_emails(worker_id, email_ids)
+
+    routed: list[Email] = []
+    for email_id in email_ids:
+        email = fetch_email(email_id)
+        email_alias = fetch_email_alias(email.to_emails)
+        if email_alias is None:
+            logger.warning("No email alias found for email with id %d, skipping.", email_id)
+            continue
+        assign_email_to_edition(email, email_alias)
+        # Copies of emails extracted before the backfill reuse their items right away.
+        if not link_near_duplicate(email):
+            routed.append(email)
+
+    if not routed:
+        release_backfill_claims(worker_id, email_ids, {})
+        logger.info("No emails to backfill.")
+        return
+
+    copies = group_near_duplicates(routed)
+    originals = [email for email in routed if email.id not in copies]
+    models_by_email, failures = extract_emails_in_batch(originals, poll_interval)
+    models = [model for email_models in models_by_email.values() for model in email_models]
+    persist_models(models, list(models_by_email))
+
+    linked: dict[int, int] = {}
+    for copy_id, original in copies.items():
+        if original.id in failures:
+            failures[copy_id] = f"Near-duplicate of email {original.id}, whose extraction failed."
+        else:
+            linked[copy_id] = original.id
+    if linked:
+        link_backfilled_copies(linked)
+    release_backfill_claims(worker_id, email_ids, failures)
+    logger.info(
+        "Backfilled %d models from %d emails, %d near-duplicates linked, %d failed.",
+        len(models),
+        len(models_by_email),
+        len(linked),
+        len(failures),
+    )
+
+
+if __name__ == "__main__":
+    backfill_emails()
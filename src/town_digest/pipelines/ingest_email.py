@@ -1,21 +1,50 @@
+import contextvars
+import os
+from concurrent.futures import ThreadPoolExecutor
+
 import prefect
 from prefect.logging import get_run_logger
+from sqlalchemy import update
+from sqlalchemy.orm import Session, undefer
 
 from town_digest.db import get_session_factory
 from town_digest.models.announcement import Announcement
-from town_digest.models.email import Email
-from town_digest.models.email_alias import EmailAlias
+from town_digest.models.email import Email, EmailStatus
 from town_digest.models.event import Event
-from town_digest.utils.announcement_extractor import extract_announcements_from_email_text
-from town_digest.utils.events_extractor import extract_events_from_email_text
+from town_digest.utils.alias_router import AliasRoute, get_alias_router
+from town_digest.utils.email_text import compact_email_text
+from town_digest.utils.extraction_stats import extraction_stat_rows, record_extraction_usage
+from town_digest.utils.extraction_triage import (
+    TriageDecision,
+    load_sender_history,
+    triage_email,
+    triage_enabled,
+)
+from town_digest.utils.near_duplicates import find_near_duplicate, link_to_original
+from town_digest.utils.newsletter_extractor import (
+    ALL_EXTRACTION_KINDS,
+    ExtractionUsage,
+    NewsletterExtraction,
+    extract_newsletter_items,
+    extract_newsletter_items_concurrently,
+)
+from town_digest.utils.statement_counter import count_statements
 
 
 @prefect.task(name="Persists models to the database")
-def persist_models(models: list[Announcement | Event]) -> None:
-    """Persist parsed announcement and event models."""
+def persist_models(models: list[Announcement | Event], email_ids: list[int] | None = None) -> None:
+    """Persist parsed announcement and event models.
+
+    The emails in ``email_ids`` are marked processed in the same transaction, so they
+    are never extracted again.
+    """
     session_factory = get_session_factory()
     with session_factory() as session:
         session.add_all(models)
+        if email_ids:
+            session.execute(
+                update(Email).where(Email.id.in_(email_ids)).values(status=EmailStatus.PROCESSED)
+            )
         session.commit()
 
 
@@ -25,8 +54,108 @@ def parse_email(email: Email) -> list[Announcement | Event]:
     if email.edition_id is None:
         return []
 
-    email_text = email.body_html or email.body_text or ""
-    announcement_drafts = extract_announcements_from_email_text(email_text)
+    text = extraction_text(email)
+    session_factory = get_session_factory()
+    with session_factory() as session:
+        decision = triage_extraction(session, email, text)
+    if not decision.kinds:
+        return []
+
+    usage: list[ExtractionUsage] = []
+    try:
+        extraction = extract_newsletter_items(text, kinds=decision.kinds, usage=usage)
+    finally:
+        record_extraction_usage({email.id: usage})
+    return build_models(email, extraction)
+
+
+@prefect.task(name="Parse Emails Concurrently")
+def parse_emails(
+    emails: list[Email], max_workers: int | None = None
+) -> dict[int, list[Announcement | Event]]:
+    """Parse many emails, sending their extraction requests concurrently.
+
+    Returns the parsed models per email id. Emails without an edition are skipped and
+    emails whose extraction fails are logged and left out. Triage decides per email which
+    kinds are requested; emails needing neither are not sent at all.
+    """
+    logger = get_run_logger()
+    routed = [email for email in emails if email.edition_id is not None]
+    texts = [extraction_text(email) for email in routed]
+    session_factory = get_session_factory()
+    with session_factory() as session:
+        decisions = [
+            triage_extraction(session, email, text)
+            for email, text in zip(routed, texts, strict=True)
+        ]
+    log_triage_skip_rates(decisions)
+    usages: list[list[ExtractionUsage]] = [[] for _ in routed]
+    results = extract_newsletter_items_concurrently(
+        texts,
+        max_workers=max_workers,
+        kinds=[decision.kinds for decision in decisions],
+        usages=usages,
+    )
+    record_extraction_usage({email.id: usage for email, usage in zip(routed, usages, strict=True)})
+    models_by_email: dict[int, list[Announcement | Event]] = {}
+    for email, result in zip(routed, results, strict=True):
+        if isinstance(result, Exception):
+            logger.error("Extraction failed for email with id %d: %s", email.id, result)
+            continue
+        models_by_email[email.id] = build_models(email, result)
+    return models_by_email
+
+
+def triage_extraction(session: Session, email: Email, text: str) -> TriageDecision:
+    """Decide which extraction kinds ``email`` needs, using its sender's history."""
+    if not triage_enabled():
+        return TriageDecision(ALL_EXTRACTION_KINDS, "triage disabled")
+    history = load_sender_history(session, email.from_email)
+    decision = triage_email(text, subject=email.subject, history=history)
+    if decision.skipped:
+        get_run_logger().info(
+            "Triage skipped %s extraction for email %d: %s",
+            " and ".join(decision.skipped),
+            email.id,
+            decision.reason,
+        )
+    return decision
+
+
+def log_triage_skip_rates(decisions: list[TriageDecision]) -> None:
+    """Log how many of ``decisions`` skipped all extraction, events or announcements."""
+    if not decisions:
+        return
+    total = len(decisions)
+    skipped_all = sum(1 for decision in decisions if not decision.kinds)
+    skipped_events = sum(1 for decision in decisions if "events" in decision.skipped)
+    skipped_announcements = sum(1 for decision in decisions if "announcements" in decision.skipped)
+    get_run_logger().info(
+        "Triage skipped all extraction for %d/%d emails (%.0f%%), events for %d, "
+        "announcements for %d",
+        skipped_all,
+        total,
+        100 * skipped_all / total,
+        skipped_events,
+        skipped_announcements,
+    )
+
+
+def extraction_text(email: Email) -> str:
+    """Return the compacted body text sent to the model for ``email``."""
+    body_text, body_html = email.load_bodies()
+    compact = compact_email_text(body_text, body_html)
+    get_run_logger().info(
+        "Compacted email %d for extraction from ~%d to ~%d tokens",
+        email.id,
+        compact.tokens_before,
+        compact.tokens_after,
+    )
+    return compact.text
+
+
+def build_models(email: Email, extraction: NewsletterExtraction) -> list[Announcement | Event]:
+    """Create unsaved announcement and event models for ``email`` from extracted drafts."""
     announcements = [
         Announcement(
             edition_id=email.edition_id,
@@ -34,10 +163,9 @@ def parse_email(email: Email) -> list[Announcement | Event]:
             body=draft["body"],
             emails=[email],
         )
-        for draft in announcement_drafts
+        for draft in extraction["announcements"]
     ]
 
-    event_drafts = extract_events_from_email_text(email_text)
     events = [
         Event(
             edition_id=email.edition_id,
@@ -47,14 +175,39 @@ def parse_email(email: Email) -> list[Announcement | Event]:
             start_time=draft["start_time"],
             emails=[email],
         )
-        for draft in event_drafts
+        for draft in extraction["events"]
     ]
 
     return announcements + events
 
 
+@prefect.task(name="Link near-duplicate email")
+def link_near_duplicate(email: Email) -> bool:
+    """Reuse the items of an earlier near-identical copy of ``email`` in its edition.
+
+    Returns ``True`` when a copy was found and its events and announcements were linked
+    to ``email``, in which case the email does not need to be extracted.
+    """
+    session_factory = get_session_factory()
+    with session_factory() as session:
+        duplicate = session.get(Email, email.id)
+        original = find_near_duplicate(session, duplicate)
+        if original is None:
+            return False
+        linked = link_to_original(session, duplicate, original)
+        duplicate.status = EmailStatus.PROCESSED
+        session.commit()
+    get_run_logger().info(
+        "Email %d is a near-duplicate of email %d, linked %d existing items",
+        email.id,
+        original.id,
+        linked,
+    )
+    return True
+
+
 @prefect.task(name="Assign email to edition via alias")
-def assign_email_to_edition(email: Email, alias: EmailAlias) -> None:
+def assign_email_to_edition(email: Email, alias: AliasRoute) -> None:
     """Assign the given email to the edition associated with the given alias."""
     session_factory = get_session_factory()
     with session_factory() as session:
@@ -65,16 +218,20 @@ def assign_email_to_edition(email: Email, alias: EmailAlias) -> None:
 
 
 @prefect.task(name="Fetch email alias for email")
-def fetch_email_alias(to_addresses: str | None) -> EmailAlias | None:
+def fetch_email_alias(to_addresses: str | None) -> AliasRoute | None:
     """Fetch the email alias id associated with the given recipients."""
     session_factory = get_session_factory()
     with session_factory() as session:
-        alias = (
-            session.query(EmailAlias)
-            .filter(EmailAlias.address.in_(to_addresses.split(",")))
-            .one_or_none()
-        )
-        return alias
+        return find_email_alias(session, to_addresses)
+
+
+def find_email_alias(session: Session, to_addresses: str | None) -> AliasRoute | None:
+    """Return the alias of the first of the comma-separated ``to_addresses`` that has one.
+
+    Aliases come from the in-memory router, so ``session`` is only used when the router
+    needs loading or a staleness check.
+    """
+    return get_alias_router(session).resolve(to_addresses)
 
 
 @prefect.task(name="Fetch Email from database")
@@ -82,7 +239,12 @@ def fetch_email(email_id: int) -> Email:
     """Fetch a single email from the database by ID."""
     session_factory = get_session_factory()
     with session_factory() as session:
-        email = session.query(Email).filter(Email.id == email_id).one_or_none()
+        email = (
+            session.query(Email)
+            .options(undefer(Email.body_text), undefer(Email.body_html))
+            .filter(Email.id == email_id)
+            .one_or_none()
+        )
         if email is None:
             raise ValueError(f"Email with id {email_id} not found.")
         return email
@@ -90,19 +252,152 @@ def fetch_email(email_id: int) -> Email:
 
 @prefect.flow(name="Ingest Email")
 def ingest_email(email_id: int) -> None:
-    """Ingest a single email from the configured email source."""
+    """Ingest a single email from the configured email source in one unit of work.
+
+    One session serves the whole flow. The reads (email, alias, near-duplicate and sender
+    history) end their transaction before the LLM call so no connection is held while
+    waiting on OpenAI. Routing, the extracted models, usage stats and the ``PROCESSED``
+    status are then written in a single transaction. The statement count is logged.
+    """
     logger = get_run_logger()
-    email = fetch_email(email_id)
-    email_alias = fetch_email_alias(email.to_emails)
-    if email_alias is None:
-        logger.warning(
-            "No email alias found for email with id %d and recipients %s", email_id, email.to_emails
+    session_factory = get_session_factory()
+    with count_statements() as count, session_factory() as session:
+        email = (
+            session.query(Email)
+            .options(undefer(Email.body_text), undefer(Email.body_html))
+            .filter(Email.id == email_id)
+            .one_or_none()
         )
-        return
-    assign_email_to_edition(email, email_alias)
-    models = parse_email(email)
-    logger.info("Parsed %d models from email with id %d", len(models), email_id)
-    persist_models(models)
+        if email is None:
+            raise ValueError(f"Email with id {email_id} not found.")
+        alias = find_email_alias(session, email.to_emails)
+        if alias is None:
+            logger.warning(
+                "No email alias found for email with id %d and recipients %s",
+                email_id,
+                email.to_emails,
+            )
+            return
+
+        original = find_near_duplicate(session, email, edition_id=alias.edition_id)
+        text = extraction_text(email) if original is None else ""
+        decision = triage_extraction(session, email, text) if original is None else None
+        # End the read transaction; nothing has been changed yet.
+        session.commit()
+
+        extraction: NewsletterExtraction | None = None
+        if decision is not None and decision.kinds:
+            usage: list[ExtractionUsage] = []
+            try:
+                extraction = extract_newsletter_items(text, kinds=decision.kinds, usage=usage)
+            except Exception:
+                # Keep the cost of the failed attempt; the email stays received for a retry.
+                session.add_all(extraction_stat_rows({email_id: usage}))
+                session.commit()
+                raise
+            session.add_all(extraction_stat_rows({email_id: usage}))
+
+        email.edition_id = alias.edition_id
+        email.email_alias_id = alias.id
+        if original is not None:
+            linked = link_to_original(session, email, original)
+            logger.info(
+                "Email %d is a near-duplicate of email %d, linked %d existing items",
+                email_id,
+                original.id,
+                linked,
+            )
+        elif extraction is not None:
+            models = build_models(email, extraction)
+            session.add_all(models)
+            logger.info("Parsed %d models from email with id %d", len(models), email_id)
+        email.status = EmailStatus.PROCESSED
+        session.commit()
+    logger.info("Ingested email with id %d in %d SQL statements", email_id, count.statements)
+
+
+@prefect.flow(name="Ingest Email Batch")
+def ingest_email_batch(email_ids: list[int], max_workers: int | None = None) -> dict[int, str]:
+    """Ingest several emails, running their LLM extraction concurrently.
+
+    Emails are routed to editions one by one, which only touches the database, then
+    extracted on a pool of ``max_workers`` threads that share the OpenAI rate limiter.
+    Returns the emails whose extraction failed, as a mapping of email id to error
+    message, like ``ingest_emails_in_parallel``.
+    """
+    logger = get_run_logger()
+    routed: list[Email] = []
+    for email_id in email_ids:
+        email = fetch_email(email_id)
+        email_alias = fetch_email_alias(email.to_emails)
+        if email_alias is None:
+            logger.warning(
+                "No email alias found for email with id %d and recipients %s",
+                email_id,
+                email.to_emails,
+            )
+            continue
+        assign_email_to_edition(email, email_alias)
+        if not link_near_duplicate(email):
+            routed.append(email)
+
+    models_by_email = parse_emails(routed, max_workers)
+    for email_id, models in models_by_email.items():
+        logger.info("Parsed %d models from email with id %d", len(models), email_id)
+        persist_models(models, [email_id])
+    return {
+        email.id: "Extraction failed, see the flow logs."
+        for email in routed
+        if email.id not in models_by_email
+    }
+
+
+DEFAULT_INGEST_MAX_CONCURRENCY = 4
+
+
+@prefect.flow(name="Ingest Emails In Parallel")
+def ingest_emails_in_parallel(
+    email_ids: list[int], max_concurrency: int | None = None
+) -> dict[int, str]:
+    """Run one ``ingest_email`` subflow per email, ``max_concurrency`` at a time.
+
+    Subflows run on local threads so a slow newsletter only holds up its own slot; the
+    batch takes about as long as its slowest email when enough slots are available.
+    A failing email does not stop the others. Failures are logged together at the end
+    and returned as a mapping of email id to error message.
+    """
+    logger = get_run_logger()
+    workers = max_concurrency or int(
+        os.environ.get("INGEST_MAX_CONCURRENCY", DEFAULT_INGEST_MAX_CONCURRENCY)
+    )
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ingest-email") as executor:
+        # Each subflow runs in a copy of this flow's context so Prefect links it as a child.
+        futures = {
+            email_id: executor.submit(
+                contextvars.copy_context().run, ingest_email, email_id, return_state=True
+            )
+            for email_id in email_ids
+        }
+
+    failures: dict[int, str] = {}
+    for email_id, future in futures.items():
+        try:
+            state = future.result()
+        except Exception as exc:
+            failures[email_id] = repr(exc)
+            continue
+        if not state.is_completed():
+            failures[email_id] = state.message or state.name
+
+    logger.info(
+        "Ingested %d of %d emails with up to %d in parallel.",
+        len(email_ids) - len(failures),
+        len(email_ids),
+        workers,
+    )
+    for email_id, message in failures.items():
+        logger.error("Ingesting email with id %d failed: %s", email_id, message)
+    return failures
 
 
 if __name__ == "__main__":
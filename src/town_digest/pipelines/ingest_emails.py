@@ -1,48 +1,172 @@
 from __future__ import annotations
 
+import asyncio
+from collections.abc import Iterator
+from email.utils import getaddresses
+
 import prefect
 from prefect.logging import get_run_logger
+from prefect.runtime import flow_run
 
-from town_digest.config import load_settings
+from town_digest.config import MailAccount, load_settings
 from town_digest.db import get_session_factory
 from town_digest.models.email import Email
-from town_digest.pipelines.ingest_email import ingest_email
-from town_digest.utils.email_client import EmailContent, ImapMailClient
+from town_digest.models.mailbox_sync_state import MailboxSyncState
+from town_digest.pipelines.ingest_email import ingest_email_batch, ingest_emails_in_parallel
+from town_digest.utils.async_email_client import AsyncImapMailClient
+from town_digest.utils.email_client import EmailContent, ImapMailClient, SyncCheckpoint
+from town_digest.utils.email_queue import (
+    claim_emails,
+    default_worker_id,
+    queue_batch_size,
+    queue_lease,
+    queue_max_attempts,
+    queue_retry_delay,
+    release_claims,
+)
+from town_digest.utils.email_text import compact_email_text
+from town_digest.utils.imap_session import close_imap_sessions, get_imap_session
+from town_digest.utils.message_store import get_message_store
+from town_digest.utils.near_duplicates import fingerprint_email
+
+INBOX_FOLDER = "INBOX"
+DEFAULT_STREAM_CHUNK_SIZE = 25
+DEFAULT_STREAM_MAX_MESSAGES = 5000
+
+
+def _session_scope() -> str:
+    return flow_run.get_id() or "local"
+
+
+def _mailbox_key() -> str:
+    return load_settings().primary_mail_account.mailbox_key
+
+
+@prefect.task(name="Load mailbox sync checkpoint")
+def load_sync_checkpoint(
+    folder: str = INBOX_FOLDER,
+    mailbox: str | None = None,
+) -> SyncCheckpoint | None:
+    """Load the last ingested UID for a mailbox folder, if any.
+
+    ``mailbox`` defaults to the primary configured account.
+    """
+    return _read_sync_checkpoint(folder, mailbox or _mailbox_key())
+
+
+def _read_sync_checkpoint(folder: str, mailbox: str) -> SyncCheckpoint | None:
+    session_factory = get_session_factory()
+    with session_factory() as session:
+        state = (
+            session.query(MailboxSyncState)
+            .filter(MailboxSyncState.mailbox == mailbox, MailboxSyncState.folder == folder)
+            .one_or_none()
+        )
+        if state is None:
+            return None
+        return SyncCheckpoint(uid_validity=state.uid_validity, last_uid=state.last_uid)
+
+
+@prefect.task(name="Save mailbox sync checkpoint")
+def save_sync_checkpoint(
+    checkpoint: SyncCheckpoint,
+    folder: str = INBOX_FOLDER,
+    mailbox: str | None = None,
+) -> None:
+    """Record the highest ingested UID so the next run only fetches newer mail."""
+    _store_sync_checkpoint(checkpoint, folder, mailbox)
+
+
+def _store_sync_checkpoint(
+    checkpoint: SyncCheckpoint,
+    folder: str = INBOX_FOLDER,
+    mailbox: str | None = None,
+) -> None:
+    session_factory = get_session_factory()
+    with session_factory() as session:
+        mailbox = mailbox or _mailbox_key()
+        state = (
+            session.query(MailboxSyncState)
+            .filter(MailboxSyncState.mailbox == mailbox, MailboxSyncState.folder == folder)
+            .one_or_none()
+        )
+        if state is None:
+            state = MailboxSyncState(mailbox=mailbox, folder=folder)
+            session.add(state)
+        state.uid_validity = checkpoint.uid_validity
+        state.last_uid = checkpoint.last_uid
+        session.commit()
 
 
 @prefect.task(name="Fetch Emails")
-def fetch_emails() -> list[EmailContent]:
-    """Fetch emails from the configured email source."""
-    settings = load_settings()
-    with ImapMailClient(
-        host=settings.imap_server, username=settings.imap_user, password=settings.imap_password
-    ) as client:
-        emails = []
-        for email_ref in client.list():
-            email_content = client.get_content(email_ref.id)
-            emails.append(email_content)
-    return emails
+def fetch_emails(
+    checkpoint: SyncCheckpoint | None = None,
+) -> tuple[SyncCheckpoint, list[EmailContent]]:
+    """Fetch emails that arrived after the checkpoint from the configured email source."""
+    client = get_imap_session(_session_scope())
+    next_checkpoint, email_ids = client.list_new_uids(checkpoint, INBOX_FOLDER)
+    return next_checkpoint, list(client.get_contents(email_ids, INBOX_FOLDER))
+
+
+def iter_email_chunks(
+    client: ImapMailClient,
+    checkpoint: SyncCheckpoint | None,
+    *,
+    chunk_size: int = DEFAULT_STREAM_CHUNK_SIZE,
+    limit: int = DEFAULT_STREAM_MAX_MESSAGES,
+    folder: str = INBOX_FOLDER,
+) -> Iterator[tuple[SyncCheckpoint, list[EmailContent]]]:
+    """Yield new messages in UID order, ``chunk_size`` at a time.
+
+    Each chunk comes with the checkpoint that is safe to store once the chunk has
+    been persisted, so only one chunk of message bodies is held in memory at a time.
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1.")
+    next_checkpoint, email_ids = client.list_new_uids(checkpoint, folder, limit)
+    for start in range(0, len(email_ids), chunk_size):
+        chunk_ids = email_ids[start : start + chunk_size]
+        imap_emails = list(client.get_contents(chunk_ids, folder, batch_size=chunk_size))
+        chunk_checkpoint = SyncCheckpoint(
+            uid_validity=next_checkpoint.uid_validity,
+            last_uid=int(chunk_ids[-1]),
+        )
+        yield chunk_checkpoint, imap_emails
 
 
 @prefect.task(name="Persist emails to the database")
-def persist_emails(imap_emails: list[EmailContent]) -> list[Email]:
-    """Persist IMAP emails to the configured database and return persisted models."""
+def persist_emails(imap_emails: list[EmailContent], uid_validity: int) -> list[Email]:
+    """Persist IMAP emails to the configured database and return persisted models.
+
+    ``uid_validity`` is the UIDVALIDITY of the folder the emails were fetched from.
+    """
+    return _persist_email_contents(imap_emails, uid_validity)
+
+
+def _persist_email_contents(
+    imap_emails: list[EmailContent],
+    uid_validity: int,
+    mailbox: str | None = None,
+) -> list[Email]:
     if not imap_emails:
         return []
+    mailbox = mailbox or _mailbox_key()
 
-    emails = [
-        Email(
+    # Keyed by message id, so a message fetched twice in one batch is stored once.
+    emails = {
+        message_id: Email(
             subject=imap_email.subject,
             from_name=imap_email.from_address,
             from_email=imap_email.from_address,
-            to_emails=",".join(imap_email.to_addresses),
-            message_id=imap_email.id,
+            to_emails=_recipients(imap_email),
+            message_id=message_id,
             received_at=imap_email.date,
             body_text=imap_email.text,
             body_html=imap_email.html,
         )
         for imap_email in imap_emails
-    ]
+        for message_id in (_message_id(imap_email, uid_validity, mailbox),)
+    }
 
     session_factory = get_session_factory()
     with session_factory() as session:
@@ -50,41 +174,277 @@ def persist_emails(imap_emails: list[EmailContent]) -> list[Email]:
         existing_message_ids = {
             message_id
             for (message_id,) in session.query(Email.message_id).filter(
-                Email.message_id.in_([email.message_id for email in emails])
+                Email.message_id.in_(list(emails))
             )
         }
-        new_emails = [email for email in emails if email.message_id not in existing_message_ids]
+        new_emails = [
+            email for message_id, email in emails.items() if message_id not in existing_message_ids
+        ]
+        # Fingerprint before the bodies may move to the message store.
+        for email in new_emails:
+            fingerprint_email(email, compact_email_text(email.body_text, email.body_html).text)
+        message_store = get_message_store()
+        if message_store is not None:
+            for email in new_emails:
+                email.body_digest = message_store.put_bodies(email.body_text, email.body_html)
+                email.body_text = None
+                email.body_html = None
         session.add_all(new_emails)
         session.commit()
 
     return new_emails
 
 
+# Where a message was actually delivered when the alias is not in To, as with Bcc or
+# mailing-list copies; Cc comes last since long Cc lists may be cut off.
+ROUTING_HEADERS = ("delivered-to", "x-original-to", "cc")
+MAX_RECIPIENTS_LENGTH = Email.__table__.c.to_emails.type.length
+
+
+def _recipients(imap_email: EmailContent) -> str:
+    """Return To, then the other routing headers, as one comma-separated column value.
+
+    Addresses are deduplicated case-insensitively and dropped once the column is full.
+    """
+    headers = {name.lower(): value for name, value in imap_email.headers.items()}
+    addresses = [
+        *imap_email.to_addresses,
+        *(
+            address
+            for _, address in getaddresses(
+                [headers[name] for name in ROUTING_HEADERS if name in headers]
+            )
+            if address
+        ),
+    ]
+    seen: set[str] = set()
+    kept: list[str] = []
+    length = -1
+    for address in addresses:
+        if address.casefold() in seen or length + len(address) + 1 > MAX_RECIPIENTS_LENGTH:
+            continue
+        seen.add(address.casefold())
+        kept.append(address)
+        length += len(address) + 1
+    return ",".join(kept)
+
+
+def _message_id(imap_email: EmailContent, uid_validity: int, mailbox: str) -> str:
+    """Return the key that identifies a fetched message: its UID scoped to its mailbox.
+
+    IMAP UIDs are only unique within one mailbox and one UIDVALIDITY, and the server
+    reuses them after a UIDVALIDITY reset, so both are part of the key. The RFC 5322
+    Message-ID is not used: a newsletter delivered to two aliases arrives as two
+    messages sharing one Message-ID, and each copy must be stored so it reaches its
+    own edition.
+    """
+    return f"<{uid_validity}.{imap_email.id}@{mailbox}>"
+
+
+@prefect.task(name="Stream emails into the database")
+def stream_emails(
+    checkpoint: SyncCheckpoint | None = None,
+    chunk_size: int = DEFAULT_STREAM_CHUNK_SIZE,
+) -> list[int]:
+    """Fetch, persist, and flag new emails chunk by chunk, returning persisted ids.
+
+    The checkpoint is committed after every chunk, so a failure part-way through
+    keeps the chunks that were already stored and resumes after them next run.
+    """
+    logger = get_run_logger()
+    client = get_imap_session(_session_scope())
+    persisted_ids: list[int] = []
+    for chunk_checkpoint, imap_emails in iter_email_chunks(
+        client, checkpoint, chunk_size=chunk_size
+    ):
+        new_emails = _persist_email_contents(imap_emails, chunk_checkpoint.uid_validity)
+        _store_sync_checkpoint(chunk_checkpoint)
+        client.mark_seen_many(imap_email.id for imap_email in imap_emails)
+        persisted_ids.extend(email.id for email in new_emails)
+        logger.info(
+            "Stored chunk of %d emails (%d new) up to UID %d.",
+            len(imap_emails),
+            len(new_emails),
+            chunk_checkpoint.last_uid,
+        )
+    return persisted_ids
+
+
 @prefect.task(name="Mark emails as seen")
 def mark_emails_seen(imap_emails: list[EmailContent]) -> None:
     """Mark the given IMAP emails as seen in the email source."""
-    settings = load_settings()
-    with ImapMailClient(
-        host=settings.imap_server, username=settings.imap_user, password=settings.imap_password
+    client = get_imap_session(_session_scope())
+    client.mark_seen_many(email.id for email in imap_emails)
+
+
+async def _poll_mailbox(
+    account: MailAccount,
+    chunk_size: int,
+    max_message_bytes: int | None = None,
+) -> list[int]:
+    """Stream new mail from one account, chunk by chunk, and return persisted ids."""
+    mailbox = account.mailbox_key
+    checkpoint = await asyncio.to_thread(_read_sync_checkpoint, INBOX_FOLDER, mailbox)
+    persisted_ids: list[int] = []
+    async with AsyncImapMailClient(
+        account.imap_server,
+        account.imap_user,
+        account.imap_password,
+        port=account.imap_port,
+        max_connections=account.max_connections,
+        max_message_bytes=max_message_bytes,
     ) as client:
-        for email in imap_emails:
-            client.mark_seen(email.id)
+        next_checkpoint, email_ids = await client.list_new_uids(
+            checkpoint, INBOX_FOLDER, DEFAULT_STREAM_MAX_MESSAGES
+        )
+        # Split each chunk so every pooled connection fetches a share of it.
+        batch_size = max(1, -(-chunk_size // account.max_connections))
+        for start in range(0, len(email_ids), chunk_size):
+            chunk_ids = email_ids[start : start + chunk_size]
+            imap_emails = await client.get_contents(chunk_ids, INBOX_FOLDER, batch_size)
+            new_emails = await asyncio.to_thread(
+                _persist_email_contents, imap_emails, next_checkpoint.uid_validity, mailbox
+            )
+            chunk_checkpoint = SyncCheckpoint(
+                uid_validity=next_checkpoint.uid_validity,
+                last_uid=int(chunk_ids[-1]),
+            )
+            await asyncio.to_thread(_store_sync_checkpoint, chunk_checkpoint, INBOX_FOLDER, mailbox)
+            await client.mark_seen_many(chunk_ids, INBOX_FOLDER)
+            persisted_ids.extend(email.id for email in new_emails)
+    return persisted_ids
+
+
+async def _poll_mailboxes(
+    accounts: tuple[MailAccount, ...],
+    chunk_size: int,
+    max_message_bytes: int | None = None,
+) -> list[list[int] | BaseException]:
+    return await asyncio.gather(
+        *(_poll_mailbox(account, chunk_size, max_message_bytes) for account in accounts),
+        return_exceptions=True,
+    )
+
+
+@prefect.task(name="Poll all mailboxes concurrently")
+def poll_mailboxes(chunk_size: int = DEFAULT_STREAM_CHUNK_SIZE) -> list[int]:
+    """Stream new mail from every configured account at once and return persisted ids.
+
+    A failing account is logged and skipped so the other mailboxes still ingest.
+    """
+    logger = get_run_logger()
+    settings = load_settings()
+    accounts = settings.mail_accounts
+    results = asyncio.run(
+        _poll_mailboxes(accounts, chunk_size, settings.imap_max_message_bytes or None)
+    )
+    persisted_ids: list[int] = []
+    for account, result in zip(accounts, results, strict=True):
+        if isinstance(result, BaseException):
+            logger.error("Polling mailbox %s failed: %r", account.name, result)
+            continue
+        logger.info("Stored %d new emails from mailbox %s.", len(result), account.name)
+        persisted_ids.extend(result)
+    return persisted_ids
+
+
+def _ingest_new_emails(
+    email_ids: list[int], max_concurrency: int | None, enqueue_only: bool
+) -> None:
+    if enqueue_only:
+        # Stored emails stay received for ``process_email_queue`` workers to claim.
+        return
+    # The emails are claimed like a queue worker would, so a concurrent
+    # ``process_email_queue`` run cannot extract them too, and failures are retried by the
+    # queue. Claiming batch by batch keeps every lease as short as a worker's.
+    worker_id = default_worker_id()
+    batch_size = max(queue_batch_size(), max_concurrency or 0)
+    lease = queue_lease()
+    retry_delay = queue_retry_delay()
+    max_attempts = queue_max_attempts()
+    session_factory = get_session_factory()
+    for start in range(0, len(email_ids), batch_size):
+        with session_factory() as session:
+            claimed = claim_emails(
+                session,
+                worker_id,
+                limit=batch_size,
+                lease=lease,
+                max_attempts=max_attempts,
+                email_ids=email_ids[start : start + batch_size],
+            )
+        if not claimed:
+            continue
+        if max_concurrency is None:
+            failures = ingest_email_batch(claimed)
+        else:
+            failures = ingest_emails_in_parallel(claimed, max_concurrency)
+        with session_factory() as session:
+            release_claims(
+                session,
+                worker_id,
+                claimed,
+                failures,
+                max_attempts=max_attempts,
+                retry_delay=retry_delay,
+            )
 
 
 @prefect.flow(name="Ingest Emails")
-def ingest_emails() -> None:
-    """Ingest emails from the configured email source."""
+def ingest_emails(
+    stream: bool = False,
+    chunk_size: int = DEFAULT_STREAM_CHUNK_SIZE,
+    max_concurrency: int | None = None,
+    enqueue_only: bool = False,
+) -> None:
+    """Ingest emails from the configured email source.
+
+    With ``stream`` enabled, emails are fetched and stored in chunks of ``chunk_size``
+    so memory stays bounded for large backlogs. With ``max_concurrency`` each email is
+    ingested in its own ``ingest_email`` subflow, that many at a time, instead of in one
+    batch flow. With ``enqueue_only`` new emails are only stored, and queue workers
+    running ``process_email_queue`` extract them.
+    """
     logger = get_run_logger()
-    imap_emails = fetch_emails()
-    if not imap_emails:
+    try:
+        checkpoint = load_sync_checkpoint()
+        if stream:
+            email_ids = stream_emails(checkpoint, chunk_size)
+        else:
+            next_checkpoint, imap_emails = fetch_emails(checkpoint)
+            persisted_emails = persist_emails(imap_emails, next_checkpoint.uid_validity)
+            save_sync_checkpoint(next_checkpoint)
+            mark_emails_seen(imap_emails)
+            email_ids = [email.id for email in persisted_emails]
+    finally:
+        close_imap_sessions(_session_scope())
+
+    if not email_ids:
+        logger.info("No new emails to ingest.")
+        return
+
+    logger.info(f"Fetched {len(email_ids)} new emails to ingest.")
+    _ingest_new_emails(email_ids, max_concurrency, enqueue_only)
+
+
+@prefect.flow(name="Ingest All Mailboxes")
+def ingest_all_mailboxes(
+    chunk_size: int = DEFAULT_STREAM_CHUNK_SIZE,
+    max_concurrency: int | None = None,
+    enqueue_only: bool = False,
+) -> None:
+    """Ingest emails from every account in IMAP_ACCOUNTS, polling them concurrently.
+
+    ``max_concurrency`` and ``enqueue_only`` work as for ``ingest_emails``.
+    """
+    logger = get_run_logger()
+    email_ids = poll_mailboxes(chunk_size)
+    if not email_ids:
         logger.info("No new emails to ingest.")
         return
 
-    logger.info(f"Fetched {len(imap_emails)} new emails to ingest.")
-    persisted_emails = persist_emails(imap_emails)
-    mark_emails_seen(imap_emails)
-    for email in persisted_emails:
-        ingest_email(email.id)
+    logger.info(f"Fetched {len(email_ids)} new emails to ingest.")
+    _ingest_new_emails(email_ids, max_concurrency, enqueue_only)
 
 
 if __name__ == "__main__":
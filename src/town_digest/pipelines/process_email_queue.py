@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import prefect
+from prefect.logging import get_run_logger
+
+from town_digest.db import get_session_factory
+from town_digest.pipelines.ingest_email import ingest_emails_in_parallel
+from town_digest.utils.email_queue import (
+    claim_emails,
+    default_worker_id,
+    queue_batch_size,
+    queue_lease,
+    queue_max_attempts,
+    queue_retry_delay,
+    release_claims,
+)
+
+
+@prefect.flow(name="Process Email Queue")
+def process_email_queue(
+    batch_size: int | None = None,
+    max_concurrency: int | None = None,
+    worker_id: str | None = None,
+    max_batches: int | None = None,
+) -> int:
+    """Drain received emails in claimed batches and return how many were processed.
+
+    Any number of workers can run this flow at once, on one host or many. Each claims
+    its own batch of ``batch_size`` emails and ingests it with
+    ``ingest_emails_in_parallel``. Failed emails are retried by a later claim until they
+    reach the attempt limit. ``EMAIL_QUEUE_BATCH_SIZE``, ``EMAIL_QUEUE_LEASE_SECONDS``,
+    ``EMAIL_QUEUE_RETRY_SECONDS`` and ``EMAIL_QUEUE_MAX_ATTEMPTS`` configure the queue.
+    The flow stops when nothing is left to claim or after ``max_batches`` batches.
+    """
+    logger = get_run_logger()
+    worker_id = worker_id or default_worker_id()
+    batch_size = batch_size or queue_batch_size()
+    lease = queue_lease()
+    retry_delay = queue_retry_delay()
+    max_attempts = queue_max_attempts()
+    session_factory = get_session_factory()
+
+    processed = failed = batches = 0
+    while max_batches is None or batches < max_batches:
+        with session_factory() as session:
+            email_ids = claim_emails(
+                session, worker_id, limit=batch_size, lease=lease, max_attempts=max_attempts
+            )
+        if not email_ids:
+            break
+        batches += 1
+        logger.info("Worker %s claimed %d emails.", worker_id, len(email_ids))
+        failures = ingest_emails_in_parallel(email_ids, max_concurrency)
+        with session_factory() as session:
+            processed += release_claims(
+                session,
+                worker_id,
+                email_ids,
+                failures,
+                max_attempts=max_attempts,
+                retry_delay=retry_delay,
+            )
+        failed += len(failures)
+
+    logger.info(
+        "Worker %s processed %d emails in %d batches, %d failed.",
+        worker_id,
+        processed,
+        batches,
+        failed,
+    )
+    return processed
+
+
+if __name__ == "__main__":
+    process_email_queue()
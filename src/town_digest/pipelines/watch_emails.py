@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import contextlib
+import logging
+import threading
+
+from imapclient.exceptions import IMAPClientError
+
+from town_digest.config import load_settings
+from town_digest.pipelines.ingest_emails import (
+    DEFAULT_STREAM_CHUNK_SIZE,
+    INBOX_FOLDER,
+    ingest_emails,
+)
+from town_digest.utils.email_client import (
+    DEFAULT_IDLE_TIMEOUT,
+    DEFAULT_NOOP_POLL_INTERVAL,
+    ImapMailClient,
+)
+
+RECONNECT_DELAY_SECONDS = 30
+
+logger = logging.getLogger(__name__)
+
+
+def watch_emails(
+    *,
+    idle_timeout: float = DEFAULT_IDLE_TIMEOUT,
+    poll_interval: float = DEFAULT_NOOP_POLL_INTERVAL,
+    chunk_size: int = DEFAULT_STREAM_CHUNK_SIZE,
+    stop_event: threading.Event | None = None,
+    client: ImapMailClient | None = None,
+) -> None:
+    """Run the ingest flow whenever the mailbox reports new mail.
+
+    The watcher holds its own IMAP connection in IDLE (or NOOP polling when the
+    server lacks IDLE) and only wakes the checkpointed ``ingest_emails`` flow when
+    new messages arrive, so each run fetches just the new UIDs. It catches up once
+    on start and after every reconnect, since notifications may have been missed.
+    """
+    stop = stop_event or threading.Event()
+    if client is None:
+        settings = load_settings()
+        client = ImapMailClient(
+            host=settings.imap_server,
+            port=settings.imap_port,
+            username=settings.imap_user,
+            password=settings.imap_password,
+        )
+
+    needs_ingest = True
+    try:
+        while not stop.is_set():
+            if needs_ingest:
+                try:
+                    ingest_emails(stream=True, chunk_size=chunk_size)
+                except Exception:
+                    logger.exception("Email ingestion failed; waiting for the next notification.")
+            try:
+                client.connect()
+                needs_ingest = client.wait_for_new_mail(
+                    INBOX_FOLDER, timeout=idle_timeout, poll_interval=poll_interval
+                )
+            except (IMAPClientError, OSError):
+                logger.warning(
+                    "Lost IMAP connection while watching for mail; reconnecting in %d seconds.",
+                    RECONNECT_DELAY_SECONDS,
+                    exc_info=True,
+                )
+                client.disconnect()
+                stop.wait(RECONNECT_DELAY_SECONDS)
+                needs_ingest = True
+            else:
+                if needs_ingest:
+                    logger.info("New mail reported by the server; starting ingestion.")
+    finally:
+        with contextlib.suppress(IMAPClientError, OSError):
+            client.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    watch_emails()
@@ -1,3 +1,18 @@
-from town_digest.utils.email_client import EmailContent, EmailRef, ImapMailClient, MailClient
+from town_digest.utils.async_email_client import AsyncImapMailClient, AsyncMailClient
+from town_digest.utils.email_client import (
+    EmailContent,
+    EmailRef,
+    ImapMailClient,
+    MailClient,
+    SyncCheckpoint,
+)
 
-__all__ = ["EmailContent", "EmailRef", "ImapMailClient", "MailClient"]
+__all__ = [
+    "AsyncImapMailClient",
+    "AsyncMailClient",
+    "EmailContent",
+    "EmailRef",
+    "ImapMailClient",
+    "MailClient",
+    "SyncCheckpoint",
+]
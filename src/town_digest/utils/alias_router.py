@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections.abc import Iterable
+from dataclasses import dataclass
+from email.utils import getaddresses
+
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Session
+
+from town_digest.models.email_alias import EmailAlias
+
+DEFAULT_ALIAS_ROUTER_REFRESH_SECONDS = 60.0
+
+
+@dataclass(frozen=True, slots=True)
+class AliasRoute:
+    """The alias a recipient address resolved to and the edition it feeds."""
+
+    id: int
+    edition_id: int
+    address: str
+
+
+def normalize_address(address: str) -> str:
+    """Return ``address`` without display name or angle brackets, lowercased."""
+    parsed = getaddresses([address])
+    bare = parsed[0][1] if parsed and parsed[0][1] else address
+    return bare.strip().strip("<>").casefold()
+
+
+def parse_recipients(recipients: str | Iterable[str] | None) -> list[str]:
+    """Split a comma-separated header value or a list of them into normalized addresses."""
+    if not recipients:
+        return []
+    values = [recipients] if isinstance(recipients, str) else list(recipients)
+    return [normalize_address(address) for _, address in getaddresses(values) if address]
+
+
+class AliasRouter:
+    """Case-insensitive lookup from recipient addresses to email aliases.
+
+    Lookups never touch the database. A recipient matches an alias exactly or after its
+    plus tags are dropped one at a time, so ``tdigest+east-windsor+spring@run.box`` reaches
+    ``tdigest+east-windsor@run.box`` and ``news+town@example.com`` reaches
+    ``news@example.com``.
+    """
+
+    def __init__(self, aliases: Iterable[AliasRoute], *, version: tuple = ()) -> None:
+        self.version = version
+        self._routes: dict[str, AliasRoute] = {}
+        # Addresses are unique, but normalizing may fold two together; the oldest wins.
+        for route in sorted(aliases, key=lambda route: route.id):
+            self._routes.setdefault(normalize_address(route.address), route)
+
+    @classmethod
+    def load(cls, session: Session) -> AliasRouter:
+        rows = session.execute(select(EmailAlias.id, EmailAlias.edition_id, EmailAlias.address))
+        return cls(
+            (
+                AliasRoute(id=id, edition_id=edition_id, address=address)
+                for id, edition_id, address in rows
+            ),
+            version=alias_table_version(session),
+        )
+
+    def __len__(self) -> int:
+        return len(self._routes)
+
+    def resolve(self, recipients: str | Iterable[str] | None) -> AliasRoute | None:
+        """Return the alias of the first recipient that has one.
+
+        ``recipients`` is a comma-separated header value or a list of addresses. Several
+        matching recipients never raise; the earliest one in the list wins.
+        """
+        for address in parse_recipients(recipients):
+            route = self._lookup(address)
+            if route is not None:
+                return route
+        return None
+
+    def _lookup(self, address: str) -> AliasRoute | None:
+        local, _, domain = address.rpartition("@")
+        while True:
+            route = self._routes.get(f"{local}@{domain}" if local else address)
+            if route is not None or "+" not in local:
+                return route
+            local = local.rsplit("+", 1)[0]
+
+
+def alias_table_version(session: Session) -> tuple:
+    """Return a cheap fingerprint of ``email_aliases`` that changes with any write."""
+    row = session.execute(
+        select(func.count(EmailAlias.id), func.max(EmailAlias.id), func.max(EmailAlias.updated_at))
+    ).one()
+    return tuple(row)
+
+
+# Reentrant because loading may autoflush an alias change, which invalidates the router.
+_lock = threading.RLock()
+_router: AliasRouter | None = None
+_router_local_version = -1
+_checked_at = 0.0
+# Bumped whenever this process flushes an alias change.
+_local_version = 0
+
+
+def get_alias_router(session: Session) -> AliasRouter:
+    """Return the process-wide alias router, loading it with ``session`` when stale.
+
+    Alias changes flushed in this process invalidate the router immediately. Changes
+    made elsewhere are noticed by comparing :func:`alias_table_version` at most every
+    ``ALIAS_ROUTER_REFRESH_SECONDS``; otherwise no query is issued.
+    """
+    global _router, _router_local_version, _checked_at
+    with _lock:
+        local_version = _local_version
+        now = time.monotonic()
+        if (
+            _router is not None
+            and _router_local_version == local_version
+            and now - _checked_at < _refresh_seconds()
+        ):
+            return _router
+        if (
+            _router is None
+            or _router_local_version != local_version
+            or _router.version != alias_table_version(session)
+        ):
+            _router = AliasRouter.load(session)
+            _router_local_version = local_version
+        _checked_at = now
+        return _router
+
+
+def invalidate_alias_router() -> None:
+    """Force the next :func:`get_alias_router` call to reload the aliases."""
+    global _local_version
+    with _lock:
+        _local_version += 1
+
+
+def reset_alias_router() -> None:
+    global _router, _router_local_version, _checked_at
+    with _lock:
+        _router = None
+        _router_local_version = -1
+        _checked_at = 0.0
+
+
+@event.listens_for(EmailAlias, "after_insert")
+@event.listens_for(EmailAlias, "after_update")
+@event.listens_for(EmailAlias, "after_delete")
+def _invalidate_on_change(*_: object) -> None:
+    invalidate_alias_router()
+
+
+def _refresh_seconds() -> float:
+    return float(
+        os.environ.get("ALIAS_ROUTER_REFRESH_SECONDS", DEFAULT_ALIAS_ROUTER_REFRESH_SECONDS)
+    )
@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable, Iterable, Sequence
+from typing import Protocol, TypeVar
+
+from town_digest.utils.email_client import (
+    DEFAULT_FETCH_BATCH_SIZE,
+    EmailContent,
+    EmailRef,
+    ImapMailClient,
+    SyncCheckpoint,
+)
+
+T = TypeVar("T")
+
+
+class AsyncMailClient(Protocol):
+    async def list(self, folder: str = "INBOX", limit: int = 100) -> list[EmailRef]: ...
+
+    async def get_content(self, email_id: str, folder: str = "INBOX") -> EmailContent: ...
+
+    async def get_contents(
+        self,
+        email_ids: Sequence[str],
+        folder: str = "INBOX",
+        batch_size: int = DEFAULT_FETCH_BATCH_SIZE,
+    ) -> list[EmailContent]: ...
+
+    async def move(self, email_id: str, destination: str) -> None: ...
+
+
+class AsyncImapMailClient:
+    """Asyncio mail client backed by a bounded pool of IMAP connections.
+
+    IMAP commands are blocking, so each call runs on one of at most
+    ``max_connections`` pooled ``ImapMailClient`` connections in a worker thread.
+    Many accounts can then be polled concurrently from a single event loop while
+    each account stays within its own connection limit.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        username: str,
+        password: str,
+        *,
+        port: int = 993,
+        default_folder: str = "INBOX",
+        max_connections: int = 1,
+        max_message_bytes: int | None = None,
+    ) -> None:
+        if max_connections < 1:
+            raise ValueError("max_connections must be at least 1.")
+        self._connections = [
+            ImapMailClient(
+                host,
+                username,
+                password,
+                port=port,
+                default_folder=default_folder,
+                max_message_bytes=max_message_bytes,
+            )
+            for _ in range(max_connections)
+        ]
+        self._available: asyncio.Queue[ImapMailClient] = asyncio.Queue()
+        for connection in self._connections:
+            self._available.put_nowait(connection)
+
+    async def __aenter__(self) -> AsyncImapMailClient:
+        return self
+
+    async def __aexit__(self, exc_type, exc, traceback) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        await asyncio.gather(
+            *(asyncio.to_thread(connection.close) for connection in self._connections)
+        )
+
+    async def list(self, folder: str = "INBOX", limit: int = 100) -> list[EmailRef]:
+        return await self._run(lambda client: list(client.list(folder, limit)))
+
+    async def list_new_uids(
+        self,
+        checkpoint: SyncCheckpoint | None,
+        folder: str = "INBOX",
+        limit: int = 100,
+    ) -> tuple[SyncCheckpoint, list[str]]:
+        return await self._run(lambda client: client.list_new_uids(checkpoint, folder, limit))
+
+    async def get_content(self, email_id: str, folder: str = "INBOX") -> EmailContent:
+        return await self._run(lambda client: client.get_content(email_id, folder))
+
+    async def get_contents(
+        self,
+        email_ids: Sequence[str],
+        folder: str = "INBOX",
+        batch_size: int = DEFAULT_FETCH_BATCH_SIZE,
+    ) -> list[EmailContent]:
+        """Fetch messages in batches spread across the pooled connections."""
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1.")
+        batches = [
+            list(email_ids[start : start + batch_size])
+            for start in range(0, len(email_ids), batch_size)
+        ]
+        results = await asyncio.gather(
+            *(
+                self._run(
+                    lambda client, batch=batch: list(client.get_contents(batch, folder, batch_size))
+                )
+                for batch in batches
+            )
+        )
+        return [content for batch_contents in results for content in batch_contents]
+
+    async def mark_seen_many(self, email_ids: Iterable[str], folder: str = "INBOX") -> None:
+        uids = list(email_ids)
+        await self._run(lambda client: client.mark_seen_many(uids, folder))
+
+    async def move(self, email_id: str, destination: str) -> None:
+        await self._run(lambda client: client.move(email_id, destination))
+
+    async def move_many(
+        self,
+        email_ids: Iterable[str],
+        destination: str,
+        folder: str | None = None,
+    ) -> None:
+        uids = list(email_ids)
+        await self._run(lambda client: client.move_many(uids, destination, folder))
+
+    async def _run(self, operation: Callable[[ImapMailClient], T]) -> T:
+        connection = await self._available.get()
+        try:
+            return await asyncio.to_thread(self._call_connected, connection, operation)
+        finally:
+            self._available.put_nowait(connection)
+
+    def _call_connected(
+        self, connection: ImapMailClient, operation: Callable[[ImapMailClient], T]
+    ) -> T:
+        connection.connect()
+        return operation(connection)
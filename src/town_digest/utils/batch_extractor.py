@@ -0,0 +1,330 @@
+from __future__ import annotations
+
+import json
+import time
+import uuid
+from collections.abc import Callable, Mapping, Sequence
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Protocol
+
+from openai import OpenAI
+
+from town_digest.utils.extraction_cache import get_extraction_cache
+from town_digest.utils.extraction_chunks import merge_extractions
+from town_digest.utils.newsletter_extractor import (
+    ALL_EXTRACTION_KINDS,
+    ExtractionKind,
+    ExtractionRequest,
+    ExtractionUsage,
+    NewsletterExtraction,
+    build_extraction_request,
+    parse_extraction_output,
+    split_extraction_request,
+)
+from town_digest.utils.openai_client import build_openai_client
+
+BATCH_ENDPOINT = "/v1/responses"
+BATCH_COMPLETION_WINDOW = "24h"
+DEFAULT_BATCH_POLL_INTERVAL_SECONDS = 60.0
+DEFAULT_BATCH_TIMEOUT_SECONDS = 26 * 60 * 60
+TERMINAL_BATCH_STATUSES = frozenset({"completed", "failed", "expired", "cancelled"})
+
+
+@dataclass(frozen=True, slots=True)
+class BatchJob:
+    id: str
+    status: str
+    output_file_id: str | None = None
+    error_file_id: str | None = None
+
+
+class BatchBackend(Protocol):
+    """Where batch request files are sent; OpenAI's Batch API or a local stand-in."""
+
+    def submit(self, requests_path: Path) -> BatchJob: ...
+
+    def retrieve(self, batch_id: str) -> BatchJob: ...
+
+    def download(self, file_id: str) -> bytes: ...
+
+
+class OpenAIBatchBackend:
+    """Run batch files through the OpenAI Batch API (``/v1/responses``)."""
+
+    def __init__(self, client: OpenAI | None = None) -> None:
+        self._client = client or build_openai_client()
+
+    def submit(self, requests_path: Path) -> BatchJob:
+        with requests_path.open("rb") as handle:
+            uploaded = self._client.files.create(file=handle, purpose="batch")
+        batch = self._client.batches.create(
+            input_file_id=uploaded.id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window=BATCH_COMPLETION_WINDOW,
+        )
+        return _batch_job(batch)
+
+    def retrieve(self, batch_id: str) -> BatchJob:
+        return _batch_job(self._client.batches.retrieve(batch_id))
+
+    def download(self, file_id: str) -> bytes:
+        return self._client.files.content(file_id).content
+
+
+class LocalBatchBackend:
+    """In-process stand-in for the Batch API, for tests and offline runs.
+
+    ``respond`` receives each request body and returns the structured-output text.
+    Jobs report ``in_progress`` on the first ``retrieve`` so callers exercise polling.
+    """
+
+    def __init__(self, respond: Callable[[dict[str, Any]], str]) -> None:
+        self._respond = respond
+        self._files: dict[str, bytes] = {}
+        self._jobs: dict[str, BatchJob] = {}
+        self._polled: set[str] = set()
+
+    def submit(self, requests_path: Path) -> BatchJob:
+        output_lines = []
+        for line in requests_path.read_text(encoding="utf-8").splitlines():
+            request = json.loads(line)
+            output_text = self._respond(request["body"])
+            body = {
+                "output": [
+                    {"type": "message", "content": [{"type": "output_text", "text": output_text}]}
+                ]
+            }
+            output_lines.append(
+                json.dumps(
+                    {
+                        "custom_id": request["custom_id"],
+                        "response": {"status_code": 200, "body": body},
+                        "error": None,
+                    }
+                )
+            )
+        output_file_id = f"file-{uuid.uuid4().hex}"
+        self._files[output_file_id] = "\n".join(output_lines).encode("utf-8")
+        batch_id = f"batch-{uuid.uuid4().hex}"
+        self._jobs[batch_id] = BatchJob(
+            id=batch_id, status="completed", output_file_id=output_file_id
+        )
+        return BatchJob(id=batch_id, status="validating")
+
+    def retrieve(self, batch_id: str) -> BatchJob:
+        if batch_id not in self._polled:
+            self._polled.add(batch_id)
+            return BatchJob(id=batch_id, status="in_progress")
+        return self._jobs[batch_id]
+
+    def download(self, file_id: str) -> bytes:
+        return self._files[file_id]
+
+
+def write_batch_requests(requests: Mapping[str, ExtractionRequest], path: Path) -> Path:
+    """Write one Batch API request line per request, keyed by its ``custom_id``."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", encoding="utf-8") as handle:
+        for custom_id, request in requests.items():
+            line = {
+                "custom_id": custom_id,
+                "method": "POST",
+                "url": BATCH_ENDPOINT,
+                "body": request.body(),
+            }
+            handle.write(json.dumps(line) + "\n")
+    return path
+
+
+def run_batch_extraction(
+    email_texts: Mapping[int, str],
+    *,
+    backend: BatchBackend,
+    request_dir: Path,
+    kinds: Mapping[int, Sequence[ExtractionKind]] | None = None,
+    usages: Mapping[int, list[ExtractionUsage]] | None = None,
+    model: str | None = None,
+    poll_interval: float = DEFAULT_BATCH_POLL_INTERVAL_SECONDS,
+    timeout: float = DEFAULT_BATCH_TIMEOUT_SECONDS,
+    sleep: Callable[[float], None] = time.sleep,
+) -> dict[int, NewsletterExtraction | Exception]:
+    """Extract many emails through one batch job and map the results to email ids.
+
+    ``kinds`` narrows each email's request like ``extract_newsletter_items`` does; an
+    email without kinds is not sent. Long texts are split into one request per chunk
+    and the chunk results merged, also as ``extract_newsletter_items`` does. Requests
+    already in the extraction cache are answered without being submitted, and batch
+    results are written back to it. The usage of every request is appended to the
+    email's list in ``usages`` when given. A per-email failure is returned as an
+    exception in place of its extraction.
+    """
+    results: dict[int, NewsletterExtraction | Exception] = {}
+    chunk_requests: dict[int, list[ExtractionRequest]] = {}
+    chunk_outputs: dict[str, str | Exception] = {}
+    pending: dict[str, ExtractionRequest] = {}
+    cache = get_extraction_cache()
+    for email_id, email_text in email_texts.items():
+        email_kinds = kinds[email_id] if kinds is not None else ALL_EXTRACTION_KINDS
+        if not email_kinds or not email_text.strip():
+            results[email_id] = {"events": [], "announcements": []}
+            continue
+        requests = split_extraction_request(
+            build_extraction_request(email_text, kinds=email_kinds, model=model)
+        )
+        chunk_requests[email_id] = requests
+        for index, request in enumerate(requests):
+            custom_id = _custom_id(email_id, index, len(requests))
+            cached = cache.get(request.cache_key) if cache is not None else None
+            if cached is None:
+                pending[custom_id] = request
+            else:
+                chunk_outputs[custom_id] = cached
+                _record_usage(
+                    usages,
+                    email_id,
+                    ExtractionUsage(
+                        model=request.model, duration_seconds=0.0, cached=True, kinds=request.kinds
+                    ),
+                )
+
+    if pending:
+        job = _run_batch_job(pending, backend, request_dir, poll_interval, timeout, sleep)
+        outputs: dict[str, tuple[str | Exception, dict[str, int]]] = {}
+        for file_id in (job.output_file_id, job.error_file_id):
+            if file_id is not None:
+                outputs.update(_parse_batch_output(backend.download(file_id)))
+        for custom_id, (output, usage) in outputs.items():
+            request = pending.get(custom_id)
+            if request is None:
+                continue
+            chunk_outputs[custom_id] = output
+            # Batch requests have no latency of their own.
+            _record_usage(
+                usages,
+                _email_id(custom_id),
+                ExtractionUsage(
+                    model=request.model,
+                    duration_seconds=0.0,
+                    input_tokens=usage.get("input_tokens", 0),
+                    output_tokens=usage.get("output_tokens", 0),
+                    kinds=request.kinds,
+                ),
+            )
+        for custom_id in pending.keys() - chunk_outputs.keys():
+            chunk_outputs[custom_id] = RuntimeError(
+                f"Batch {job.id} ended with status {job.status!r} without a result."
+            )
+
+    for email_id, requests in chunk_requests.items():
+        extractions: list[NewsletterExtraction] = []
+        error: Exception | None = None
+        for index, request in enumerate(requests):
+            custom_id = _custom_id(email_id, index, len(requests))
+            output = chunk_outputs[custom_id]
+            extraction = (
+                output if isinstance(output, Exception) else _parse_or_error(output, request)
+            )
+            if isinstance(extraction, Exception):
+                # The other chunks are still cached, so a retry only pays for this one.
+                error = error or extraction
+                continue
+            extractions.append(extraction)
+            if cache is not None and custom_id in pending:
+                # Only valid output is cached, as for synchronous requests.
+                cache.put(
+                    request.cache_key,
+                    model=request.model,
+                    prompt_version=request.prompt_version,
+                    output_text=output,
+                )
+        if error is not None:
+            results[email_id] = error
+        else:
+            results[email_id] = (
+                extractions[0] if len(extractions) == 1 else merge_extractions(extractions)
+            )
+    return results
+
+
+def _run_batch_job(
+    requests: Mapping[str, ExtractionRequest],
+    backend: BatchBackend,
+    request_dir: Path,
+    poll_interval: float,
+    timeout: float,
+    sleep: Callable[[float], None],
+) -> BatchJob:
+    requests_path = write_batch_requests(
+        requests, request_dir / f"extraction-{uuid.uuid4().hex}.jsonl"
+    )
+    job = backend.submit(requests_path)
+    deadline = time.monotonic() + timeout
+    while job.status not in TERMINAL_BATCH_STATUSES:
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"Batch {job.id} did not finish within {timeout:.0f} seconds.")
+        sleep(poll_interval)
+        job = backend.retrieve(job.id)
+    return job
+
+
+def _record_usage(
+    usages: Mapping[int, list[ExtractionUsage]] | None, email_id: int, usage: ExtractionUsage
+) -> None:
+    if usages is not None and email_id in usages:
+        usages[email_id].append(usage)
+
+
+def _parse_batch_output(raw: bytes) -> dict[str, tuple[str | Exception, dict[str, int]]]:
+    """Map each ``custom_id`` to its output text or error, and its token usage."""
+    outputs: dict[str, tuple[str | Exception, dict[str, int]]] = {}
+    for line in raw.decode("utf-8").splitlines():
+        if not line.strip():
+            continue
+        result = json.loads(line)
+        response = result.get("response") or {}
+        body = response.get("body") or {}
+        usage = body.get("usage") or {}
+        if result.get("error") or response.get("status_code") != 200:
+            error = result.get("error") or body.get("error")
+            outputs[result["custom_id"]] = (ValueError(f"Batch request failed: {error}"), usage)
+            continue
+        outputs[result["custom_id"]] = (_output_text(body), usage)
+    return outputs
+
+
+def _output_text(body: dict[str, Any]) -> str:
+    # Mirrors Response.output_text: the concatenated text of every output message.
+    return "".join(
+        content.get("text", "")
+        for item in body.get("output", [])
+        if item.get("type") == "message"
+        for content in item.get("content", [])
+        if content.get("type") == "output_text"
+    )
+
+
+def _parse_or_error(
+    output_text: str, request: ExtractionRequest
+) -> NewsletterExtraction | Exception:
+    try:
+        return parse_extraction_output(output_text, request.kinds)
+    except ValueError as exc:
+        return exc
+
+
+def _custom_id(email_id: int, chunk: int, chunks: int) -> str:
+    return f"email-{email_id}" if chunks == 1 else f"email-{email_id}-{chunk}"
+
+
+def _email_id(custom_id: str) -> int:
+    return int(custom_id.removeprefix("email-").split("-", 1)[0])
+
+
+def _batch_job(batch: Any) -> BatchJob:
+    return BatchJob(
+        id=batch.id,
+        status=batch.status,
+        output_file_id=batch.output_file_id,
+        error_file_id=batch.error_file_id,
+    )
@@ -1,15 +1,32 @@
 from __future__ import annotations
 
-from collections.abc import Iterable
+import contextlib
+import time
+from collections.abc import Callable, Iterable, Sequence
 from dataclasses import dataclass
 from datetime import UTC, datetime
 from email import policy
 from email.message import Message
 from email.parser import BytesParser
 from email.utils import getaddresses, parsedate_to_datetime
-from typing import Protocol
+from typing import Protocol, TypeVar
 
 from imapclient import IMAPClient
+from imapclient.exceptions import IMAPClientAbortError
+from imapclient.response_types import BodyData
+
+DEFAULT_FETCH_BATCH_SIZE = 50
+HEADER_FIELDS_FETCH = "BODY.PEEK[HEADER.FIELDS (SUBJECT FROM TO DATE)]"
+# BODY.PEEK[] never sets \Seen, so reads are safe on a folder selected read-write.
+MESSAGE_FETCH = "BODY.PEEK[]"
+MESSAGE_FETCH_KEY = b"BODY[]"
+STRUCTURE_FETCH = ["BODYSTRUCTURE", "BODY.PEEK[HEADER]"]
+# RFC 2177 servers may drop IDLE after 30 minutes; re-issue it comfortably before.
+DEFAULT_IDLE_TIMEOUT = 25 * 60
+DEFAULT_NOOP_POLL_INTERVAL = 60
+DEFAULT_ARCHIVE_FOLDER = "Archive"
+
+T = TypeVar("T")
 
 
 @dataclass(frozen=True, slots=True)
@@ -22,6 +39,12 @@ class EmailRef:
     snippet: str | None = None
 
 
+@dataclass(frozen=True, slots=True)
+class SyncCheckpoint:
+    uid_validity: int
+    last_uid: int
+
+
 @dataclass(frozen=True, slots=True)
 class EmailContent:
     id: str
@@ -39,8 +62,24 @@ class MailClient(Protocol):
 
     def get_content(self, email_id: str, folder: str = "INBOX") -> EmailContent: ...
 
+    def get_contents(
+        self,
+        email_ids: Sequence[str],
+        folder: str = "INBOX",
+        batch_size: int = DEFAULT_FETCH_BATCH_SIZE,
+    ) -> Iterable[EmailContent]: ...
+
     def move(self, email_id: str, destination: str) -> None: ...
 
+    def mark_seen_many(self, email_ids: Iterable[str], folder: str = "INBOX") -> None: ...
+
+    def move_many(
+        self,
+        email_ids: Iterable[str],
+        destination: str,
+        folder: str | None = None,
+    ) -> None: ...
+
 
 class ImapMailClient:
     """IMAP-backed mail client for listing, fetching, and moving messages."""
@@ -53,13 +92,20 @@ class ImapMailClient:
         *,
         port: int = 993,
         default_folder: str = "INBOX",
+        max_message_bytes: int | None = None,
+        imap_client_factory: Callable[[str, int], IMAPClient] | None = None,
     ) -> None:
         self._host = host
         self._port = port
         self._username = username
         self._password = password
         self._default_folder = default_folder
+        self._max_message_bytes = max_message_bytes
+        self._imap_client_factory = imap_client_factory or _connect_ssl
         self._client: IMAPClient | None = None
+        self._selected_folder: str | None = None
+        self._selected_readonly = True
+        self._select_info: dict[bytes, object] = {}
 
     def __enter__(self) -> ImapMailClient:
         self.connect()
@@ -71,7 +117,7 @@ class ImapMailClient:
     def connect(self) -> None:
         if self._client is not None:
             return
-        self._client = IMAPClient(self._host, self._port, ssl=True)
+        self._client = self._imap_client_factory(self._host, self._port)
         self._client.login(self._username, self._password)
 
     def close(self) -> None:
@@ -81,6 +127,20 @@ class ImapMailClient:
             self._client.logout()
         finally:
             self._client = None
+            self._forget_selection()
+
+    def disconnect(self) -> None:
+        """Drop the connection without LOGOUT, e.g. after the server went away."""
+        client, self._client = self._client, None
+        self._forget_selection()
+        if client is None:
+            return
+        with contextlib.suppress(IMAPClientAbortError, OSError):
+            client.shutdown()
+
+    @property
+    def is_connected(self) -> bool:
+        return self._client is not None
 
     def list(self, folder: str = "INBOX", limit: int = 100) -> Iterable[EmailRef]:
         yield from self._list_with_search(["ALL"], folder, limit)
@@ -88,77 +148,450 @@ class ImapMailClient:
     def list_unseen(self, folder: str = "INBOX", limit: int = 100) -> Iterable[EmailRef]:
         yield from self._list_with_search(["UNSEEN"], folder, limit)
 
-    def get_content(self, email_id: str, folder: str = "INBOX") -> EmailContent:
-        client = self._require_connection()
-        client.select_folder(folder, readonly=True)
-        raw_message = self._fetch_message(int(email_id), client)
-        message = _parse_message(raw_message)
-        text, html = _extract_text_html(message)
-        return EmailContent(
-            id=email_id,
-            subject=_get_header(message, "subject"),
-            from_address=_get_header(message, "from"),
-            to_addresses=_parse_addresses(message.get("to")),
-            date=_parse_date(message.get("date")),
-            text=text,
-            html=html,
-            headers=_headers_dict(message),
+    def list_new_uids(
+        self,
+        checkpoint: SyncCheckpoint | None,
+        folder: str = "INBOX",
+        limit: int = 100,
+    ) -> tuple[SyncCheckpoint, list[str]]:
+        """Return UIDs that arrived after ``checkpoint`` and the checkpoint covering them.
+
+        Without a usable checkpoint (first run, or the server reset UIDVALIDITY) the
+        most recent ``limit`` messages are returned. Otherwise only ``UID n+1:*`` is
+        searched and the oldest ``limit`` new UIDs are returned, so a large backlog is
+        drained over successive runs without skipping messages.
+        """
+        uid_validity = int(
+            self._with_reconnect(lambda: self._select(folder)).get(b"UIDVALIDITY", 0)
+        )
+
+        if checkpoint is None or checkpoint.uid_validity != uid_validity:
+            uids = sorted(self._search(folder, ["ALL"]))[-limit:]
+            last_uid = 0
+        else:
+            last_uid = checkpoint.last_uid
+            # "n:*" always matches the highest UID, even when it is below n.
+            uids = sorted(
+                uid for uid in self._search(folder, ["UID", f"{last_uid + 1}:*"]) if uid > last_uid
+            )[:limit]
+
+        next_checkpoint = SyncCheckpoint(
+            uid_validity=uid_validity,
+            last_uid=max(uids, default=last_uid),
         )
+        return next_checkpoint, [str(uid) for uid in uids]
+
+    def get_content(self, email_id: str, folder: str = "INBOX") -> EmailContent:
+        for content in self.get_contents([email_id], folder):
+            return content
+        raise RuntimeError("IMAP fetch did not return message bytes.")
+
+    def get_contents(
+        self,
+        email_ids: Sequence[str],
+        folder: str = "INBOX",
+        batch_size: int = DEFAULT_FETCH_BATCH_SIZE,
+    ) -> Iterable[EmailContent]:
+        """Fetch the textual content of many UIDs, selecting the folder once per call.
+
+        Each batch first fetches BODYSTRUCTURE and headers, then downloads only the
+        text/plain and text/html parts with ``BODY.PEEK[n]``, so attachments never
+        cross the wire. When ``max_message_bytes`` is set, at most that many encoded
+        bytes of text are fetched per message and longer parts are truncated. Messages
+        the server no longer has (e.g. expunged between listing and fetching) are
+        skipped.
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1.")
+        uids = [int(email_id) for email_id in email_ids]
+        for batch in _batched(uids, batch_size):
+            yield from self._fetch_text_contents(folder, batch)
+
+    def _fetch_text_contents(self, folder: str, uids: list[int]) -> Iterable[EmailContent]:
+        structure_data = self._fetch(folder, uids, STRUCTURE_FETCH)
+
+        plans: dict[int, list[tuple[_TextPart, str, bytes]]] = {}
+        full_message_uids: list[int] = []
+        for uid in uids:
+            data = structure_data.get(uid)
+            if data is None:
+                continue
+            try:
+                parts = _text_parts(BodyData.create(data[b"BODYSTRUCTURE"]))
+            except (KeyError, IndexError, TypeError, ValueError):
+                full_message_uids.append(uid)
+                continue
+            plans[uid] = _part_fetches(parts, self._max_message_bytes)
+
+        # Messages usually share a layout, so grouping by fetch items keeps this to a
+        # handful of FETCH commands per batch.
+        groups: dict[tuple[str, ...], list[int]] = {}
+        for uid, plan in plans.items():
+            items = tuple(item for _, item, _ in plan)
+            if items:
+                groups.setdefault(items, []).append(uid)
+        part_data: dict[int, dict[bytes, object]] = {}
+        for items, group_uids in groups.items():
+            part_data.update(self._fetch(folder, group_uids, list(items)))
+        if full_message_uids:
+            part_data.update(self._fetch(folder, full_message_uids, [MESSAGE_FETCH]))
+
+        for uid in uids:
+            if uid in plans:
+                header_bytes = structure_data[uid].get(b"BODY[HEADER]")
+                if not isinstance(header_bytes, (bytes, bytearray)):
+                    continue
+                fetched = part_data.get(uid, {})
+                text, html = _decode_text_parts(
+                    (part, fetched.get(key)) for part, _, key in plans[uid]
+                )
+                message = _parse_message(bytes(header_bytes))
+                yield _content_from_message(str(uid), message, text, html)
+            elif uid in full_message_uids:
+                raw = part_data.get(uid, {}).get(MESSAGE_FETCH_KEY)
+                if isinstance(raw, (bytes, bytearray)):
+                    yield _build_content(str(uid), bytes(raw))
 
     def mark_seen(self, email_id: str, folder: str = "INBOX") -> None:
-        client = self._require_connection()
-        client.select_folder(folder, readonly=False)
-        client.add_flags([int(email_id)], "\\Seen")
+        self.mark_seen_many([email_id], folder)
+
+    def mark_seen_many(self, email_ids: Iterable[str], folder: str = "INBOX") -> None:
+        """Flag all given UIDs as seen with a single STORE over a compressed UID set."""
+        uid_set = _compress_uid_set(int(email_id) for email_id in email_ids)
+        if not uid_set:
+            return
+
+        def operation() -> None:
+            self._select(folder, readonly=False)
+            self._require_connection().add_flags(uid_set, "\\Seen", silent=True)
+
+        self._with_reconnect(operation)
 
     def move(self, email_id: str, destination: str) -> None:
+        self.move_many([email_id], destination)
+
+    def move_many(
+        self,
+        email_ids: Iterable[str],
+        destination: str,
+        folder: str | None = None,
+    ) -> None:
+        """Move all given UIDs to ``destination`` with a single MOVE command."""
+        uid_set = _compress_uid_set(int(email_id) for email_id in email_ids)
+        if not uid_set:
+            return
+        source = folder or self._default_folder
+
+        def operation() -> None:
+            self._select(source, readonly=False)
+            self._require_connection().move(uid_set, destination)
+
+        self._with_reconnect(operation)
+
+    def archive_processed(
+        self,
+        email_ids: Iterable[str],
+        folder: str = "INBOX",
+        archive_folder: str = DEFAULT_ARCHIVE_FOLDER,
+    ) -> None:
+        """Flag processed UIDs as seen and move them out of ``folder`` in two commands."""
+        uid_set = _compress_uid_set(int(email_id) for email_id in email_ids)
+        if not uid_set:
+            return
+
+        def operation() -> None:
+            self._select(folder, readonly=False)
+            client = self._require_connection()
+            client.add_flags(uid_set, "\\Seen", silent=True)
+            client.move(uid_set, archive_folder)
+
+        self._with_reconnect(operation)
+
+    def wait_for_new_mail(
+        self,
+        folder: str = "INBOX",
+        *,
+        timeout: float = DEFAULT_IDLE_TIMEOUT,
+        poll_interval: float = DEFAULT_NOOP_POLL_INTERVAL,
+    ) -> bool:
+        """Block until the server reports new messages in ``folder`` or ``timeout`` passes.
+
+        Uses IMAP IDLE when the server advertises it and falls back to NOOP polling
+        every ``poll_interval`` seconds otherwise. Returns ``True`` when an EXISTS
+        notification arrived and ``False`` when the wait timed out, so callers can
+        simply call it again to renew the IDLE before the server drops it.
+
+        Unlike the other commands it does not reconnect on its own: mail that arrived
+        while the connection was down is not announced by a new IDLE, so a dropped
+        connection is raised for the caller to reconnect and catch up.
+        """
+        self._select(folder)
         client = self._require_connection()
-        client.select_folder(self._default_folder, readonly=False)
-        client.move([int(email_id)], destination)
+        if client.has_capability("IDLE"):
+            return self._idle_for_new_mail(client, timeout)
+        return self._poll_for_new_mail(client, timeout, poll_interval)
+
+    def _idle_for_new_mail(self, client: IMAPClient, timeout: float) -> bool:
+        deadline = time.monotonic() + timeout
+        client.idle()
+        try:
+            while (remaining := deadline - time.monotonic()) > 0:
+                if _has_new_messages(client.idle_check(timeout=remaining)):
+                    return True
+            return False
+        finally:
+            client.idle_done()
+
+    def _poll_for_new_mail(self, client: IMAPClient, timeout: float, poll_interval: float) -> bool:
+        deadline = time.monotonic() + timeout
+        while (remaining := deadline - time.monotonic()) > 0:
+            time.sleep(min(poll_interval, remaining))
+            _, responses = client.noop()
+            if _has_new_messages(responses):
+                return True
+        return False
 
     def _require_connection(self) -> IMAPClient:
         if self._client is None:
             raise RuntimeError("IMAP client is not connected.")
         return self._client
 
+    def _select(self, folder: str, readonly: bool = True) -> dict[bytes, object]:
+        """Select ``folder`` unless it is already selected in a compatible mode.
+
+        A read-write selection also serves read-only requests, so alternating reads
+        and flag updates on the same folder only pay for one SELECT.
+        """
+        client = self._require_connection()
+        if self._selected_folder == folder and (readonly or not self._selected_readonly):
+            return self._select_info
+        self._forget_selection()
+        self._select_info = client.select_folder(folder, readonly=readonly)
+        self._selected_folder = folder
+        self._selected_readonly = readonly
+        return self._select_info
+
+    def _forget_selection(self) -> None:
+        self._selected_folder = None
+        self._selected_readonly = True
+        self._select_info = {}
+
+    def _with_reconnect(self, operation: Callable[[], T]) -> T:
+        """Run ``operation``, reconnecting and retrying once if the server dropped us."""
+        self._require_connection()
+        try:
+            return operation()
+        except (IMAPClientAbortError, OSError):
+            self.disconnect()
+            self.connect()
+            return operation()
+
+    def _search(self, folder: str, criteria: list[str]) -> list[int]:
+        def operation() -> list[int]:
+            self._select(folder)
+            return list(self._require_connection().search(criteria))
+
+        return self._with_reconnect(operation)
+
+    def _fetch(
+        self, folder: str, uids: list[int], data: list[str]
+    ) -> dict[int, dict[bytes, object]]:
+        def operation() -> dict[int, dict[bytes, object]]:
+            self._select(folder)
+            return self._require_connection().fetch(uids, data)
+
+        return self._with_reconnect(operation)
+
     def _list_with_search(
         self,
         criteria: list[str],
         folder: str,
         limit: int,
     ) -> Iterable[EmailRef]:
-        client = self._require_connection()
-        client.select_folder(folder, readonly=True)
-        uids = list(client.search(criteria))
-        for uid in uids[-limit:]:
-            headers = self._fetch_headers(uid, client)
-            yield EmailRef(
-                id=str(uid),
-                subject=headers["subject"],
-                from_address=headers["from_address"],
-                to_addresses=headers["to_addresses"],
-                date=headers["date"],
-            )
+        uids = self._search(folder, criteria)[-limit:]
+        for batch in _batched(uids, DEFAULT_FETCH_BATCH_SIZE):
+            fetch_data = self._fetch(folder, batch, [HEADER_FIELDS_FETCH])
+            for uid in batch:
+                if uid not in fetch_data:
+                    continue
+                message = _parse_message(_extract_header_bytes(fetch_data[uid]))
+                yield EmailRef(
+                    id=str(uid),
+                    subject=_get_header(message, "subject"),
+                    from_address=_get_header(message, "from"),
+                    to_addresses=_parse_addresses(message.get("to")),
+                    date=_parse_date(message.get("date")),
+                )
+
+
+def _connect_ssl(host: str, port: int) -> IMAPClient:
+    return IMAPClient(host, port, ssl=True)
+
+
+def _compress_uid_set(uids: Iterable[int]) -> str:
+    """Render UIDs as an IMAP sequence set, collapsing consecutive runs into ranges."""
+    ranges: list[tuple[int, int]] = []
+    for uid in sorted(set(uids)):
+        if ranges and uid == ranges[-1][1] + 1:
+            ranges[-1] = (ranges[-1][0], uid)
+        else:
+            ranges.append((uid, uid))
+    return ",".join(str(start) if start == end else f"{start}:{end}" for start, end in ranges)
+
+
+def _has_new_messages(responses: Iterable[object]) -> bool:
+    return any(
+        isinstance(response, tuple) and len(response) >= 2 and response[1] == b"EXISTS"
+        for response in responses
+    )
+
+
+def _batched(uids: Sequence[int], batch_size: int) -> Iterable[list[int]]:
+    for start in range(0, len(uids), batch_size):
+        yield list(uids[start : start + batch_size])
+
+
+def _build_content(email_id: str, raw_message: bytes) -> EmailContent:
+    message = _parse_message(raw_message)
+    text, html = _extract_text_html(message)
+    return _content_from_message(email_id, message, text, html)
+
+
+def _content_from_message(
+    email_id: str, message: Message, text: str | None, html: str | None
+) -> EmailContent:
+    return EmailContent(
+        id=email_id,
+        subject=_get_header(message, "subject"),
+        from_address=_get_header(message, "from"),
+        to_addresses=_parse_addresses(message.get("to")),
+        date=_parse_date(message.get("date")),
+        text=text,
+        html=html,
+        headers=_headers_dict(message),
+    )
+
 
-    def _fetch_headers(self, uid: int, client: IMAPClient) -> dict[str, object]:
-        fetch_data = client.fetch(
-            [uid],
-            ["BODY.PEEK[HEADER.FIELDS (SUBJECT FROM TO DATE)]"],
+@dataclass(frozen=True, slots=True)
+class _TextPart:
+    section: str
+    kind: str  # "text" or "html", matching EmailContent fields
+    subtype: str
+    charset: str
+    encoding: str
+    size: int
+
+
+def _text_parts(structure: BodyData, section: str = "") -> list[_TextPart]:
+    """Walk a BODYSTRUCTURE and return the inline text parts worth downloading."""
+    if structure.is_multipart:
+        parts: list[_TextPart] = []
+        for index, child in enumerate(structure[0], start=1):
+            parts.extend(_text_parts(child, f"{section}.{index}" if section else str(index)))
+        return parts
+
+    maintype = _atom(structure[0]).lower()
+    subtype = _atom(structure[1]).lower()
+    if maintype == "message" and subtype == "rfc822":
+        # Forwarded messages nest a full body structure after the envelope.
+        inner = BodyData.create(structure[8])
+        return _text_parts(inner, section if inner.is_multipart else f"{section or '1'}.1")
+    if maintype != "text":
+        return []
+    # Text parts carry a line count, which pushes MD5 and disposition along by one.
+    disposition = structure[9] if len(structure) > 9 else None
+    if isinstance(disposition, tuple) and _atom(disposition[0]).lower() == "attachment":
+        return []
+
+    if not section:
+        # Mirror _extract_text_html: a single-part message is treated as plain text.
+        kind = "text"
+    elif subtype in {"plain", "html"}:
+        kind = "text" if subtype == "plain" else "html"
+    else:
+        return []
+    params = _params(structure[2])
+    return [
+        _TextPart(
+            section=section or "1",
+            kind=kind,
+            subtype=subtype,
+            charset=params.get("charset", "us-ascii"),
+            encoding=_atom(structure[5]).lower() or "7bit",
+            size=int(structure[6] or 0),
         )
-        raw = _extract_header_bytes(fetch_data[uid])
-        message = _parse_message(raw)
-        return {
-            "subject": _get_header(message, "subject"),
-            "from_address": _get_header(message, "from"),
-            "to_addresses": _parse_addresses(message.get("to")),
-            "date": _parse_date(message.get("date")),
-        }
-
-    def _fetch_message(self, uid: int, client: IMAPClient) -> bytes:
-        fetch_data = client.fetch([uid], ["RFC822"])
-        raw = fetch_data[uid].get(b"RFC822")
-        if not isinstance(raw, (bytes, bytearray)):
-            raise RuntimeError("IMAP fetch did not return message bytes.")
-        return bytes(raw)
+    ]
+
+
+def _part_fetches(
+    parts: list[_TextPart], max_message_bytes: int | None
+) -> list[tuple[_TextPart, str, bytes]]:
+    """Return ``(part, fetch item, response key)`` triples within the byte budget."""
+    fetches: list[tuple[_TextPart, str, bytes]] = []
+    remaining = max_message_bytes
+    for part in parts:
+        if remaining is None or part.size <= remaining:
+            fetches.append((part, f"BODY.PEEK[{part.section}]", f"BODY[{part.section}]".encode()))
+        elif remaining > 0:
+            fetches.append(
+                (
+                    part,
+                    f"BODY.PEEK[{part.section}]<0.{remaining}>",
+                    f"BODY[{part.section}]<0>".encode(),
+                )
+            )
+        else:
+            break
+        if remaining is not None:
+            remaining -= min(part.size, remaining)
+    return fetches
+
+
+def _decode_text_parts(
+    fetched_parts: Iterable[tuple[_TextPart, object]],
+) -> tuple[str | None, str | None]:
+    text_parts: list[str] = []
+    html_parts: list[str] = []
+    for part, payload in fetched_parts:
+        if not isinstance(payload, (bytes, bytearray)):
+            continue
+        decoded = _decode_part(part, bytes(payload))
+        if decoded is None:
+            continue
+        (html_parts if part.kind == "html" else text_parts).append(decoded)
+
+    text = "\n".join(text_parts).strip() if text_parts else None
+    html = "\n".join(html_parts).strip() if html_parts else None
+    return text or None, html or None
+
+
+def _decode_part(part: _TextPart, payload: bytes) -> str | None:
+    # Re-wrap the raw section in its MIME headers so the email package handles the
+    # transfer encoding and charset exactly as it does for full messages.
+    headers = (
+        f'Content-Type: text/{part.subtype}; charset="{part.charset}"\r\n'
+        f"Content-Transfer-Encoding: {part.encoding}\r\n\r\n"
+    ).encode("ascii", errors="replace")
+    message = _parse_message(headers + payload)
+    try:
+        content = message.get_content()
+    except LookupError:
+        raw = message.get_payload(decode=True)
+        content = raw.decode("utf-8", errors="replace") if isinstance(raw, bytes) else None
+    return content if isinstance(content, str) else None
+
+
+def _atom(value: object) -> str:
+    if isinstance(value, (bytes, bytearray)):
+        return bytes(value).decode("ascii", errors="replace")
+    return value if isinstance(value, str) else ""
+
+
+def _params(value: object) -> dict[str, str]:
+    if not isinstance(value, tuple):
+        return {}
+    pairs = zip(value[::2], value[1::2], strict=False)
+    return {_atom(key).lower(): _atom(val) for key, val in pairs}
 
 
 def _extract_header_bytes(fetch_result: dict[bytes, object]) -> bytes:
@@ -0,0 +1,198 @@
+from __future__ import annotations
+
+import os
+import socket
+from collections.abc import Mapping, Sequence
+from datetime import UTC, datetime, timedelta
+
+from sqlalchemy import ColumnElement, and_, or_, select, update
+from sqlalchemy.orm import Session
+
+from town_digest.models.email import Email, EmailStatus
+
+DEFAULT_QUEUE_BATCH_SIZE = 10
+# Long enough for a batch of slow extractions; a crashed worker's emails wait this long.
+DEFAULT_QUEUE_LEASE = timedelta(minutes=15)
+DEFAULT_QUEUE_MAX_ATTEMPTS = 3
+DEFAULT_QUEUE_RETRY_DELAY = timedelta(minutes=5)
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def queue_batch_size() -> int:
+    """Return how many emails a worker claims at once, from ``EMAIL_QUEUE_BATCH_SIZE``."""
+    return int(os.environ.get("EMAIL_QUEUE_BATCH_SIZE", DEFAULT_QUEUE_BATCH_SIZE))
+
+
+def queue_lease() -> timedelta:
+    """Return the claim lease, from ``EMAIL_QUEUE_LEASE_SECONDS``."""
+    return timedelta(
+        seconds=float(
+            os.environ.get("EMAIL_QUEUE_LEASE_SECONDS", DEFAULT_QUEUE_LEASE.total_seconds())
+        )
+    )
+
+
+def queue_retry_delay() -> timedelta:
+    """Return how long a failed email waits for its retry, from ``EMAIL_QUEUE_RETRY_SECONDS``."""
+    return timedelta(
+        seconds=float(
+            os.environ.get("EMAIL_QUEUE_RETRY_SECONDS", DEFAULT_QUEUE_RETRY_DELAY.total_seconds())
+        )
+    )
+
+
+def queue_max_attempts() -> int:
+    """Return how often an email is attempted, from ``EMAIL_QUEUE_MAX_ATTEMPTS``."""
+    return int(os.environ.get("EMAIL_QUEUE_MAX_ATTEMPTS", DEFAULT_QUEUE_MAX_ATTEMPTS))
+
+
+def claim_emails(
+    session: Session,
+    worker_id: str,
+    *,
+    limit: int | None = DEFAULT_QUEUE_BATCH_SIZE,
+    lease: timedelta = DEFAULT_QUEUE_LEASE,
+    max_attempts: int = DEFAULT_QUEUE_MAX_ATTEMPTS,
+    email_ids: Sequence[int] | None = None,
+    now: datetime | None = None,
+) -> list[int]:
+    """Claim up to ``limit`` queued emails for ``worker_id`` and commit; return their ids.
+
+    Received emails are claimed oldest first, together with claimed ones whose lease
+    expired because their worker died. Failed emails waiting for a retry are skipped
+    until their delay is over. Expired claims that used up ``max_attempts``
+    are marked failed instead. Each claim counts as an attempt and holds a lease until
+    ``now + lease``. With ``email_ids`` only those emails are candidates, so a flow
+    that just stored them can take them before any queue worker does. A ``limit`` of
+    ``None`` claims every candidate.
+
+    Other databases lock the candidate rows with ``FOR UPDATE SKIP LOCKED``, so
+    concurrent workers claim disjoint batches without waiting on each other. SQLite
+    has no row locks, but it runs each write statement under a database-wide lock, so
+    there the candidates are selected and claimed by a single ``UPDATE``.
+    """
+    now = now or datetime.now(UTC)
+    expired = and_(Email.status == EmailStatus.CLAIMED, Email.lease_expires_at < now)
+    session.execute(
+        update(Email)
+        .where(expired, Email.attempts >= max_attempts)
+        .values(
+            status=EmailStatus.FAILED,
+            lease_expires_at=None,
+            last_error=f"Lease expired after {max_attempts} attempts.",
+        )
+    )
+    candidates = (
+        select(Email.id)
+        .where(
+            or_(
+                and_(
+                    Email.status == EmailStatus.RECEIVED,
+                    or_(Email.lease_expires_at.is_(None), Email.lease_expires_at <= now),
+                ),
+                expired,
+            )
+        )
+        .order_by(Email.received_at, Email.id)
+        .limit(limit)
+    )
+    if email_ids is not None:
+        candidates = candidates.where(Email.id.in_(email_ids))
+    claim = update(Email).values(
+        status=EmailStatus.CLAIMED,
+        claimed_by=worker_id,
+        claimed_at=now,
+        lease_expires_at=now + lease,
+        attempts=Email.attempts + 1,
+    )
+    if session.get_bind().dialect.name == "sqlite":
+        email_ids = session.scalars(
+            claim.where(Email.id.in_(candidates.scalar_subquery())).returning(Email.id)
+        ).all()
+    else:
+        email_ids = session.scalars(candidates.with_for_update(skip_locked=True)).all()
+        if email_ids:
+            session.execute(claim.where(Email.id.in_(email_ids)))
+    session.commit()
+    return sorted(email_ids)
+
+
+def complete_claims(session: Session, worker_id: str, email_ids: Sequence[int]) -> int:
+    """Mark the emails ``worker_id`` still holds as processed and commit; return the count.
+
+    Emails the ingest flow already marked processed just drop their lease. Emails whose
+    lease went to another worker are left alone.
+    """
+    if not email_ids:
+        return 0
+    result = session.execute(
+        update(Email)
+        .where(
+            Email.claimed_by == worker_id,
+            Email.status.in_((EmailStatus.CLAIMED, EmailStatus.PROCESSED)),
+            Email.id.in_(email_ids),
+        )
+        .values(status=EmailStatus.PROCESSED, lease_expires_at=None, last_error=None)
+    )
+    session.commit()
+    return result.rowcount
+
+
+def fail_claims(
+    session: Session,
+    worker_id: str,
+    failures: Mapping[int, str],
+    *,
+    max_attempts: int = DEFAULT_QUEUE_MAX_ATTEMPTS,
+    retry_delay: timedelta = DEFAULT_QUEUE_RETRY_DELAY,
+    now: datetime | None = None,
+) -> None:
+    """Release the failed emails ``worker_id`` holds and commit.
+
+    Emails with attempts left go back to received, to be claimed again once
+    ``retry_delay`` has passed; the rest are marked failed. The error message is kept
+    either way.
+    """
+    now = now or datetime.now(UTC)
+    for email_id, error in failures.items():
+        email = session.scalar(select(Email).where(_held_by(worker_id), Email.id == email_id))
+        if email is None:
+            continue
+        if email.attempts >= max_attempts:
+            email.status = EmailStatus.FAILED
+            email.lease_expires_at = None
+        else:
+            # On a received email the lease column holds the earliest retry time.
+            email.status = EmailStatus.RECEIVED
+            email.lease_expires_at = now + retry_delay
+        email.last_error = error
+    session.commit()
+
+
+def release_claims(
+    session: Session,
+    worker_id: str,
+    email_ids: Sequence[int],
+    failures: Mapping[int, str],
+    *,
+    max_attempts: int = DEFAULT_QUEUE_MAX_ATTEMPTS,
+    retry_delay: timedelta = DEFAULT_QUEUE_RETRY_DELAY,
+    now: datetime | None = None,
+) -> int:
+    """Fail the claims in ``failures``, complete the rest of ``email_ids`` and commit.
+
+    Returns how many emails were completed.
+    """
+    fail_claims(
+        session, worker_id, failures, max_attempts=max_attempts, retry_delay=retry_delay, now=now
+    )
+    return complete_claims(
+        session, worker_id, [email_id for email_id in email_ids if email_id not in failures]
+    )
+
+
+def _held_by(worker_id: str) -> ColumnElement[bool]:
+    return and_(Email.status == EmailStatus.CLAIMED, Email.claimed_by == worker_id)
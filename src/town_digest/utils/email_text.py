@@ -0,0 +1,272 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from html.parser import HTMLParser
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Rough average for English prose with OpenAI tokenizers; good enough for reporting.
+CHARS_PER_TOKEN = 4
+# Boilerplate patterns only drop short lines so a paragraph that mentions them survives.
+MAX_BOILERPLATE_LINE_CHARS = 300
+
+_SKIPPED_TAGS = frozenset({"head", "noscript", "script", "style", "svg", "template", "title"})
+_VOID_TAGS = frozenset(
+    {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "wbr"}
+)
+_BLOCK_TAGS = frozenset(
+    {
+        "address",
+        "article",
+        "aside",
+        "blockquote",
+        "center",
+        "dd",
+        "div",
+        "dl",
+        "dt",
+        "figcaption",
+        "figure",
+        "footer",
+        "form",
+        "header",
+        "hr",
+        "li",
+        "main",
+        "nav",
+        "ol",
+        "p",
+        "pre",
+        "section",
+        "table",
+        "tbody",
+        "tfoot",
+        "thead",
+        "tr",
+        "ul",
+    }
+)
+_HEADING_LEVELS = {f"h{level}": level for level in range(1, 7)}
+_QUOTE_CLASSES = frozenset({"gmail_quote", "moz-cite-prefix", "yahoo_quoted", "protonmail_quote"})
+_HIDDEN_STYLE = re.compile(r"display\s*:\s*none|visibility\s*:\s*hidden|max-height\s*:\s*0")
+_TRACKING_PARAM = re.compile(r"^(utm_|mc_|_hs|hsa_)|^(fbclid|gclid|mkt_tok)$")
+_WHITESPACE = re.compile(r"[ \t\r\f\v\u00a0\u200b\u200c\u200d\ufeff]+")
+_BOILERPLATE = re.compile(
+    r"unsubscribe"
+    r"|view (this|it|the) (email|message|newsletter)? ?(in|on) (your|a|the) (web )?browser"
+    r"|view (this email )?(online|as a web ?page)"
+    r"|(update|manage|change) (your )?(email |subscription |mailing )*(preferences|settings)"
+    r"|you (are )?receiv(ed|ing) this (e-?mail|message|newsletter)"
+    r"|this (e-?mail|message) was sent to"
+    r"|forward (this (e-?mail|message) )?to a friend"
+    r"|add us to your address book"
+    r"|our mailing address is"
+    r"|^(©|\(c\)|copyright\b)"
+    r"|^powered by",
+    re.IGNORECASE,
+)
+_FORWARD_SEPARATOR = re.compile(
+    r"^-{2,}\s*(forwarded message|original message)\s*-{2,}$|^begin forwarded message:$",
+    re.IGNORECASE,
+)
+_FORWARD_INTRO = re.compile(
+    r"^-{2,}\s*forwarded message\s*-{2,}$|^begin forwarded message:$", re.IGNORECASE
+)
+_FORWARD_HEADER = re.compile(r"^(from|sent|date|to|cc|subject|reply-to):", re.IGNORECASE)
+_REPLY_ATTRIBUTION = re.compile(r"^on .{1,200} wrote:$", re.IGNORECASE)
+
+
+@dataclass(frozen=True, slots=True)
+class CompactEmailText:
+    text: str
+    tokens_before: int
+    tokens_after: int
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate the number of LLM tokens in ``text``."""
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def compact_email_text(body_text: str | None, body_html: str | None) -> CompactEmailText:
+    """Reduce an email body to the compact, link-preserving text sent for extraction.
+
+    HTML is converted to markdown-like text without styles, scripts, hidden preheaders,
+    images or tracking parameters; known footer boilerplate, quoted replies and
+    forwarded-message headers are dropped from either body.
+    """
+    original = body_html or body_text or ""
+    if body_html:
+        text = html_to_compact_text(body_html)
+    else:
+        text = _clean_lines((body_text or "").splitlines())
+    return CompactEmailText(
+        text=text,
+        tokens_before=estimate_tokens(original),
+        tokens_after=estimate_tokens(text),
+    )
+
+
+def html_to_compact_text(html: str) -> str:
+    """Convert newsletter HTML to compact markdown-like text."""
+    parser = _CompactTextParser()
+    parser.feed(html)
+    parser.close()
+    text = _clean_lines(parser.text(include_quoted=False).splitlines())
+    # A message that is nothing but a quote (e.g. a bare forward) keeps its quoted content.
+    return text or _clean_lines(parser.text(include_quoted=True).splitlines())
+
+
+class _CompactTextParser(HTMLParser):
+    """Collects compact text, tagging each part with the quote-like elements around it.
+
+    Mail clients mark replies and forwards with the same classes (Gmail wraps both in
+    ``gmail_quote``), so whether such an element is a reply is decided from its text
+    once parsing is done: see :meth:`_is_reply`.
+    """
+
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        # Each part with the ids of the quote-like elements enclosing it.
+        self._parts: list[tuple[str, tuple[int, ...]]] = []
+        # Per quote-like element: whether it is a blockquote, and the part it starts at.
+        self._quotes: list[tuple[bool, int]] = []
+        # One entry per open element: (tag, hides its content, quote id or None).
+        self._stack: list[tuple[str, bool, int | None]] = []
+        self._link_href: str | None = None
+        self._link_text: list[str] = []
+
+    def text(self, *, include_quoted: bool) -> str:
+        replies = set() if include_quoted else set(filter(self._is_reply, range(len(self._quotes))))
+        return "".join(part for part, quotes in self._parts if not replies.intersection(quotes))
+
+    def handle_starttag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        attributes = {name: value or "" for name, value in attrs}
+        if tag not in _VOID_TAGS:
+            hidden = tag in _SKIPPED_TAGS or bool(
+                _HIDDEN_STYLE.search(attributes.get("style", "").lower())
+            )
+            quote_id = None
+            if (tag == "blockquote" and attributes.get("type") == "cite") or (
+                _QUOTE_CLASSES.intersection(attributes.get("class", "").split())
+            ):
+                quote_id = len(self._quotes)
+                self._quotes.append((tag == "blockquote", len(self._parts)))
+            self._stack.append((tag, hidden, quote_id))
+        if self._hidden:
+            return
+
+        if tag in _BLOCK_TAGS or tag == "br":
+            self._emit("\n")
+        if tag == "li":
+            self._emit("- ")
+        elif tag in _HEADING_LEVELS:
+            self._emit("\n" + "#" * _HEADING_LEVELS[tag] + " ")
+        elif tag in {"td", "th"}:
+            self._emit(" ")
+        elif tag == "a":
+            self._link_href = _clean_href(attributes.get("href", ""))
+            self._link_text = []
+
+    def handle_endtag(self, tag: str) -> None:
+        if not self._hidden:
+            if tag == "a" and self._link_href is not None:
+                self._close_link()
+            if tag in _BLOCK_TAGS or tag in _HEADING_LEVELS:
+                self._emit("\n")
+        # Tolerate unclosed children by popping back to the matching open tag.
+        for index in range(len(self._stack) - 1, -1, -1):
+            if self._stack[index][0] == tag:
+                del self._stack[index:]
+                break
+
+    def handle_data(self, data: str) -> None:
+        if self._hidden:
+            return
+        text = _WHITESPACE.sub(" ", data.replace("\n", " "))
+        if self._link_href is not None:
+            self._link_text.append(text)
+        else:
+            self._emit(text)
+
+    @property
+    def _hidden(self) -> bool:
+        return any(hidden for _, hidden, _ in self._stack)
+
+    def _is_reply(self, quote_id: int) -> bool:
+        """Tell a quoted reply from a forwarded message.
+
+        A quote that opens with, or follows, a forward separator is forwarded content and
+        is kept; its header lines are dropped later like in plain text. Otherwise a
+        blockquote is a reply, and a quote-classed container only when it opens with an
+        "On ... wrote:" attribution or an original-message separator.
+        """
+        is_blockquote, start = self._quotes[quote_id]
+        lines = _nonblank_lines("".join(part for part, quotes in self._parts if quote_id in quotes))
+        preceding = _nonblank_lines("".join(part for part, _ in self._parts[:start]))
+        first = lines[0] if lines else ""
+        if _FORWARD_INTRO.match(first) or (preceding and _FORWARD_INTRO.match(preceding[-1])):
+            return False
+        return is_blockquote or bool(
+            _REPLY_ATTRIBUTION.match(first) or _FORWARD_SEPARATOR.match(first)
+        )
+
+    def _close_link(self) -> None:
+        label = " ".join("".join(self._link_text).split())
+        href = self._link_href or ""
+        self._link_href = None
+        if not label:
+            return
+        if href and href != label and href.removeprefix("mailto:") != label:
+            self._emit(f"[{label}]({href})")
+        else:
+            self._emit(label)
+
+    def _emit(self, text: str) -> None:
+        quotes = tuple(quote_id for _, _, quote_id in self._stack if quote_id is not None)
+        self._parts.append((text, quotes))
+
+
+def _nonblank_lines(text: str) -> list[str]:
+    return [line for line in (" ".join(raw.split()) for raw in text.splitlines()) if line]
+
+
+def _clean_href(href: str) -> str:
+    href = href.strip()
+    if not href.startswith(("http://", "https://", "mailto:")):
+        return ""
+    parts = urlsplit(href)
+    query = [
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not _TRACKING_PARAM.match(key)
+    ]
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+def _clean_lines(lines: list[str]) -> str:
+    cleaned: list[str] = []
+    in_forward_header = False
+    for raw_line in lines:
+        line = " ".join(_WHITESPACE.sub(" ", raw_line).split())
+        if _FORWARD_SEPARATOR.match(line):
+            in_forward_header = True
+            continue
+        if in_forward_header:
+            if _FORWARD_HEADER.match(line):
+                continue
+            in_forward_header = False
+        if line.startswith(">") or _REPLY_ATTRIBUTION.match(line):
+            continue
+        if len(line) <= MAX_BOILERPLATE_LINE_CHARS and _BOILERPLATE.search(line):
+            continue
+        if line in {"-", "|"} or (cleaned and line and line == cleaned[-1]):
+            continue
+        if not line and (not cleaned or not cleaned[-1]):
+            continue
+        is_list_item = line.startswith("- ")
+        if is_list_item and len(cleaned) > 1 and not cleaned[-1] and cleaned[-2].startswith("- "):
+            # Keep consecutive list items together.
+            cleaned.pop()
+        cleaned.append(line)
+    return "\n".join(cleaned).strip()
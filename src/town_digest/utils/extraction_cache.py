@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import hashlib
+from datetime import UTC, datetime, timedelta
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, sessionmaker
+
+from town_digest.config import load_settings
+from town_digest.db import get_session_factory
+from town_digest.models.llm_extraction_cache_entry import LlmExtractionCacheEntry
+
+
+def extraction_cache_key(text: str, *, model: str, prompt_version: str) -> str:
+    """Hash whitespace-normalized input text together with the model and prompt version."""
+    normalized = " ".join(text.split())
+    digest = hashlib.sha256()
+    for part in (model, prompt_version, normalized):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class ExtractionCache:
+    """Database-backed cache of structured-output responses from the LLM.
+
+    Entries expire after ``ttl``. Once more than ``max_entries`` are stored, the least
+    recently used ones are evicted on the next write.
+    """
+
+    def __init__(
+        self,
+        session_factory: sessionmaker[Session],
+        *,
+        ttl: timedelta,
+        max_entries: int,
+    ) -> None:
+        self._session_factory = session_factory
+        self._ttl = ttl
+        self._max_entries = max_entries
+
+    def get(self, cache_key: str) -> str | None:
+        """Return the cached response text for ``cache_key`` if present and not expired."""
+        now = datetime.now(UTC)
+        with self._session_factory() as session:
+            row = session.execute(
+                select(LlmExtractionCacheEntry.id, LlmExtractionCacheEntry.output_text).where(
+                    LlmExtractionCacheEntry.cache_key == cache_key,
+                    LlmExtractionCacheEntry.expires_at > now,
+                )
+            ).one_or_none()
+            if row is None:
+                return None
+            session.execute(
+                update(LlmExtractionCacheEntry)
+                .where(LlmExtractionCacheEntry.id == row.id)
+                .values(last_used_at=now)
+            )
+            session.commit()
+            return row.output_text
+
+    def put(self, cache_key: str, *, model: str, prompt_version: str, output_text: str) -> None:
+        """Store a response, replacing any previous entry for ``cache_key``."""
+        now = datetime.now(UTC)
+        with self._session_factory() as session:
+            entry = session.scalars(
+                select(LlmExtractionCacheEntry).where(
+                    LlmExtractionCacheEntry.cache_key == cache_key
+                )
+            ).one_or_none()
+            if entry is None:
+                entry = LlmExtractionCacheEntry(cache_key=cache_key)
+                session.add(entry)
+            entry.model = model
+            entry.prompt_version = prompt_version
+            entry.output_text = output_text
+            entry.expires_at = now + self._ttl
+            entry.last_used_at = now
+            try:
+                session.commit()
+            except IntegrityError:
+                # Another worker cached the same input first; its entry is just as good.
+                session.rollback()
+                return
+            self._evict(session, now)
+
+    def _evict(self, session: Session, now: datetime) -> None:
+        session.execute(
+            delete(LlmExtractionCacheEntry).where(LlmExtractionCacheEntry.expires_at <= now)
+        )
+        entry_count = session.scalar(select(func.count(LlmExtractionCacheEntry.id))) or 0
+        excess = entry_count - self._max_entries
+        if excess > 0:
+            least_recently_used = (
+                select(LlmExtractionCacheEntry.id)
+                .order_by(LlmExtractionCacheEntry.last_used_at, LlmExtractionCacheEntry.id)
+                .limit(excess)
+                .scalar_subquery()
+            )
+            session.execute(
+                delete(LlmExtractionCacheEntry).where(
+                    LlmExtractionCacheEntry.id.in_(least_recently_used)
+                )
+            )
+        session.commit()
+
+
+def get_extraction_cache() -> ExtractionCache | None:
+    """Return the configured extraction cache, or ``None`` when caching is disabled."""
+    settings = load_settings()
+    if settings.llm_cache_max_entries <= 0:
+        return None
+    return ExtractionCache(
+        get_session_factory(),
+        ttl=timedelta(days=settings.llm_cache_ttl_days),
+        max_entries=settings.llm_cache_max_entries,
+    )
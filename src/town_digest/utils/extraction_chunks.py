@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import re
+from collections.abc import Sequence
+from typing import TYPE_CHECKING
+
+from town_digest.utils.email_text import CHARS_PER_TOKEN
+
+if TYPE_CHECKING:
+    from town_digest.utils.newsletter_extractor import (
+        AnnouncementDraft,
+        EventDraft,
+        NewsletterExtraction,
+    )
+
+# Untitled announcements from overlapping chunks are reworded independently, so they are
+# matched on shared words rather than exact text.
+ANNOUNCEMENT_SIMILARITY_THRESHOLD = 0.8
+
+_BLOCK_SEPARATOR = re.compile(r"\n[ \t]*\n")
+_WORD = re.compile(r"\w+")
+
+
+def split_extraction_text(text: str, *, max_tokens: int, overlap_tokens: int = 0) -> list[str]:
+    """Split ``text`` into chunks of about ``max_tokens`` at section boundaries.
+
+    Chunks break between blank-line separated blocks, preferably before a markdown
+    heading, and each chunk repeats up to ``overlap_tokens`` of trailing blocks from the
+    previous one so items straddling a boundary are seen whole at least once.
+    """
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return [text]
+
+    blocks = [
+        piece
+        for block in _BLOCK_SEPARATOR.split(text)
+        if block.strip()
+        for piece in _split_oversized_block(block.strip(), max_chars)
+    ]
+    overlap_chars = overlap_tokens * CHARS_PER_TOKEN
+    chunks: list[list[str]] = []
+    current: list[str] = []
+    current_chars = 0
+    fresh_blocks = 0
+    for block in blocks:
+        full = current_chars + len(block) > max_chars
+        # Past the halfway mark, start a new chunk at a heading rather than mid-section.
+        at_section = block.startswith("#") and current_chars > max_chars // 2
+        if fresh_blocks and (full or at_section):
+            chunks.append(current)
+            current = _overlap(current, overlap_chars, max_chars - len(block))
+            current_chars = sum(len(kept) for kept in current)
+            fresh_blocks = 0
+        current.append(block)
+        current_chars += len(block)
+        fresh_blocks += 1
+    chunks.append(current)
+    return ["\n\n".join(chunk) for chunk in chunks]
+
+
+def merge_extractions(extractions: Sequence[NewsletterExtraction]) -> NewsletterExtraction:
+    """Combine per-chunk extractions, merging items found in more than one chunk.
+
+    Events match on title and date, and on start time when both have one, so sessions
+    of the same event at different times stay separate.
+    """
+    events: list[EventDraft] = []
+    announcements: list[AnnouncementDraft] = []
+    for extraction in extractions:
+        for event in extraction["events"]:
+            index = _matching_event(events, event)
+            if index is None:
+                events.append(event)
+            else:
+                events[index] = _merge_event(events[index], event)
+        for announcement in extraction["announcements"]:
+            index = _matching_announcement(announcements, announcement)
+            if index is None:
+                announcements.append(announcement)
+            elif len(announcement["body"]) > len(announcements[index]["body"]):
+                announcements[index] = {
+                    "title": announcement["title"] or announcements[index]["title"],
+                    "body": announcement["body"],
+                }
+    return {"events": events, "announcements": announcements}
+
+
+def _split_oversized_block(block: str, max_chars: int) -> list[str]:
+    if len(block) <= max_chars:
+        return [block]
+    pieces: list[str] = []
+    current = ""
+    for line in block.splitlines():
+        for start in range(0, max(len(line), 1), max_chars):
+            segment = line[start : start + max_chars]
+            if current and len(current) + 1 + len(segment) > max_chars:
+                pieces.append(current)
+                current = segment
+            else:
+                current = f"{current}\n{segment}" if current else segment
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def _overlap(blocks: list[str], overlap_chars: int, room: int) -> list[str]:
+    kept: list[str] = []
+    size = 0
+    for block in reversed(blocks):
+        size += len(block)
+        if size > min(overlap_chars, room):
+            break
+        kept.insert(0, block)
+    return kept
+
+
+def _matching_event(events: list[EventDraft], candidate: EventDraft) -> int | None:
+    title = _normalize(candidate["title"])
+    for index, event in enumerate(events):
+        if (
+            _normalize(event["title"]) == title
+            and event["start_date"] == candidate["start_date"]
+            and (
+                event["start_time"] is None
+                or candidate["start_time"] is None
+                or event["start_time"] == candidate["start_time"]
+            )
+        ):
+            return index
+    return None
+
+
+def _merge_event(first: EventDraft, second: EventDraft) -> EventDraft:
+    description = max(
+        (first["description"], second["description"]), key=lambda value: len(value or "")
+    )
+    return {
+        "title": first["title"],
+        "description": description,
+        "location": first["location"] or second["location"],
+        "start_date": first["start_date"],
+        "start_time": (
+            first["start_time"] if first["start_time"] is not None else second["start_time"]
+        ),
+    }
+
+
+def _matching_announcement(
+    announcements: list[AnnouncementDraft], candidate: AnnouncementDraft
+) -> int | None:
+    candidate_title = _normalize(candidate["title"] or "")
+    candidate_words = set(_WORD.findall(candidate["body"].casefold()))
+    for index, announcement in enumerate(announcements):
+        title = _normalize(announcement["title"] or "")
+        if candidate_title and title:
+            if candidate_title == title:
+                return index
+            continue
+        words = set(_WORD.findall(announcement["body"].casefold()))
+        union = candidate_words | words
+        if union and len(candidate_words & words) / len(union) >= (
+            ANNOUNCEMENT_SIMILARITY_THRESHOLD
+        ):
+            return index
+    return None
+
+
+def _normalize(value: str) -> str:
+    return " ".join(_WORD.findall(value.casefold()))
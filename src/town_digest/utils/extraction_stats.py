@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+from collections.abc import Mapping, Sequence
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Literal
+
+from sqlalchemy import case, func, select
+from sqlalchemy.orm import Session
+
+from town_digest.db import get_session_factory
+from town_digest.models.edition import Edition
+from town_digest.models.email import Email
+from town_digest.models.extraction_stat import ExtractionStat
+from town_digest.utils.newsletter_extractor import ExtractionUsage
+
+StatsGrouping = Literal["edition", "sender", "day"]
+
+# USD per million (input, output) tokens for models we have used; others report no cost.
+MODEL_PRICES_PER_MILLION_TOKENS: dict[str, tuple[float, float]] = {
+    "gpt-5": (1.25, 10.00),
+    "gpt-5-mini": (0.25, 2.00),
+    "gpt-5-nano": (0.05, 0.40),
+    "gpt-4.1": (2.00, 8.00),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4.1-nano": (0.10, 0.40),
+}
+
+
+@dataclass(slots=True)
+class ExtractionStatsRow:
+    key: str
+    emails: int = 0
+    requests: int = 0
+    cached_requests: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    duration_seconds: float = 0.0
+    retries: int = 0
+    # None when a model without a known price was used.
+    cost_usd: float | None = 0.0
+
+    @property
+    def average_duration_seconds(self) -> float:
+        billed = self.requests - self.cached_requests
+        return self.duration_seconds / billed if billed else 0.0
+
+
+def estimate_cost_usd(model: str, input_tokens: int, output_tokens: int) -> float | None:
+    """Return the list-price cost of a request, or ``None`` for an unknown model."""
+    prices = MODEL_PRICES_PER_MILLION_TOKENS.get(model)
+    if prices is None:
+        return None
+    input_price, output_price = prices
+    return (input_tokens * input_price + output_tokens * output_price) / 1_000_000
+
+
+def extraction_stat_rows(
+    usage_by_email: Mapping[int, Sequence[ExtractionUsage]],
+) -> list[ExtractionStat]:
+    """Build one unsaved ``ExtractionStat`` per extraction request, linked to its email."""
+    return [
+        ExtractionStat(
+            email_id=email_id,
+            model=usage.model,
+            input_tokens=usage.input_tokens,
+            output_tokens=usage.output_tokens,
+            duration_seconds=usage.duration_seconds,
+            retries=usage.retries,
+            cached=usage.cached,
+            kinds=",".join(usage.kinds) or None,
+        )
+        for email_id, usages in usage_by_email.items()
+        for usage in usages
+    ]
+
+
+def record_extraction_usage(usage_by_email: Mapping[int, Sequence[ExtractionUsage]]) -> None:
+    """Store the extraction stats of ``usage_by_email`` in their own transaction."""
+    stats = extraction_stat_rows(usage_by_email)
+    if not stats:
+        return
+    session_factory = get_session_factory()
+    with session_factory() as session:
+        session.add_all(stats)
+        session.commit()
+
+
+def summarize_extraction_stats(
+    session: Session, *, group_by: StatsGrouping, since: datetime | None = None
+) -> list[ExtractionStatsRow]:
+    """Aggregate extraction stats per edition, sender or day, most expensive first."""
+    key_column = {
+        "edition": func.coalesce(Edition.name, "(no edition)"),
+        "sender": func.coalesce(Email.from_email, "(unknown sender)"),
+        "day": func.date(ExtractionStat.created_at),
+    }[group_by]
+    filters = [ExtractionStat.created_at >= since] if since is not None else []
+    usage_by_model = (
+        select(
+            key_column,
+            ExtractionStat.model,
+            func.count(ExtractionStat.id),
+            func.sum(case((ExtractionStat.cached, 1), else_=0)),
+            func.sum(ExtractionStat.input_tokens),
+            func.sum(ExtractionStat.output_tokens),
+            func.sum(ExtractionStat.duration_seconds),
+            func.sum(ExtractionStat.retries),
+        )
+        .join(Email, Email.id == ExtractionStat.email_id)
+        .outerjoin(Edition, Edition.id == Email.edition_id)
+        .where(*filters)
+        .group_by(key_column, ExtractionStat.model)
+    )
+    # Prices differ per model, so usage is summed per model; emails are counted per key.
+    emails_per_key = (
+        select(key_column, func.count(func.distinct(ExtractionStat.email_id)))
+        .join(Email, Email.id == ExtractionStat.email_id)
+        .outerjoin(Edition, Edition.id == Email.edition_id)
+        .where(*filters)
+        .group_by(key_column)
+    )
+
+    rows = {
+        str(key): ExtractionStatsRow(key=str(key), emails=emails)
+        for key, emails in session.execute(emails_per_key)
+    }
+    for (
+        key,
+        model,
+        requests,
+        cached,
+        input_tokens,
+        output_tokens,
+        seconds,
+        retries,
+    ) in session.execute(usage_by_model):
+        row = rows[str(key)]
+        row.requests += requests
+        row.cached_requests += cached or 0
+        row.input_tokens += input_tokens or 0
+        row.output_tokens += output_tokens or 0
+        row.duration_seconds += seconds or 0.0
+        row.retries += retries or 0
+        cost = estimate_cost_usd(model, input_tokens or 0, output_tokens or 0)
+        row.cost_usd = None if cost is None or row.cost_usd is None else row.cost_usd + cost
+    return sorted(
+        rows.values(),
+        key=lambda row: (row.cost_usd is not None, row.cost_usd or 0.0, row.input_tokens),
+        reverse=True,
+    )
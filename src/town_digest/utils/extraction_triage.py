@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import os
+import re
+from dataclasses import dataclass
+
+from sqlalchemy import Column, func, select
+from sqlalchemy.orm import Session
+
+from town_digest.models.associations import email_announcements, email_events
+from town_digest.models.email import Email, EmailStatus
+from town_digest.models.extraction_stat import ExtractionStat
+from town_digest.utils.email_text import estimate_tokens
+from town_digest.utils.newsletter_extractor import ALL_EXTRACTION_KINDS, ExtractionKind
+
+# Below this there is nothing worth sending to the model.
+MIN_EXTRACTION_TOKENS = 25
+# Confirmation and welcome mails are short; a long newsletter titled "Welcome to spring" is not.
+MAX_TRANSACTIONAL_TOKENS = 300
+# Sender history only counts once this many of a sender's emails were asked for a kind.
+MIN_SENDER_HISTORY_EMAILS = 5
+SENDER_HISTORY_WINDOW = 20
+# Senders whose emails usually contain events keep event extraction without date patterns.
+SENDER_HISTORY_KEEP_RATE = 0.5
+
+_MONTH = (
+    r"jan(uary)?|feb(ruary)?|mar(ch)?|apr(il)?|may|june?|july?|aug(ust)?"
+    r"|sep(t(ember)?)?|oct(ober)?|nov(ember)?|dec(ember)?"
+)
+_DATE_OR_TIME = re.compile(
+    rf"\b({_MONTH})\.? \d{{1,2}}(st|nd|rd|th)?\b"
+    rf"|\b\d{{1,2}}(st|nd|rd|th)? (of )?({_MONTH})\b"
+    r"|\b(mon|tues|wednes|thurs|fri|satur|sun)days?\b"
+    r"|\b\d{1,2}/\d{1,2}(/\d{2,4})?\b"
+    r"|\b\d{4}-\d{2}-\d{2}\b"
+    r"|\b\d{1,2}(:\d{2})? ?[ap]\.?m\b"
+    r"|\b\d{1,2}:\d{2}\b"
+    r"|\b(noon|tonight|tomorrow|this weekend|next week)\b",
+    re.IGNORECASE,
+)
+_TRANSACTIONAL = re.compile(
+    r"confirm (your )?(subscription|email|e-mail|address)"
+    r"|verify (your )?(email|e-mail|address|account)"
+    r"|thanks? (you )?for (subscribing|signing up|joining)"
+    r"|welcome to"
+    r"|you('ve| have) (been )?(subscribed|unsubscribed)"
+    r"|(reset|change) (your )?password"
+    r"|your (receipt|order|invoice)",
+    re.IGNORECASE,
+)
+
+
+@dataclass(frozen=True, slots=True)
+class SenderHistory:
+    """How often a sender's recent emails contained events and announcements.
+
+    Each kind only counts the emails whose extraction asked for it, since an email that
+    was not asked for events says nothing about whether it had any.
+    """
+
+    event_emails: int = 0
+    with_events: int = 0
+    announcement_emails: int = 0
+    with_announcements: int = 0
+
+
+@dataclass(frozen=True, slots=True)
+class TriageDecision:
+    kinds: tuple[ExtractionKind, ...]
+    reason: str
+
+    @property
+    def skipped(self) -> tuple[ExtractionKind, ...]:
+        return tuple(kind for kind in ALL_EXTRACTION_KINDS if kind not in self.kinds)
+
+
+def triage_enabled() -> bool:
+    return os.environ.get("EXTRACTION_TRIAGE", "1").strip().lower() not in {"0", "false", "off"}
+
+
+def triage_email(
+    text: str, *, subject: str | None = None, history: SenderHistory | None = None
+) -> TriageDecision:
+    """Decide locally which extraction kinds are worth an LLM request for ``text``.
+
+    Empty and very short bodies and short transactional mail (subscription confirmations,
+    welcome and password mails) skip extraction entirely. Event extraction needs a date
+    or time mentioned in the text, or a sender whose emails usually produce events. A
+    sender whose recent emails never produced announcements skips them.
+    """
+    tokens = estimate_tokens(text)
+    if tokens < MIN_EXTRACTION_TOKENS:
+        return TriageDecision((), f"too short (~{tokens} tokens)")
+    if tokens <= MAX_TRANSACTIONAL_TOKENS and (
+        _TRANSACTIONAL.search(subject or "") or _TRANSACTIONAL.search(text)
+    ):
+        return TriageDecision((), "transactional email")
+
+    history = history or SenderHistory()
+    kinds: list[ExtractionKind] = []
+    reasons: list[str] = []
+    if _DATE_OR_TIME.search(text):
+        kinds.append("events")
+    elif (
+        history.event_emails >= MIN_SENDER_HISTORY_EMAILS
+        and history.with_events / history.event_emails >= SENDER_HISTORY_KEEP_RATE
+    ):
+        kinds.append("events")
+        reasons.append("no dates found, kept for sender history")
+    else:
+        reasons.append("no dates or times found")
+
+    if history.announcement_emails >= MIN_SENDER_HISTORY_EMAILS and not history.with_announcements:
+        reasons.append(f"sender had no announcements in {history.announcement_emails} emails")
+    else:
+        kinds.append("announcements")
+
+    return TriageDecision(tuple(kinds), "; ".join(reasons) or "extract all")
+
+
+def load_sender_history(
+    session: Session, sender: str | None, *, window: int = SENDER_HISTORY_WINDOW
+) -> SenderHistory | None:
+    """Summarize the sender's last ``window`` processed emails.
+
+    The window covers every processed email, including those triage skipped entirely,
+    which record no extraction stats. A kind that triage stopped requesting therefore
+    drops below ``MIN_SENDER_HISTORY_EMAILS`` as new emails arrive, so it is requested
+    again and the history can recover.
+    """
+    if not sender:
+        return None
+    recent = (
+        select(Email.id)
+        .where(Email.from_email == sender, Email.status == EmailStatus.PROCESSED)
+        .order_by(Email.received_at.desc())
+        .limit(window)
+        .subquery()
+    )
+    email_ids = select(recent.c.id)
+    event_emails, with_events = _count_requested(
+        session, "events", email_events.c.email_id, email_ids
+    )
+    announcement_emails, with_announcements = _count_requested(
+        session, "announcements", email_announcements.c.email_id, email_ids
+    )
+    return SenderHistory(
+        event_emails=event_emails,
+        with_events=with_events,
+        announcement_emails=announcement_emails,
+        with_announcements=with_announcements,
+    )
+
+
+def _count_requested(
+    session: Session, kind: ExtractionKind, email_column: Column, email_ids: object
+) -> tuple[int, int]:
+    """Count the emails among ``email_ids`` asked for ``kind``, and those that had any."""
+    requested, linked = session.execute(
+        select(
+            func.count(func.distinct(ExtractionStat.email_id)),
+            func.count(func.distinct(email_column)),
+        )
+        .select_from(ExtractionStat)
+        .outerjoin(email_column.table, email_column == ExtractionStat.email_id)
+        .where(
+            ExtractionStat.email_id.in_(email_ids),
+            ("," + ExtractionStat.kinds + ",").like(f"%,{kind},%"),
+        )
+    ).one()
+    return requested or 0, linked or 0
@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import contextlib
+import threading
+
+from imapclient.exceptions import IMAPClientError
+
+from town_digest.config import Settings, load_settings
+from town_digest.utils.email_client import ImapMailClient
+
+_sessions: dict[tuple[str, int, str, str], ImapMailClient] = {}
+_sessions_lock = threading.Lock()
+
+
+def get_imap_session(scope: str, settings: Settings | None = None) -> ImapMailClient:
+    """Return the connected IMAP client shared by everything running under ``scope``.
+
+    Pipelines pass their flow run id as the scope so every task in a run reuses one
+    authenticated connection and its folder selection instead of logging in again.
+    """
+    resolved_settings = settings or load_settings()
+    key = (
+        resolved_settings.imap_server,
+        resolved_settings.imap_port,
+        resolved_settings.imap_user,
+        scope,
+    )
+    with _sessions_lock:
+        client = _sessions.get(key)
+        if client is None:
+            client = ImapMailClient(
+                host=resolved_settings.imap_server,
+                port=resolved_settings.imap_port,
+                username=resolved_settings.imap_user,
+                password=resolved_settings.imap_password,
+                max_message_bytes=resolved_settings.imap_max_message_bytes or None,
+            )
+            _sessions[key] = client
+        client.connect()
+        return client
+
+
+def close_imap_sessions(scope: str | None = None) -> None:
+    """Log out of shared IMAP sessions for ``scope``, or all sessions when omitted."""
+    with _sessions_lock:
+        keys = [key for key in _sessions if scope is None or key[3] == scope]
+        clients = [_sessions.pop(key) for key in keys]
+    for client in clients:
+        with contextlib.suppress(IMAPClientError, OSError):
+            client.close()
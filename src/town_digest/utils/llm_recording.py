@@ -0,0 +1,198 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Literal
+
+import httpx
+
+RecordingMode = Literal["record", "replay"]
+RECORDING_MODES: tuple[RecordingMode, ...] = ("record", "replay")
+
+# Response headers that no longer apply once the body has been read and decoded.
+_DROPPED_HEADERS = frozenset({"content-encoding", "content-length", "transfer-encoding"})
+
+
+def recording_key(request: httpx.Request) -> str:
+    """Identify a request by method, path and body, ignoring headers such as the API key.
+
+    JSON bodies are compared after sorting their keys, so equal payloads match however
+    the client serialized them.
+    """
+    try:
+        body = json.dumps(json.loads(request.content), sort_keys=True, separators=(",", ":"))
+    except ValueError:
+        body = request.content.decode("utf-8", errors="replace")
+    return hashlib.sha256(f"{request.method} {request.url.path}\n{body}".encode()).hexdigest()
+
+
+class RecordingStore:
+    """A directory of recorded OpenAI responses, one JSON file per request key."""
+
+    def __init__(self, directory: Path | str) -> None:
+        self.directory = Path(directory)
+
+    def get(self, key: str) -> dict[str, Any] | None:
+        path = self._path(key)
+        if not path.exists():
+            return None
+        return json.loads(path.read_text(encoding="utf-8"))
+
+    def put(self, key: str, recording: dict[str, Any]) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        # Write then rename so concurrent workers never read a partial file.
+        with tempfile.NamedTemporaryFile(
+            "w", encoding="utf-8", dir=self.directory, suffix=".tmp", delete=False
+        ) as handle:
+            json.dump(recording, handle, indent=2, sort_keys=True)
+        os.replace(handle.name, self._path(key))
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
+
+
+class RecordReplayTransport(httpx.BaseTransport):
+    """HTTP transport that records OpenAI responses once and serves them offline.
+
+    In ``record`` mode requests go through ``inner`` and successful responses are saved
+    to ``store``. In ``replay`` mode nothing leaves the process: recorded responses are
+    returned after ``latency`` seconds, and unknown requests get a 404 naming their key.
+    """
+
+    def __init__(
+        self,
+        store: RecordingStore,
+        *,
+        mode: RecordingMode,
+        inner: httpx.BaseTransport | None = None,
+        latency: float = 0.0,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        if mode not in RECORDING_MODES:
+            raise ValueError(f"Unknown recording mode {mode!r}.")
+        self._store = store
+        self._inner = (inner or httpx.HTTPTransport()) if mode == "record" else None
+        self._latency = latency
+        self._sleep = sleep
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        request.read()
+        key = recording_key(request)
+        if self._inner is None:
+            return self._replay(request, key)
+
+        response = self._inner.handle_request(request)
+        try:
+            content = response.read()
+        finally:
+            response.close()
+        headers = {
+            name: value
+            for name, value in response.headers.items()
+            if name.lower() not in _DROPPED_HEADERS
+        }
+        # Errors such as rate limits are passed through but never replayed.
+        if response.is_success:
+            self._store.put(
+                key,
+                {
+                    "request": {
+                        "method": request.method,
+                        "path": request.url.path,
+                        "body": _json_or_text(request.content),
+                    },
+                    "response": {
+                        "status_code": response.status_code,
+                        "headers": headers,
+                        "body": content.decode("utf-8"),
+                    },
+                },
+            )
+        return httpx.Response(
+            response.status_code, headers=headers, content=content, request=request
+        )
+
+    def close(self) -> None:
+        if self._inner is not None:
+            self._inner.close()
+
+    def _replay(self, request: httpx.Request, key: str) -> httpx.Response:
+        recording = self._store.get(key)
+        if self._latency > 0:
+            self._sleep(self._latency)
+        if recording is None:
+            message = (
+                f"No recorded response for {request.method} {request.url.path} "
+                f"(key {key}) in {self._store.directory}."
+            )
+            return httpx.Response(
+                404, json={"error": {"message": message, "type": "replay_miss"}}, request=request
+            )
+        response = recording["response"]
+        return httpx.Response(
+            response["status_code"],
+            headers=response["headers"],
+            content=response["body"].encode("utf-8"),
+            request=request,
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class RecordingSettings:
+    """Whether OpenAI responses are recorded or replayed, where, and the replay latency."""
+
+    mode: RecordingMode
+    directory: Path | str
+    latency: float = 0.0
+
+    def transport(self, limits: httpx.Limits | None = None) -> RecordReplayTransport:
+        """Build the transport for these settings.
+
+        ``limits`` sizes the connection pool used while recording.
+        """
+        return RecordReplayTransport(
+            RecordingStore(self.directory),
+            mode=self.mode,
+            inner=httpx.HTTPTransport(limits=limits) if self.mode == "record" and limits else None,
+            latency=self.latency,
+        )
+
+
+def recording_mode() -> RecordingMode | None:
+    """Return the mode set by ``OPENAI_RECORDING_MODE``, or ``None`` for live requests."""
+    mode = os.environ.get("OPENAI_RECORDING_MODE", "").strip().lower()
+    if not mode:
+        return None
+    if mode not in RECORDING_MODES:
+        raise ValueError(f"OPENAI_RECORDING_MODE must be one of {', '.join(RECORDING_MODES)}.")
+    return mode
+
+
+def recording_settings_from_env() -> RecordingSettings | None:
+    """Return the settings configured by ``OPENAI_RECORDING_MODE``, if any.
+
+    Recordings live in ``OPENAI_RECORDINGS_DIR`` and replays wait
+    ``OPENAI_REPLAY_LATENCY_MS`` per request.
+    """
+    mode = recording_mode()
+    if mode is None:
+        return None
+    directory = os.environ.get("OPENAI_RECORDINGS_DIR", "")
+    if not directory:
+        raise ValueError("OPENAI_RECORDINGS_DIR is required when OPENAI_RECORDING_MODE is set.")
+    return RecordingSettings(
+        mode, directory, latency=float(os.environ.get("OPENAI_REPLAY_LATENCY_MS", 0)) / 1000
+    )
+
+
+def _json_or_text(content: bytes) -> Any:
+    try:
+        return json.loads(content)
+    except ValueError:
+        return content.decode("utf-8", errors="replace")
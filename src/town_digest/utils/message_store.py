@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import mmap
+import os
+import re
+import tempfile
+import zlib
+from functools import lru_cache
+from pathlib import Path
+
+from town_digest.config import load_settings
+
+_DIGEST_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+
+class MessageStore:
+    """Content-addressed store of compressed message bodies on local disk.
+
+    Blobs are keyed by the SHA-256 of their uncompressed bytes and laid out as
+    ``<root>/ab/cd/<digest>.z``, so identical newsletters are stored once. Reads go
+    through ``mmap`` so the compressed file is never copied into Python memory.
+    """
+
+    def __init__(self, root: Path | str, *, compression_level: int = 6) -> None:
+        self._root = Path(root)
+        self._compression_level = compression_level
+
+    def put(self, data: bytes) -> str:
+        """Store ``data`` if it is not already present and return its digest."""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._path(digest)
+        if path.exists():
+            return digest
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write to a temporary file first so readers never see a partial blob.
+        with tempfile.NamedTemporaryFile(dir=path.parent, delete=False) as handle:
+            handle.write(zlib.compress(data, self._compression_level))
+            temp_path = handle.name
+        os.replace(temp_path, path)
+        return digest
+
+    def get(self, digest: str) -> bytes:
+        """Return the bytes stored under ``digest``."""
+        path = self._path(digest)
+        if not path.exists():
+            raise KeyError(f"No message stored under digest {digest!r}.")
+        with (
+            path.open("rb") as handle,
+            mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as mapped,
+        ):
+            return zlib.decompress(mapped)
+
+    def contains(self, digest: str) -> bool:
+        return self._path(digest).exists()
+
+    def put_bodies(self, text: str | None, html: str | None) -> str:
+        """Store an email's text and HTML bodies as one blob and return its digest."""
+        payload = json.dumps({"html": html, "text": text}, sort_keys=True)
+        return self.put(payload.encode("utf-8"))
+
+    def get_bodies(self, digest: str) -> tuple[str | None, str | None]:
+        """Return the ``(text, html)`` bodies stored by ``put_bodies``."""
+        payload = json.loads(self.get(digest).decode("utf-8"))
+        return payload.get("text"), payload.get("html")
+
+    def _path(self, digest: str) -> Path:
+        if not _DIGEST_PATTERN.match(digest):
+            raise ValueError(f"Invalid message digest {digest!r}.")
+        return self._root / digest[:2] / digest[2:4] / f"{digest}.z"
+
+
+@lru_cache(maxsize=1)
+def get_message_store() -> MessageStore | None:
+    """Return the configured message store, or ``None`` when bodies stay in the database."""
+    root = load_settings().message_store_path
+    return MessageStore(root) if root else None
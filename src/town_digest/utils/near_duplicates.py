@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import hashlib
+import re
+from collections import Counter, defaultdict
+from collections.abc import Sequence
+from datetime import timedelta
+
+from sqlalchemy import exists, or_, select, tuple_
+from sqlalchemy.orm import Session
+
+from town_digest.models.email import Email
+from town_digest.models.email_simhash_band import EmailSimhashBand
+from town_digest.models.extraction_stat import ExtractionStat
+
+SIMHASH_BITS = 64
+SIMHASH_BANDS = 8
+BAND_BITS = SIMHASH_BITS // SIMHASH_BANDS
+# A forwarded copy or a one-line correction of a few hundred words lands within about six
+# bits, while unrelated issues of the same newsletter are 15 or more bits apart.
+# Must stay below SIMHASH_BANDS so every match shares at least one band value.
+NEAR_DUPLICATE_MAX_DISTANCE = 7
+NEAR_DUPLICATE_WINDOW = timedelta(days=30)
+SHINGLE_WORDS = 3
+# Short texts give unstable hashes, so they are never matched.
+MIN_FINGERPRINT_WORDS = 30
+
+_WORD = re.compile(r"\w+")
+# Bit counts are summed in 32-bit lanes of one big integer, spread a byte at a time, which
+# is far cheaper than looping over all 64 bits of every shingle hash in Python.
+_LANE_BITS = 32
+_LANE_MASK = (1 << _LANE_BITS) - 1
+_BYTE_LANES = tuple(
+    sum(1 << (bit * _LANE_BITS) for bit in range(8) if byte >> bit & 1) for byte in range(256)
+)
+
+
+def simhash(text: str) -> int | None:
+    """Return the 64-bit SimHash of ``text``'s word shingles, or ``None`` if it is too short."""
+    words = _WORD.findall(text.casefold())
+    if len(words) < MIN_FINGERPRINT_WORDS:
+        return None
+    shingles = Counter(
+        " ".join(words[start : start + SHINGLE_WORDS])
+        for start in range(len(words) - SHINGLE_WORDS + 1)
+    )
+    lanes = 0
+    for shingle, count in shingles.items():
+        value = int.from_bytes(hashlib.blake2b(shingle.encode(), digest_size=8).digest())
+        spread = 0
+        for byte in range(SIMHASH_BITS // 8):
+            spread |= _BYTE_LANES[value >> (byte * 8) & 0xFF] << (byte * 8 * _LANE_BITS)
+        lanes += spread * count
+    # A bit is set when more than half of the shingles have it set.
+    total = shingles.total()
+    return sum(
+        1 << bit
+        for bit in range(SIMHASH_BITS)
+        if 2 * (lanes >> (bit * _LANE_BITS) & _LANE_MASK) > total
+    )
+
+
+def hamming_distance(first: int, second: int) -> int:
+    return ((first ^ second) & (1 << SIMHASH_BITS) - 1).bit_count()
+
+
+def fingerprint_email(email: Email, text: str) -> None:
+    """Set the SimHash and band index of ``email`` from its compacted text.
+
+    Texts too short to fingerprint reliably are left without one and never matched.
+    """
+    value = simhash(text)
+    if value is None:
+        return
+    email.simhash = _to_signed(value)
+    email.simhash_bands = [
+        EmailSimhashBand(band=band, value=band_value)
+        for band, band_value in enumerate(_bands(value))
+    ]
+
+
+def find_near_duplicate(
+    session: Session, email: Email, *, edition_id: int | None = None
+) -> Email | None:
+    """Return the closest earlier, already extracted copy of ``email`` in its edition.
+
+    Candidates share a band value with ``email`` and were received within
+    ``NEAR_DUPLICATE_WINDOW`` before it; ties go to the earliest copy. ``edition_id``
+    looks in an edition the email is about to be assigned to.
+    """
+    edition_id = edition_id or email.edition_id
+    if edition_id is None or email.simhash is None:
+        return None
+    bands = [(band, value) for band, value in enumerate(_bands(email.simhash))]
+    candidate_ids = select(EmailSimhashBand.email_id).where(
+        tuple_(EmailSimhashBand.band, EmailSimhashBand.value).in_(bands)
+    )
+    candidates = session.scalars(
+        select(Email).where(
+            Email.id.in_(candidate_ids),
+            Email.id != email.id,
+            Email.edition_id == edition_id,
+            Email.received_at <= email.received_at,
+            Email.received_at >= email.received_at - NEAR_DUPLICATE_WINDOW,
+            or_(
+                Email.events.any(),
+                Email.announcements.any(),
+                exists().where(ExtractionStat.email_id == Email.id),
+            ),
+        )
+    ).all()
+    matches = [
+        (distance, candidate.received_at, candidate.id, candidate)
+        for candidate in candidates
+        if (distance := hamming_distance(email.simhash, candidate.simhash))
+        <= NEAR_DUPLICATE_MAX_DISTANCE
+    ]
+    return min(matches)[3] if matches else None
+
+
+def group_near_duplicates(emails: Sequence[Email]) -> dict[int, Email]:
+    """Map every email in ``emails`` that copies an earlier one among them to that one.
+
+    For emails that are extracted together, so none has items ``find_near_duplicate``
+    could reuse yet. Copies match by the same rules (edition, window and distance) and
+    always map to an email that is not a copy itself.
+    """
+    originals: dict[int, Email] = {}
+    by_band: defaultdict[tuple[int, int, int], list[Email]] = defaultdict(list)
+    for email in sorted(emails, key=lambda email: (email.received_at, email.id)):
+        if email.edition_id is None or email.simhash is None:
+            continue
+        keys = [(email.edition_id, band, value) for band, value in enumerate(_bands(email.simhash))]
+        candidates = {candidate.id: candidate for key in keys for candidate in by_band[key]}
+        matches = [
+            (distance, candidate.received_at, candidate.id, candidate)
+            for candidate in candidates.values()
+            if candidate.received_at >= email.received_at - NEAR_DUPLICATE_WINDOW
+            and (distance := hamming_distance(email.simhash, candidate.simhash))
+            <= NEAR_DUPLICATE_MAX_DISTANCE
+        ]
+        if matches:
+            originals[email.id] = min(matches)[3]
+            continue
+        for key in keys:
+            by_band[key].append(email)
+    return originals
+
+
+def link_to_original(session: Session, duplicate: Email, original: Email) -> int:
+    """Attach the original's events and announcements to ``duplicate``; return the count."""
+    events = [event for event in original.events if event not in duplicate.events]
+    announcements = [
+        announcement
+        for announcement in original.announcements
+        if announcement not in duplicate.announcements
+    ]
+    duplicate.events.extend(events)
+    duplicate.announcements.extend(announcements)
+    return len(events) + len(announcements)
+
+
+def _bands(value: int) -> tuple[int, ...]:
+    # Works for the signed stored form too, since shifts and masks see two's complement.
+    mask = (1 << BAND_BITS) - 1
+    return tuple(value >> (band * BAND_BITS) & mask for band in range(SIMHASH_BANDS))
+
+
+def _to_signed(value: int) -> int:
+    return value - (1 << SIMHASH_BITS) if value >= 1 << (SIMHASH_BITS - 1) else value
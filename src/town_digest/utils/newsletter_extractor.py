@@ -0,0 +1,517 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from collections.abc import Callable, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, replace
+from datetime import date, time
+from time import perf_counter, sleep
+from typing import Any, Literal, TypedDict
+
+from openai import APIConnectionError, InternalServerError, OpenAI, RateLimitError
+
+from town_digest.utils.email_text import estimate_tokens
+from town_digest.utils.extraction_cache import extraction_cache_key, get_extraction_cache
+from town_digest.utils.extraction_chunks import merge_extractions, split_extraction_text
+from town_digest.utils.openai_client import build_openai_client, openai_max_retries
+from town_digest.utils.rate_limiter import get_openai_rate_limiter
+
+DEFAULT_OPENAI_MODEL = "gpt-5-mini"
+# Bump when response parsing changes in a way the prompt and schema fingerprint cannot see.
+EXTRACTION_PROMPT_VERSION = 1
+DEFAULT_EXTRACTION_MAX_WORKERS = 4
+# Output tokens reserved per request when budgeting tokens per minute.
+EXTRACTION_OUTPUT_TOKENS = 1000
+MAX_RATE_LIMIT_RETRIES = 5
+# Server and network errors are retried up to OPENAI_MAX_RETRIES times with this backoff.
+TRANSIENT_ERROR_BACKOFF_SECONDS = 0.5
+MAX_TRANSIENT_ERROR_BACKOFF_SECONDS = 8.0
+# Longer inputs are split into chunks that are extracted in parallel.
+DEFAULT_EXTRACTION_CHUNK_TOKENS = 6000
+DEFAULT_EXTRACTION_CHUNK_OVERLAP_TOKENS = 150
+
+ExtractionKind = Literal["events", "announcements"]
+ALL_EXTRACTION_KINDS: tuple[ExtractionKind, ...] = ("events", "announcements")
+
+
+class EventDraft(TypedDict):
+    title: str
+    description: str | None
+    location: str | None
+    start_date: date
+    start_time: time | None
+
+
+class AnnouncementDraft(TypedDict):
+    title: str | None
+    body: str
+
+
+class NewsletterExtraction(TypedDict):
+    events: list[EventDraft]
+    announcements: list[AnnouncementDraft]
+
+
+EVENT_ITEM_JSON_SCHEMA: dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "title": {"type": "string"},
+        "description": {"type": ["string", "null"]},
+        "location": {"type": ["string", "null"]},
+        "start_date": {"type": "string"},
+        "start_time": {"type": ["string", "null"]},
+    },
+    "required": ["title", "description", "location", "start_date", "start_time"],
+    "additionalProperties": False,
+}
+
+ANNOUNCEMENT_ITEM_JSON_SCHEMA: dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "title": {"type": ["string", "null"]},
+        "body": {"type": "string"},
+    },
+    "required": ["title", "body"],
+    "additionalProperties": False,
+}
+
+_ITEM_SCHEMAS: dict[ExtractionKind, dict[str, Any]] = {
+    "events": EVENT_ITEM_JSON_SCHEMA,
+    "announcements": ANNOUNCEMENT_ITEM_JSON_SCHEMA,
+}
+
+_INSTRUCTIONS: dict[ExtractionKind, str] = {
+    "events": (
+        "Only return events with a clear title and explicit calendar date. "
+        "DO NOT return non-event announcements, subscribe calls, or generic newsletter text. "
+        "The description MUST be markdown-formatted, the title MUST be plain text. "
+        "DO NOT bold the entire description. "
+        "Return start_date as YYYY-MM-DD and start_time as 24-hour HH:MM:SS when known; "
+        "otherwise set start_time to null. "
+        "Include location when explicitly present; otherwise set location to null. "
+        "If there are no events, return an empty list."
+    ),
+    "announcements": (
+        "Announcements are non-event civic news. "
+        "DO NOT return newsletter sign-up calls, welcome announcements, event listings, "
+        "or other non-announcement content. "
+        "Return concise reworded announcements that are suitable for display on a website. "
+        "The body MUST be markdown-formatted, the title MUST be plain text. "
+        "All links in the body MUST be converted to markdown format. "
+        "Feel free to include links in the body if there are any relevant links in the "
+        "email text. "
+        "If there are no announcements, return an empty list."
+    ),
+}
+
+_SCHEMA_NAMES: dict[tuple[ExtractionKind, ...], str] = {
+    ("events",): "event_extraction",
+    ("announcements",): "announcement_extraction",
+    ALL_EXTRACTION_KINDS: "newsletter_extraction",
+}
+
+
+def build_extraction_schema(kinds: Sequence[ExtractionKind]) -> dict[str, Any]:
+    """Build the structured-output schema returning one list per requested kind."""
+    return {
+        "type": "object",
+        "properties": {kind: {"type": "array", "items": _ITEM_SCHEMAS[kind]} for kind in kinds},
+        "required": list(kinds),
+        "additionalProperties": False,
+    }
+
+
+def extract_newsletter_items(
+    email_text: str,
+    *,
+    kinds: Sequence[ExtractionKind] = ALL_EXTRACTION_KINDS,
+    model: str | None = None,
+    client: OpenAI | None = None,
+    client_factory: Callable[[], OpenAI] | None = None,
+    use_cache: bool = True,
+    usage: list[ExtractionUsage] | None = None,
+) -> NewsletterExtraction:
+    """Extract events and announcements from email text in a single structured-output call.
+
+    ``kinds`` narrows the request to a subset of lists; kinds not requested come back empty.
+    Without ``client``, one is built by ``client_factory`` (``build_openai_client`` by
+    default) only when the request actually has to be sent.
+    Responses are served from the extraction cache when it is configured, keyed by the
+    normalized text, model and prompt version, so reprocessing an email is free.
+
+    Text longer than ``EXTRACTION_CHUNK_TOKENS`` is split at section boundaries into
+    slightly overlapping chunks that are extracted in parallel and merged.
+    Token usage and latency of every request are appended to ``usage`` when given.
+    """
+    if not kinds or not email_text.strip():
+        return {"events": [], "announcements": []}
+    requests = split_extraction_request(
+        build_extraction_request(email_text, kinds=kinds, model=model)
+    )
+    if len(requests) == 1:
+        return _extract_chunk(requests[0], client, client_factory, use_cache, usage)
+
+    workers = min(
+        len(requests),
+        int(os.environ.get("EXTRACTION_MAX_WORKERS", DEFAULT_EXTRACTION_MAX_WORKERS)),
+    )
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="extraction-chunk") as pool:
+        extractions = pool.map(
+            lambda request: _extract_chunk(request, client, client_factory, use_cache, usage),
+            requests,
+        )
+        return merge_extractions(list(extractions))
+
+
+def split_extraction_request(request: ExtractionRequest) -> list[ExtractionRequest]:
+    """Split ``request`` into one request per chunk of its text.
+
+    Chunks hold about ``EXTRACTION_CHUNK_TOKENS`` tokens and overlap by
+    ``EXTRACTION_CHUNK_OVERLAP_TOKENS``; short text stays a single request. Their
+    extractions are combined with ``merge_extractions``.
+    """
+    chunks = split_extraction_text(
+        request.email_text,
+        max_tokens=int(os.environ.get("EXTRACTION_CHUNK_TOKENS", DEFAULT_EXTRACTION_CHUNK_TOKENS)),
+        overlap_tokens=int(
+            os.environ.get(
+                "EXTRACTION_CHUNK_OVERLAP_TOKENS", DEFAULT_EXTRACTION_CHUNK_OVERLAP_TOKENS
+            )
+        ),
+    )
+    if len(chunks) == 1:
+        return [request]
+    return [replace(request, email_text=chunk) for chunk in chunks]
+
+
+def _extract_chunk(
+    request: ExtractionRequest,
+    client: OpenAI | None,
+    client_factory: Callable[[], OpenAI] | None,
+    use_cache: bool,
+    usage: list[ExtractionUsage] | None,
+) -> NewsletterExtraction:
+    started = perf_counter()
+    cache = get_extraction_cache() if use_cache else None
+    output_text = cache.get(request.cache_key) if cache is not None else None
+
+    if output_text is not None:
+        request_usage = ExtractionUsage(
+            model=request.model,
+            duration_seconds=perf_counter() - started,
+            cached=True,
+            kinds=request.kinds,
+        )
+        if usage is not None:
+            usage.append(request_usage)
+        return parse_extraction_output(output_text, request.kinds)
+
+    llm_client = client or (client_factory or build_openai_client)()
+    output_text, request_usage = _request_output_text(llm_client, request)
+    if usage is not None:
+        usage.append(request_usage)
+    # Only valid output is cached, so a retry asks the model again instead of replaying
+    # the same error.
+    extraction = parse_extraction_output(output_text, request.kinds)
+    if cache is not None:
+        cache.put(
+            request.cache_key,
+            model=request.model,
+            prompt_version=request.prompt_version,
+            output_text=output_text,
+        )
+    return extraction
+
+
+@dataclass(frozen=True, slots=True)
+class ExtractionUsage:
+    """Token usage and wall time of one extraction request."""
+
+    model: str
+    duration_seconds: float
+    input_tokens: int = 0
+    output_tokens: int = 0
+    # Rate-limited attempts that were retried before the request succeeded.
+    retries: int = 0
+    cached: bool = False
+    # The lists the request asked for.
+    kinds: tuple[ExtractionKind, ...] = ()
+
+
+@dataclass(frozen=True, slots=True)
+class ExtractionRequest:
+    """Everything needed to send one extraction request, synchronously or in a batch."""
+
+    email_text: str
+    model: str
+    kinds: tuple[ExtractionKind, ...]
+    system_prompt: str
+    schema: dict[str, Any]
+
+    @property
+    def schema_name(self) -> str:
+        return _SCHEMA_NAMES[self.kinds]
+
+    @property
+    def prompt_version(self) -> str:
+        return extraction_prompt_version(self.system_prompt, self.schema)
+
+    @property
+    def cache_key(self) -> str:
+        return extraction_cache_key(
+            self.email_text, model=self.model, prompt_version=self.prompt_version
+        )
+
+    @property
+    def estimated_tokens(self) -> int:
+        return (
+            estimate_tokens(self.system_prompt)
+            + estimate_tokens(self.email_text)
+            + EXTRACTION_OUTPUT_TOKENS
+        )
+
+    def body(self) -> dict[str, Any]:
+        """Keyword arguments for ``responses.create``, also used as a batch request body."""
+        return {
+            "model": self.model,
+            "input": [
+                {"role": "system", "content": self.system_prompt},
+                {"role": "user", "content": self.email_text},
+            ],
+            "text": {
+                "format": {
+                    "type": "json_schema",
+                    "name": self.schema_name,
+                    "schema": self.schema,
+                    "strict": True,
+                }
+            },
+        }
+
+
+def build_extraction_request(
+    email_text: str,
+    *,
+    kinds: Sequence[ExtractionKind] = ALL_EXTRACTION_KINDS,
+    model: str | None = None,
+) -> ExtractionRequest:
+    """Build the prompt, schema and model for extracting ``kinds`` from ``email_text``."""
+    selected_kinds = tuple(kind for kind in ALL_EXTRACTION_KINDS if kind in kinds)
+    if not selected_kinds:
+        raise ValueError("At least one extraction kind is required.")
+    return ExtractionRequest(
+        email_text=email_text,
+        model=model or os.environ.get("OPENAI_MODEL", DEFAULT_OPENAI_MODEL),
+        kinds=selected_kinds,
+        system_prompt=_system_prompt(selected_kinds),
+        schema=build_extraction_schema(selected_kinds),
+    )
+
+
+def parse_extraction_output(
+    output_text: str, kinds: Sequence[ExtractionKind] = ALL_EXTRACTION_KINDS
+) -> NewsletterExtraction:
+    """Turn a structured-output response into drafts; kinds not requested stay empty."""
+    extraction: NewsletterExtraction = {"events": [], "announcements": []}
+    parsed = json.loads(output_text)
+    for kind in kinds:
+        items = parsed.get(kind)
+        if not isinstance(items, list):
+            raise ValueError(f"OpenAI response schema violation: {kind!r} must be a list.")
+        if kind == "events":
+            extraction["events"] = _event_drafts(items)
+        else:
+            extraction["announcements"] = _announcement_drafts(items)
+    return extraction
+
+
+def extract_newsletter_items_concurrently(
+    email_texts: Sequence[str],
+    *,
+    max_workers: int | None = None,
+    model: str | None = None,
+    kinds: Sequence[Sequence[ExtractionKind]] | None = None,
+    usages: Sequence[list[ExtractionUsage]] | None = None,
+    client: OpenAI | None = None,
+    use_cache: bool = True,
+) -> list[NewsletterExtraction | Exception]:
+    """Run ``extract_newsletter_items`` for many emails on a bounded thread pool.
+
+    Results keep the order of ``email_texts``; a failed extraction is returned as its
+    exception so one bad email does not discard the others. Requests share the
+    process-wide rate limiter, so the pool can be sized for throughput. ``kinds`` and
+    ``usages`` hold one entry per email text; ``client`` and ``use_cache`` apply to all.
+    """
+    workers = max_workers or int(
+        os.environ.get("EXTRACTION_MAX_WORKERS", DEFAULT_EXTRACTION_MAX_WORKERS)
+    )
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="extraction") as executor:
+        futures = [
+            executor.submit(
+                extract_newsletter_items,
+                email_text,
+                kinds=kinds[index] if kinds is not None else ALL_EXTRACTION_KINDS,
+                model=model,
+                client=client,
+                use_cache=use_cache,
+                usage=usages[index] if usages is not None else None,
+            )
+            for index, email_text in enumerate(email_texts)
+        ]
+        results: list[NewsletterExtraction | Exception] = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as exc:
+                results.append(exc)
+        return results
+
+
+def extraction_prompt_version(system_prompt: str, schema: dict[str, Any]) -> str:
+    """Fingerprint a prompt and schema so editing either invalidates only its cache entries."""
+    fingerprint = hashlib.sha256(
+        (system_prompt + json.dumps(schema, sort_keys=True)).encode("utf-8")
+    ).hexdigest()
+    return f"v{EXTRACTION_PROMPT_VERSION}-{fingerprint[:16]}"
+
+
+def _request_output_text(
+    llm_client: OpenAI, request: ExtractionRequest
+) -> tuple[str, ExtractionUsage]:
+    started = perf_counter()
+    limiter = get_openai_rate_limiter()
+    # The SDK would retry a 429 on its own before the limiter hears of it, so its retries
+    # are off and this loop retries rate limits and transient errors instead.
+    responses = llm_client.with_options(max_retries=0).responses
+    max_transient_retries = openai_max_retries()
+    rate_limit_retries = transient_retries = 0
+    while True:
+        limiter.acquire(request.estimated_tokens)
+        try:
+            response = responses.create(**request.body())
+        except RateLimitError as exc:
+            if rate_limit_retries >= MAX_RATE_LIMIT_RETRIES:
+                raise
+            limiter.record_rate_limited(_retry_after_seconds(exc))
+            rate_limit_retries += 1
+            continue
+        except (APIConnectionError, InternalServerError):
+            # Timeouts are connection errors too. Only this request waits; a failing
+            # server says nothing about the account's rate limits.
+            if transient_retries >= max_transient_retries:
+                raise
+            sleep(
+                min(
+                    TRANSIENT_ERROR_BACKOFF_SECONDS * 2**transient_retries,
+                    MAX_TRANSIENT_ERROR_BACKOFF_SECONDS,
+                )
+            )
+            transient_retries += 1
+            continue
+        limiter.record_success()
+        break
+
+    output_text = response.output_text
+    if not output_text:
+        raise ValueError(f"OpenAI did not return structured output text for {request.schema_name}.")
+    response_usage = getattr(response, "usage", None)
+    return output_text, ExtractionUsage(
+        model=request.model,
+        duration_seconds=perf_counter() - started,
+        input_tokens=getattr(response_usage, "input_tokens", 0),
+        output_tokens=getattr(response_usage, "output_tokens", 0),
+        retries=rate_limit_retries,
+        kinds=request.kinds,
+    )
+
+
+def _retry_after_seconds(exc: RateLimitError) -> float | None:
+    headers = exc.response.headers
+    try:
+        if "retry-after-ms" in headers:
+            return float(headers["retry-after-ms"]) / 1000
+        if "retry-after" in headers:
+            return float(headers["retry-after"])
+    except ValueError:
+        # Retry-After may also be an HTTP date; fall back to exponential backoff.
+        return None
+    return None
+
+
+def _system_prompt(kinds: tuple[ExtractionKind, ...]) -> str:
+    if kinds == ("events",):
+        return "Extract events from newsletter text. " + _INSTRUCTIONS["events"]
+    if kinds == ("announcements",):
+        return (
+            "Extract non-event civic announcements from newsletter text. "
+            + _INSTRUCTIONS["announcements"]
+        )
+    return (
+        "Extract events and non-event civic announcements from newsletter text. "
+        "Each item belongs to exactly one list: never repeat an event as an announcement.\n"
+        f"Events: {_INSTRUCTIONS['events']}\n"
+        f"Announcements: {_INSTRUCTIONS['announcements']}"
+    )
+
+
+def _event_drafts(items: list[Any]) -> list[EventDraft]:
+    drafts: list[EventDraft] = []
+    for item in items:
+        title = item.get("title")
+        if not isinstance(title, str) or not title.strip():
+            continue
+
+        drafts.append(
+            {
+                "title": title.strip(),
+                "description": _normalize_optional_text(item.get("description")),
+                "location": _normalize_optional_text(item.get("location")),
+                "start_date": _parse_start_date(item.get("start_date")),
+                "start_time": _parse_start_time(item.get("start_time")),
+            }
+        )
+    return drafts
+
+
+def _announcement_drafts(items: list[Any]) -> list[AnnouncementDraft]:
+    drafts: list[AnnouncementDraft] = []
+    for item in items:
+        body = _normalize_optional_text(item.get("body"))
+        if body is None:
+            continue
+
+        drafts.append({"title": _normalize_optional_text(item.get("title")), "body": body})
+    return drafts
+
+
+def _normalize_optional_text(value: object) -> str | None:
+    if not isinstance(value, str):
+        return None
+    normalized = value.strip()
+    return normalized if normalized else None
+
+
+def _parse_start_date(value: object) -> date:
+    if not isinstance(value, str):
+        raise ValueError("OpenAI response schema violation: 'start_date' must be a string.")
+    try:
+        return date.fromisoformat(value)
+    except ValueError as exc:
+        raise ValueError(
+            f"OpenAI response schema violation: invalid start_date {value!r}."
+        ) from exc
+
+
+def _parse_start_time(value: object) -> time | None:
+    if value is None:
+        return None
+    if not isinstance(value, str):
+        raise ValueError("OpenAI response schema violation: 'start_time' must be a string or null.")
+    try:
+        return time.fromisoformat(value)
+    except ValueError as exc:
+        raise ValueError(
+            f"OpenAI response schema violation: invalid start_time {value!r}."
+        ) from exc
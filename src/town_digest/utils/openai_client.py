@@ -1,13 +1,83 @@
 from __future__ import annotations
 
 import os
+from functools import lru_cache
 
-from openai import OpenAI
+import httpx
+from openai import DefaultHttpxClient, OpenAI
 
+from town_digest.utils.llm_recording import RecordingSettings, recording_settings_from_env
 
+DEFAULT_OPENAI_TIMEOUT_SECONDS = 120.0
+DEFAULT_OPENAI_CONNECT_TIMEOUT_SECONDS = 10.0
+DEFAULT_OPENAI_MAX_CONNECTIONS = 20
+DEFAULT_OPENAI_MAX_KEEPALIVE_CONNECTIONS = 10
+DEFAULT_OPENAI_KEEPALIVE_EXPIRY_SECONDS = 60.0
+DEFAULT_OPENAI_MAX_RETRIES = 2
+
+
+@lru_cache(maxsize=1)
 def build_openai_client() -> OpenAI:
-    """Build an OpenAI client from environment configuration."""
+    """Return the process-wide OpenAI client, building it from the environment on first use.
+
+    The client owns a pooled HTTP connection, so reusing it keeps TLS sessions alive across
+    extraction calls. ``OPENAI_BASE_URL`` points it at a compatible stand-in server.
+    ``OPENAI_RECORDING_MODE`` records responses to disk or replays them without network
+    access, in which case no API key is needed.
+    """
+    return create_openai_client(recording=recording_settings_from_env())
+
+
+def create_openai_client(*, recording: RecordingSettings | None = None) -> OpenAI:
+    """Build a new OpenAI client from the environment, recording or replaying per ``recording``.
+
+    Unlike ``build_openai_client`` the client is not shared, so the caller closes it.
+    """
     api_key = os.environ.get("OPENAI_API_KEY")
     if not api_key:
-        raise ValueError("OPENAI_API_KEY is required.")
-    return OpenAI(api_key=api_key)
+        if recording is None or recording.mode != "replay":
+            raise ValueError("OPENAI_API_KEY is required.")
+        api_key = "replay"
+    limits = httpx.Limits(
+        max_connections=int(
+            os.environ.get("OPENAI_MAX_CONNECTIONS", DEFAULT_OPENAI_MAX_CONNECTIONS)
+        ),
+        max_keepalive_connections=int(
+            os.environ.get(
+                "OPENAI_MAX_KEEPALIVE_CONNECTIONS", DEFAULT_OPENAI_MAX_KEEPALIVE_CONNECTIONS
+            )
+        ),
+        keepalive_expiry=_env_float(
+            "OPENAI_KEEPALIVE_EXPIRY_SECONDS", DEFAULT_OPENAI_KEEPALIVE_EXPIRY_SECONDS
+        ),
+    )
+    # A custom transport brings its own connection pool, so it gets the limits too.
+    transport = recording.transport(limits) if recording is not None else None
+    return OpenAI(
+        api_key=api_key,
+        base_url=os.environ.get("OPENAI_BASE_URL") or None,
+        timeout=httpx.Timeout(
+            _env_float("OPENAI_TIMEOUT_SECONDS", DEFAULT_OPENAI_TIMEOUT_SECONDS),
+            connect=_env_float(
+                "OPENAI_CONNECT_TIMEOUT_SECONDS", DEFAULT_OPENAI_CONNECT_TIMEOUT_SECONDS
+            ),
+        ),
+        max_retries=openai_max_retries(),
+        http_client=DefaultHttpxClient(limits=limits, transport=transport),
+    )
+
+
+def openai_max_retries() -> int:
+    """Return how often a failed request is retried, from ``OPENAI_MAX_RETRIES``."""
+    return int(os.environ.get("OPENAI_MAX_RETRIES", DEFAULT_OPENAI_MAX_RETRIES))
+
+
+def reset_openai_client() -> None:
+    """Close the cached OpenAI client so the next call rebuilds it from the environment."""
+    if build_openai_client.cache_info().currsize:
+        build_openai_client().close()
+    build_openai_client.cache_clear()
+
+
+def _env_float(name: str, default: float) -> float:
+    return float(os.environ.get(name, default))
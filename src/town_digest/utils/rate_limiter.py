@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections.abc import Callable
+from functools import lru_cache
+
+DEFAULT_RATE_LIMIT_BACKOFF_SECONDS = 1.0
+MAX_RATE_LIMIT_BACKOFF_SECONDS = 60.0
+
+
+class _TokenBucket:
+    """A bucket holding up to ``capacity`` units that refills evenly over one minute."""
+
+    def __init__(self, per_minute: int, now: float) -> None:
+        self.capacity = float(per_minute)
+        self.available = float(per_minute)
+        self._refill_per_second = per_minute / 60.0
+        self._updated_at = now
+
+    def refill(self, now: float) -> None:
+        elapsed = now - self._updated_at
+        self.available = min(self.capacity, self.available + elapsed * self._refill_per_second)
+        self._updated_at = now
+
+    def wait_time(self, amount: float) -> float:
+        missing = amount - self.available
+        return missing / self._refill_per_second if missing > 0 else 0.0
+
+
+class RateLimiter:
+    """Thread-safe requests-per-minute and tokens-per-minute limiter for LLM calls.
+
+    ``acquire`` blocks until both budgets can cover the request. After a 429 the
+    limiter pauses every caller, honouring ``Retry-After`` when the server sends it and
+    otherwise doubling the pause on each consecutive rate-limit response.
+    """
+
+    def __init__(
+        self,
+        *,
+        requests_per_minute: int | None = None,
+        tokens_per_minute: int | None = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        now = clock()
+        self._requests = _TokenBucket(requests_per_minute, now) if requests_per_minute else None
+        self._tokens = _TokenBucket(tokens_per_minute, now) if tokens_per_minute else None
+        self._paused_until = now
+        self._consecutive_rate_limits = 0
+
+    def acquire(self, tokens: int = 0) -> None:
+        """Block until one request of roughly ``tokens`` tokens fits in both budgets."""
+        while True:
+            with self._lock:
+                wait = self._reserve(tokens)
+            if wait <= 0:
+                return
+            self._sleep(wait)
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._consecutive_rate_limits = 0
+
+    def record_rate_limited(self, retry_after: float | None = None) -> float:
+        """Pause all callers after a 429 response and return the pause in seconds."""
+        with self._lock:
+            self._consecutive_rate_limits += 1
+            backoff = DEFAULT_RATE_LIMIT_BACKOFF_SECONDS * 2 ** (self._consecutive_rate_limits - 1)
+            delay = min(
+                retry_after if retry_after is not None else backoff,
+                MAX_RATE_LIMIT_BACKOFF_SECONDS,
+            )
+            self._paused_until = max(self._paused_until, self._clock() + delay)
+            return delay
+
+    def _reserve(self, tokens: int) -> float:
+        now = self._clock()
+        if now < self._paused_until:
+            return self._paused_until - now
+
+        buckets = [(self._requests, 1.0), (self._tokens, float(tokens))]
+        wait = 0.0
+        for bucket, amount in buckets:
+            if bucket is None:
+                continue
+            bucket.refill(now)
+            # A request larger than the whole budget only waits for a full bucket.
+            wait = max(wait, bucket.wait_time(min(amount, bucket.capacity)))
+        if wait > 0:
+            return wait
+
+        for bucket, amount in buckets:
+            if bucket is not None:
+                bucket.available -= min(amount, bucket.capacity)
+        return 0.0
+
+
+@lru_cache(maxsize=1)
+def get_openai_rate_limiter() -> RateLimiter:
+    """Return the process-wide limiter for OpenAI requests.
+
+    Budgets come from ``OPENAI_REQUESTS_PER_MINUTE`` and ``OPENAI_TOKENS_PER_MINUTE``;
+    unset or ``0`` leaves that budget unlimited while keeping the 429 backoff.
+    """
+    return RateLimiter(
+        requests_per_minute=int(os.environ.get("OPENAI_REQUESTS_PER_MINUTE", 0)),
+        tokens_per_minute=int(os.environ.get("OPENAI_TOKENS_PER_MINUTE", 0)),
+    )
@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+@dataclass(slots=True)
+class StatementCount:
+    statements: int = 0
+
+
+_active: ContextVar[tuple[StatementCount, ...]] = ContextVar("statement_counts", default=())
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _count_statement(*_: object) -> None:
+    for count in _active.get():
+        count.statements += 1
+
+
+@contextmanager
+def count_statements() -> Iterator[StatementCount]:
+    """Count the SQL statements this thread sends to any engine inside the block.
+
+    Blocks may nest, and executemany batches count once. Threads started inside the
+    block are only counted when they run in a copy of this context.
+    """
+    count = StatementCount()
+    token = _active.set((*_active.get(), count))
+    try:
+        yield count
+    finally:
+        _active.reset(token)
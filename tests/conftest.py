@@ -1,6 +1,8 @@
 from __future__ import annotations
 
-from collections.abc import Iterator
+import threading
+from collections.abc import Callable, Iterable, Iterator
+from typing import Any
 
 import pytest
 from sqlalchemy import create_engine, event
@@ -10,6 +12,65 @@ from sqlalchemy.pool import StaticPool
 from town_digest.models import Base
 
 
+class FakeResponse:
+    def __init__(self, output_text: str, usage: object | None = None) -> None:
+        self.output_text = output_text
+        self.usage = usage
+
+
+class FakeResponsesAPI:
+    """Records ``create`` calls, raises ``errors`` in turn, then answers ``output_text``.
+
+    ``output_text`` may be a callable that builds the answer from the call's kwargs.
+    """
+
+    def __init__(
+        self,
+        output_text: str | Callable[[dict[str, Any]], str],
+        *,
+        usage: object | None = None,
+        errors: Iterable[Exception] = (),
+    ) -> None:
+        self.calls: list[dict[str, Any]] = []
+        self._output_text = output_text
+        self._usage = usage
+        self._errors = list(errors)
+        self._lock = threading.Lock()
+
+    def create(self, **kwargs: Any) -> FakeResponse:
+        with self._lock:
+            self.calls.append(kwargs)
+            error = self._errors.pop(0) if self._errors else None
+        if error is not None:
+            raise error
+        output_text = self._output_text
+        if callable(output_text):
+            output_text = output_text(kwargs)
+        return FakeResponse(output_text, self._usage)
+
+
+class FakeOpenAIClient:
+    def __init__(
+        self,
+        output_text: str | Callable[[dict[str, Any]], str] = "{}",
+        *,
+        usage: object | None = None,
+        errors: Iterable[Exception] = (),
+    ) -> None:
+        self.responses = FakeResponsesAPI(output_text, usage=usage, errors=errors)
+        self.options: dict[str, Any] = {}
+
+    def with_options(self, **options: Any) -> FakeOpenAIClient:
+        self.options.update(options)
+        return self
+
+
+@pytest.fixture()
+def fake_openai_client() -> type[FakeOpenAIClient]:
+    """Return the fake OpenAI client class; call it with the output text to answer."""
+    return FakeOpenAIClient
+
+
 @pytest.fixture(scope="session")
 def engine() -> Iterator[object]:
     engine = create_engine(
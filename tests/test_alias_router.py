@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+from datetime import UTC, datetime
+
+from sqlalchemy.orm import Session
+
+from town_digest.models import Edition, EmailAlias
+from town_digest.pipelines import ingest_emails as ingest_emails_module
+from town_digest.utils.alias_router import (
+    AliasRoute,
+    AliasRouter,
+    get_alias_router,
+    normalize_address,
+)
+from town_digest.utils.email_client import EmailContent
+from town_digest.utils.statement_counter import count_statements
+
+
+def test_resolve_is_case_insensitive_and_strips_plus_tags() -> None:
+    router = AliasRouter(
+        [
+            AliasRoute(id=1, edition_id=10, address="tdigest+East-Windsor@Run.box"),
+            AliasRoute(id=2, edition_id=20, address="news@example.com"),
+        ]
+    )
+
+    assert normalize_address("Digest <TDigest+East-Windsor@RUN.box>") == (
+        "tdigest+east-windsor@run.box"
+    )
+    assert router.resolve("TDIGEST+east-windsor@run.box").edition_id == 10
+    assert router.resolve("tdigest+east-windsor+spring@run.box").edition_id == 10
+    assert router.resolve("Town News <news+weekly@example.com>").edition_id == 20
+    assert router.resolve("tdigest@run.box") is None
+    assert router.resolve(None) is None
+
+
+def test_resolve_picks_the_first_matching_recipient_instead_of_raising() -> None:
+    router = AliasRouter(
+        [
+            AliasRoute(id=1, edition_id=10, address="a@example.com"),
+            AliasRoute(id=2, edition_id=20, address="b@example.com"),
+        ]
+    )
+
+    assert router.resolve("someone@example.com, B@example.com,a@example.com").id == 2
+    assert router.resolve(["a@example.com", "b@example.com"]).id == 1
+
+
+def test_get_alias_router_loads_once_and_reloads_after_alias_changes(
+    db_session: Session,
+) -> None:
+    edition = Edition(name="East Windsor", slug="east-windsor", state="NJ")
+    alias = EmailAlias(address="tdigest+east-windsor@example.com", edition=edition)
+    db_session.add_all([edition, alias])
+    db_session.flush()
+
+    router = get_alias_router(db_session)
+    with count_statements() as count:
+        assert get_alias_router(db_session) is router
+        route = router.resolve("tdigest+east-windsor@example.com")
+    assert count.statements == 0
+    assert (route.id, route.edition_id) == (alias.id, edition.id)
+
+    alias.address = "tdigest+ew@example.com"
+    db_session.flush()
+
+    reloaded = get_alias_router(db_session)
+    assert reloaded is not router
+    assert reloaded.resolve("tdigest+east-windsor@example.com") is None
+    assert reloaded.resolve("tdigest+ew@example.com").id == alias.id
+
+
+def test_recipients_include_delivered_to_and_cc_headers() -> None:
+    email = EmailContent(
+        id="1",
+        subject="Weekly news",
+        from_address="clerk@example.com",
+        to_addresses=("list@example.com",),
+        date=datetime(2026, 3, 1, tzinfo=UTC),
+        text="Body",
+        html=None,
+        headers={
+            "Delivered-To": "tdigest+east-windsor@example.com",
+            "CC": "Neighbor <neighbor@example.com>, LIST@example.com",
+        },
+    )
+
+    assert ingest_emails_module._recipients(email) == (
+        "list@example.com,tdigest+east-windsor@example.com,neighbor@example.com"
+    )
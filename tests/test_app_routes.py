@@ -1,5 +1,8 @@
 from __future__ import annotations
 
+import os
+import subprocess
+import sys
 from datetime import date, timedelta
 
 from sqlalchemy import create_engine, event
@@ -112,3 +115,21 @@ def test_root_route_lists_editions_with_links(monkeypatch) -> None:
     assert "Jersey City, NJ" in body
     assert "/nj/east-windsor" in body
     assert "/nj/jersey-city" in body
+
+
+def test_app_startup_does_not_import_pipelines_or_the_openai_client() -> None:
+    heavy = ["prefect", "openai", "town_digest.benchmarks", "town_digest.pipelines"]
+    script = (
+        "import sys, town_digest.app.main; "
+        f"print([name for name in {heavy!r} if name in sys.modules])"
+    )
+
+    result = subprocess.run(
+        [sys.executable, "-c", script],
+        capture_output=True,
+        text=True,
+        check=True,
+        env={**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)},
+    )
+
+    assert result.stdout.strip() == "[]"
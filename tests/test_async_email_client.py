@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from datetime import UTC, datetime
+
+from town_digest.utils import async_email_client
+from town_digest.utils.email_client import EmailContent
+
+
+class _FakeConnection:
+    active = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def __init__(self, *args: object, **kwargs: object) -> None:
+        self.connected = False
+
+    def connect(self) -> None:
+        self.connected = True
+
+    def close(self) -> None:
+        self.connected = False
+
+    def get_contents(self, email_ids: list[str], folder: str, batch_size: int) -> list:
+        with self.lock:
+            _FakeConnection.active += 1
+            _FakeConnection.peak = max(_FakeConnection.peak, _FakeConnection.active)
+        time.sleep(0.02)
+        with self.lock:
+            _FakeConnection.active -= 1
+        return [
+            EmailContent(
+                id=email_id,
+                subject="",
+                from_address="",
+                to_addresses=(),
+                date=datetime(2026, 1, 1, tzinfo=UTC),
+                text=None,
+                html=None,
+                headers={},
+            )
+            for email_id in email_ids
+        ]
+
+
+def test_get_contents_spreads_batches_within_connection_limit(monkeypatch) -> None:
+    monkeypatch.setattr(async_email_client, "ImapMailClient", _FakeConnection)
+
+    async def _fetch() -> list[EmailContent]:
+        async with async_email_client.AsyncImapMailClient(
+            "imap.example.com", "user", "password", max_connections=2
+        ) as client:
+            return await client.get_contents([str(uid) for uid in range(1, 11)], batch_size=2)
+
+    contents = asyncio.run(_fetch())
+
+    assert [content.id for content in contents] == [str(uid) for uid in range(1, 11)]
+    assert _FakeConnection.peak == 2
@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import json
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+from typing import Any
+
+from prefect import Task
+from prefect.logging import disable_run_logger
+from sqlalchemy import select
+from sqlalchemy.orm import Session, sessionmaker
+
+from town_digest.models import Edition, Email, EmailAlias, EmailStatus, ExtractionStat
+from town_digest.pipelines import backfill_emails as backfill_emails_module
+from town_digest.pipelines import ingest_email as ingest_email_module
+from town_digest.utils import extraction_stats
+from town_digest.utils.batch_extractor import LocalBatchBackend
+from town_digest.utils.email_queue import claim_emails
+from town_digest.utils.near_duplicates import fingerprint_email
+
+_NEWSLETTER = " ".join(
+    f"The {place} hosts a town meeting on March {day} at 7 pm, and residents can sign up "
+    f"online or call the {place} front desk for details."
+    for day, place in enumerate(("library", "firehouse", "senior center", "town hall"), start=2)
+)
+
+
+def test_backfill_claims_its_emails_and_does_not_bill_them_again(
+    db_session: Session, monkeypatch
+) -> None:
+    received, failed, processed = (
+        Email(
+            message_id=f"<backfill-{index}@example.com>",
+            received_at=datetime(2026, 3, 1, tzinfo=UTC) + timedelta(minutes=index),
+            status=status,
+        )
+        for index, status in enumerate(
+            (EmailStatus.RECEIVED, EmailStatus.RECEIVED, EmailStatus.PROCESSED)
+        )
+    )
+    db_session.add_all([received, failed, processed])
+    db_session.flush()
+    factory = sessionmaker(bind=db_session.connection(), autoflush=False, expire_on_commit=False)
+    monkeypatch.setattr(backfill_emails_module, "get_session_factory", lambda: factory)
+
+    claimed = backfill_emails_module.claim_backfill_emails.fn("backfill")
+
+    assert claimed == [received.id, failed.id]
+    # A queue worker running meanwhile finds nothing to claim, even hours later.
+    with factory() as session:
+        later = datetime.now(UTC) + timedelta(hours=6)
+        assert claim_emails(session, "worker", now=later) == []
+
+    backfill_emails_module.release_backfill_claims.fn(
+        "backfill", claimed, {failed.id: "invalid JSON"}
+    )
+
+    assert backfill_emails_module.claim_backfill_emails.fn("backfill") == []
+    db_session.expire_all()
+    assert db_session.get(Email, received.id).status == EmailStatus.PROCESSED
+    stored = db_session.get(Email, failed.id)
+    assert (stored.status, stored.last_error) == (EmailStatus.FAILED, "invalid JSON")
+
+
+def test_backfill_triages_links_copies_and_records_stats(
+    db_session: Session, monkeypatch, tmp_path: Path
+) -> None:
+    edition = Edition(name="East Windsor", slug="east-windsor", state="NJ")
+    alias = EmailAlias(address="tdigest+east-windsor@example.com", edition=edition)
+    received = datetime(2026, 3, 1, 8, 0, tzinfo=UTC)
+    original, copy, receipt = (
+        Email(
+            message_id=f"<backfill-{name}@example.com>",
+            received_at=received + timedelta(hours=index),
+            to_emails=alias.address,
+            subject=subject,
+            body_text=text,
+        )
+        for index, (name, subject, text) in enumerate(
+            (
+                ("original", "Town news", _NEWSLETTER),
+                ("copy", "Fwd: Town news", "Forwarded by a neighbor. " + _NEWSLETTER),
+                ("receipt", "Your receipt", "Thanks, your order of two tickets is paid. " * 5),
+            )
+        )
+    )
+    for email in (original, copy, receipt):
+        fingerprint_email(email, email.body_text)
+    db_session.add_all([edition, alias, original, copy, receipt])
+    db_session.flush()
+    db_session.expunge_all()
+    factory = sessionmaker(bind=db_session.connection(), autoflush=False, expire_on_commit=False)
+    for module in (backfill_emails_module, ingest_email_module, extraction_stats):
+        monkeypatch.setattr(module, "get_session_factory", lambda: factory)
+    submitted: list[str] = []
+
+    def respond(body: dict[str, Any]) -> str:
+        submitted.append(body["input"][1]["content"])
+        event = {
+            "title": "Town meeting",
+            "description": None,
+            "location": None,
+            "start_date": "2026-03-02",
+            "start_time": "19:00",
+        }
+        return json.dumps({"events": [event], "announcements": []})
+
+    monkeypatch.setattr(
+        backfill_emails_module, "_batch_backend", lambda: LocalBatchBackend(respond)
+    )
+    monkeypatch.setattr(backfill_emails_module, "_batch_request_dir", lambda: tmp_path)
+    # Run the flow's tasks as plain functions, without a Prefect server.
+    for name, value in vars(backfill_emails_module).copy().items():
+        if isinstance(value, Task):
+            monkeypatch.setattr(backfill_emails_module, name, value.fn)
+
+    with disable_run_logger():
+        backfill_emails_module.backfill_emails.fn(poll_interval=0)
+
+    # Only the original is billed; its copy reuses the events and the receipt is skipped.
+    assert len(submitted) == 1
+    stats = db_session.scalars(select(ExtractionStat)).all()
+    assert [(stat.email_id, stat.duration_seconds) for stat in stats] == [(original.id, 0.0)]
+    stored_copy = db_session.get(Email, copy.id)
+    assert [event.title for event in stored_copy.events] == ["Town meeting"]
+    assert {db_session.get(Email, email.id).status for email in (original, copy, receipt)} == {
+        EmailStatus.PROCESSED
+    }
@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import json
+from datetime import date
+from pathlib import Path
+from typing import Any
+
+from town_digest.utils import batch_extractor
+from town_digest.utils.batch_extractor import LocalBatchBackend, run_batch_extraction
+
+
+def _respond(body: dict[str, Any]) -> str:
+    email_text = body["input"][1]["content"]
+    if email_text == "garbled":
+        return "not json"
+    return json.dumps(
+        {
+            "events": [
+                {
+                    "title": f"Event from {email_text}",
+                    "description": None,
+                    "location": None,
+                    "start_date": "2026-05-01",
+                    "start_time": None,
+                }
+            ],
+            "announcements": [],
+        }
+    )
+
+
+def test_run_batch_extraction_writes_requests_polls_and_maps_results(tmp_path: Path) -> None:
+    sleeps: list[float] = []
+    backend = LocalBatchBackend(_respond)
+
+    results = run_batch_extraction(
+        {11: "spring newsletter", 12: "garbled", 13: "  "},
+        backend=backend,
+        request_dir=tmp_path,
+        model="test-model",
+        poll_interval=5,
+        sleep=sleeps.append,
+    )
+
+    assert results[11] == {
+        "events": [
+            {
+                "title": "Event from spring newsletter",
+                "description": None,
+                "location": None,
+                "start_date": date(2026, 5, 1),
+                "start_time": None,
+            }
+        ],
+        "announcements": [],
+    }
+    assert isinstance(results[12], ValueError)
+    assert results[13] == {"events": [], "announcements": []}
+    assert sleeps == [5, 5]
+
+    (requests_file,) = tmp_path.glob("*.jsonl")
+    lines = [json.loads(line) for line in requests_file.read_text().splitlines()]
+    assert [line["custom_id"] for line in lines] == ["email-11", "email-12"]
+    assert {line["url"] for line in lines} == {"/v1/responses"}
+    assert lines[0]["body"]["model"] == "test-model"
+    assert lines[0]["body"]["text"]["format"]["name"] == "newsletter_extraction"
+
+
+def test_parse_batch_output_reports_failed_requests() -> None:
+    raw = b"\n".join(
+        [
+            json.dumps(
+                {
+                    "custom_id": "email-7",
+                    "response": {"status_code": 429, "body": {"error": {"code": "rate"}}},
+                    "error": None,
+                }
+            ).encode(),
+            json.dumps(
+                {"custom_id": "email-8", "response": None, "error": {"code": "expired"}}
+            ).encode(),
+        ]
+    )
+
+    outputs = batch_extractor._parse_batch_output(raw)
+
+    assert isinstance(outputs["email-7"][0], ValueError)
+    assert "rate" in str(outputs["email-7"][0])
+    assert "expired" in str(outputs["email-8"][0])
+
+
+def test_run_batch_extraction_chunks_long_texts_and_skips_triaged_emails(
+    tmp_path: Path, monkeypatch
+) -> None:
+    monkeypatch.setenv("EXTRACTION_CHUNK_TOKENS", "20")
+    monkeypatch.setenv("EXTRACTION_CHUNK_OVERLAP_TOKENS", "0")
+    long_text = "Library book sale on Saturday morning.\n\n" * 2 + "Pool opens Monday.\n\n" * 3
+    usages: dict[int, list] = {21: [], 22: []}
+
+    results = run_batch_extraction(
+        {21: long_text, 22: "Your receipt for order 1234"},
+        backend=LocalBatchBackend(_respond),
+        request_dir=tmp_path,
+        kinds={21: ("events",), 22: ()},
+        usages=usages,
+        model="test-model",
+        sleep=lambda _: None,
+    )
+
+    (requests_file,) = tmp_path.glob("*.jsonl")
+    lines = [json.loads(line) for line in requests_file.read_text().splitlines()]
+    assert [line["custom_id"] for line in lines] == ["email-21-0", "email-21-1"]
+    assert len(results[21]["events"]) == 2
+    assert results[22] == {"events": [], "announcements": []}
+    assert [(usage.kinds, usage.duration_seconds) for usage in usages[21]] == [
+        (("events",), 0.0),
+        (("events",), 0.0),
+    ]
+    assert usages[22] == []
@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+from town_digest.benchmarks.fake_imap import FakeImapServer
+from town_digest.benchmarks.ingest import benchmark_ingest, build_sample_newsletter
+from town_digest.utils.email_client import ImapMailClient
+
+
+def test_fake_imap_server_serves_text_parts_without_attachments() -> None:
+    server = FakeImapServer([build_sample_newsletter(attachment_kb=64)], size=3)
+    client = ImapMailClient("fake", "user", "", imap_client_factory=server.connect)
+
+    with client:
+        checkpoint, uids = client.list_new_uids(None)
+        contents = list(client.get_contents(uids))
+        client.mark_seen_many(uids)
+
+    assert uids == ["1", "2", "3"]
+    assert checkpoint.last_uid == 3
+    assert [content.subject for content in contents] == ["This week in town"] * 3
+    assert contents[0].text == "Council meets Tuesday at 7pm in the municipal building."
+    assert contents[0].html is not None and contents[0].html.startswith("<html><body><p>")
+    assert {content.headers["Message-ID"] for content in contents} == {
+        "<1.1@fake-imap.local>",
+        "<2.1@fake-imap.local>",
+        "<3.1@fake-imap.local>",
+    }
+    assert server.flags == {uid: {"\\Seen"} for uid in (1, 2, 3)}
+    # LOGIN, EXAMINE, SEARCH, structure FETCH, parts FETCH, SELECT, STORE, LOGOUT.
+    assert server.stats.round_trips == 8
+
+
+def test_benchmark_ingest_reports_throughput_and_round_trips() -> None:
+    result = benchmark_ingest(
+        [build_sample_newsletter(attachment_kb=8)], mailbox_size=30, chunk_size=10
+    )
+
+    assert result.messages == 30
+    assert result.round_trips > 0
+    assert result.peak_memory_bytes > 0
+    assert result.messages_per_second > 0
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import pytest
+
 from town_digest import config as app_config
 from town_digest.app.main import create_app
 
@@ -32,3 +34,38 @@ def test_load_settings_defaults_to_development() -> None:
     settings = app_config.load_settings()
 
     assert settings.debug is True
+
+
+def test_load_settings_defaults_to_single_mail_account(monkeypatch) -> None:
+    monkeypatch.delenv("IMAP_ACCOUNTS", raising=False)
+    monkeypatch.setenv("IMAP_USER", "tdigest")
+    monkeypatch.setenv("IMAP_SERVER", "mail.example.com")
+
+    settings = app_config.load_settings()
+
+    assert settings.mail_accounts == (settings.primary_mail_account,)
+    assert settings.mail_accounts[0].mailbox_key == "tdigest@mail.example.com"
+
+
+def test_load_settings_parses_imap_accounts(monkeypatch) -> None:
+    monkeypatch.setenv(
+        "IMAP_ACCOUNTS",
+        '[{"name": "ew", "server": "mail.example.com", "user": "ew", "password": "pw"},'
+        ' {"name": "jc", "server": "imap.example.org", "port": 143, "user": "jc",'
+        ' "password_env": "JC_IMAP_PASSWORD", "max_connections": 3}]',
+    )
+    monkeypatch.setenv("JC_IMAP_PASSWORD", "secret")
+
+    accounts = app_config.load_settings().mail_accounts
+
+    assert accounts == (
+        app_config.MailAccount("ew", "mail.example.com", 993, "ew", "pw", 1),
+        app_config.MailAccount("jc", "imap.example.org", 143, "jc", "secret", 3),
+    )
+
+
+def test_load_settings_rejects_malformed_imap_accounts(monkeypatch) -> None:
+    monkeypatch.setenv("IMAP_ACCOUNTS", '[{"name": "ew"}]')
+
+    with pytest.raises(ValueError, match="needs 'name', 'server' and 'user'"):
+        app_config.load_settings()
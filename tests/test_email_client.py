@@ -1,6 +1,18 @@
 from __future__ import annotations
 
-from town_digest.utils.email_client import _extract_text_html, _parse_addresses, _parse_message
+import pytest
+from imapclient.exceptions import IMAPClientAbortError
+from imapclient.response_parser import parse_fetch_response
+from imapclient.response_types import BodyData
+
+from town_digest.utils.email_client import (
+    ImapMailClient,
+    SyncCheckpoint,
+    _compress_uid_set,
+    _extract_text_html,
+    _parse_addresses,
+    _parse_message,
+)
 
 
 def test_parse_addresses() -> None:
@@ -32,3 +44,288 @@ def test_extract_text_html_prefers_parts() -> None:
 
     assert text == "Plain text body."
     assert html == "<p>HTML body.</p>"
+
+
+def _raw_message(subject: str) -> bytes:
+    return (
+        b"From: sender@example.com\r\n"
+        b"To: tdigest+east-windsor@example.com\r\n"
+        b"Subject: " + subject.encode() + b"\r\n"
+        b"Date: Mon, 16 Feb 2026 10:00:00 +0000\r\n"
+        b"\r\n"
+        b"Body of " + subject.encode() + b"\r\n"
+    )
+
+
+def _fetch_items(raw: bytes, data: list[str]) -> dict[bytes, object]:
+    header, _, body = raw.partition(b"\r\n\r\n")
+    structure = BodyData.create(
+        (b"TEXT", b"PLAIN", (b"CHARSET", b"us-ascii"), None, None, b"7BIT", len(body), 1)
+    )
+    items: dict[str, tuple[bytes, object]] = {
+        "BODY.PEEK[]": (b"BODY[]", raw),
+        "BODYSTRUCTURE": (b"BODYSTRUCTURE", structure),
+        "BODY.PEEK[HEADER]": (b"BODY[HEADER]", header + b"\r\n\r\n"),
+        "BODY.PEEK[1]": (b"BODY[1]", body),
+    }
+    return dict(items[item] for item in data)
+
+
+class _FakeIMAPClient:
+    def __init__(self, messages: dict[int, bytes], uid_validity: int = 7) -> None:
+        self.messages = messages
+        self.uid_validity = uid_validity
+        self.searches: list[list[str]] = []
+        self.selects: list[tuple[str, bool]] = []
+        self.fetches: list[tuple[list[int], list[str]]] = []
+        self.commands: list[tuple[str, str, str]] = []
+
+    def select_folder(self, folder: str, readonly: bool = False) -> dict[bytes, object]:
+        self.selects.append((folder, readonly))
+        return {b"UIDVALIDITY": self.uid_validity}
+
+    def search(self, criteria: list[str]) -> list[int]:
+        self.searches.append(criteria)
+        uids = sorted(self.messages)
+        if criteria[0] == "UID":
+            start = int(criteria[1].split(":")[0])
+            # Mirror servers that always include the highest UID in "n:*".
+            return [uid for uid in uids if uid >= start] or uids[-1:]
+        return uids
+
+    def fetch(self, uids: list[int], data: list[str]) -> dict[int, dict[bytes, bytes]]:
+        self.fetches.append((list(uids), list(data)))
+        return {uid: _fetch_items(self.messages[uid], data) for uid in uids if uid in self.messages}
+
+    def add_flags(self, uids: str, flag: str, silent: bool = False) -> None:
+        self.commands.append(("STORE", uids, flag))
+
+    def move(self, uids: str, destination: str) -> None:
+        self.commands.append(("MOVE", uids, destination))
+
+
+def test_get_contents_fetches_in_batches_and_selects_folder_once() -> None:
+    fake = _FakeIMAPClient({uid: _raw_message(f"Message {uid}") for uid in range(1, 6)})
+    client = ImapMailClient("imap.example.com", "user", "password")
+    client._client = fake
+
+    contents = list(client.get_contents(["1", "2", "3", "4", "5", "6"], batch_size=2))
+
+    assert [content.id for content in contents] == ["1", "2", "3", "4", "5"]
+    assert contents[0].subject == "Message 1"
+    assert contents[0].text == "Body of Message 1"
+    assert fake.selects == [("INBOX", True)]
+    assert [uids for uids, _ in fake.fetches] == [[1, 2], [1, 2], [3, 4], [3, 4], [5, 6], [5]]
+    assert fake.fetches[1][1] == ["BODY.PEEK[1]"]
+
+
+def test_list_new_uids_without_checkpoint_returns_most_recent_messages() -> None:
+    fake = _FakeIMAPClient({uid: _raw_message(f"Message {uid}") for uid in range(1, 6)})
+    client = ImapMailClient("imap.example.com", "user", "password")
+    client._client = fake
+
+    checkpoint, uids = client.list_new_uids(None, limit=2)
+
+    assert uids == ["4", "5"]
+    assert checkpoint == SyncCheckpoint(uid_validity=7, last_uid=5)
+    assert fake.searches == [["ALL"]]
+
+
+def test_list_new_uids_searches_only_after_checkpoint() -> None:
+    fake = _FakeIMAPClient({uid: _raw_message(f"Message {uid}") for uid in range(1, 6)})
+    client = ImapMailClient("imap.example.com", "user", "password")
+    client._client = fake
+
+    checkpoint, uids = client.list_new_uids(SyncCheckpoint(uid_validity=7, last_uid=3))
+    assert uids == ["4", "5"]
+    assert checkpoint == SyncCheckpoint(uid_validity=7, last_uid=5)
+    assert fake.searches == [["UID", "4:*"]]
+
+    checkpoint, uids = client.list_new_uids(checkpoint)
+    assert uids == []
+    assert checkpoint == SyncCheckpoint(uid_validity=7, last_uid=5)
+
+
+def test_list_new_uids_resets_when_uid_validity_changes() -> None:
+    fake = _FakeIMAPClient({1: _raw_message("Message 1")}, uid_validity=8)
+    client = ImapMailClient("imap.example.com", "user", "password")
+    client._client = fake
+
+    checkpoint, uids = client.list_new_uids(SyncCheckpoint(uid_validity=7, last_uid=40))
+
+    assert uids == ["1"]
+    assert checkpoint == SyncCheckpoint(uid_validity=8, last_uid=1)
+
+
+def test_folder_selection_is_reused_across_reads_and_writes() -> None:
+    fake = _FakeIMAPClient({1: _raw_message("Message 1"), 2: _raw_message("Message 2")})
+    client = ImapMailClient("imap.example.com", "user", "password")
+    client._client = fake
+
+    client.get_content("1")
+    client.get_content("2")
+    client.mark_seen("1")
+    client.get_content("2")
+
+    assert fake.selects == [("INBOX", True), ("INBOX", False)]
+
+
+def test_dropped_connection_reconnects_and_retries(monkeypatch) -> None:
+    class _DroppingIMAPClient(_FakeIMAPClient):
+        def fetch(self, uids: list[int], data: list[str]) -> dict[int, dict[bytes, bytes]]:
+            raise IMAPClientAbortError("socket error: EOF")
+
+        def shutdown(self) -> None:
+            pass
+
+    replacement = _FakeIMAPClient({1: _raw_message("Message 1")})
+    client = ImapMailClient("imap.example.com", "user", "password")
+    client._client = _DroppingIMAPClient({})
+
+    def _connect() -> None:
+        client._client = replacement
+
+    monkeypatch.setattr(client, "connect", _connect)
+
+    content = client.get_content("1")
+
+    assert content.subject == "Message 1"
+    assert replacement.selects == [("INBOX", True)]
+
+
+def test_wait_for_new_mail_idles_until_exists_notification() -> None:
+    class _IdleIMAPClient(_FakeIMAPClient):
+        def __init__(self) -> None:
+            super().__init__({})
+            self.idle_calls: list[str] = []
+            self.pending = [[(1, b"RECENT")], [(4, b"EXISTS")]]
+
+        def has_capability(self, capability: str) -> bool:
+            return capability == "IDLE"
+
+        def idle(self) -> None:
+            self.idle_calls.append("idle")
+
+        def idle_check(self, timeout: float) -> list[tuple[int, bytes]]:
+            return self.pending.pop(0)
+
+        def idle_done(self) -> None:
+            self.idle_calls.append("done")
+
+    fake = _IdleIMAPClient()
+    client = ImapMailClient("imap.example.com", "user", "password")
+    client._client = fake
+
+    assert client.wait_for_new_mail(timeout=60) is True
+    assert fake.idle_calls == ["idle", "done"]
+
+
+def test_wait_for_new_mail_raises_a_dropped_idle_instead_of_reconnecting(monkeypatch) -> None:
+    class _DroppingIdleIMAPClient(_FakeIMAPClient):
+        def has_capability(self, capability: str) -> bool:
+            return capability == "IDLE"
+
+        def idle(self) -> None:
+            pass
+
+        def idle_check(self, timeout: float) -> list[tuple[int, bytes]]:
+            raise IMAPClientAbortError("socket error: EOF")
+
+        def idle_done(self) -> None:
+            pass
+
+    client = ImapMailClient("imap.example.com", "user", "password")
+    client._client = _DroppingIdleIMAPClient({})
+    reconnects: list[bool] = []
+    monkeypatch.setattr(client, "connect", lambda: reconnects.append(True))
+
+    with pytest.raises(IMAPClientAbortError):
+        client.wait_for_new_mail(timeout=60)
+    # The watcher reconnects and runs a catch-up ingest, which a silent retry would skip.
+    assert reconnects == []
+
+
+def test_wait_for_new_mail_falls_back_to_noop_polling(monkeypatch) -> None:
+    class _NoIdleIMAPClient(_FakeIMAPClient):
+        def __init__(self) -> None:
+            super().__init__({})
+            self.noops = 0
+
+        def has_capability(self, capability: str) -> bool:
+            return False
+
+        def noop(self) -> tuple[bytes, list[tuple[int, bytes]]]:
+            self.noops += 1
+            return b"NOOP completed", [(2, b"EXISTS")] if self.noops == 2 else []
+
+    monkeypatch.setattr("town_digest.utils.email_client.time.sleep", lambda _: None)
+    fake = _NoIdleIMAPClient()
+    client = ImapMailClient("imap.example.com", "user", "password")
+    client._client = fake
+
+    assert client.wait_for_new_mail(timeout=600, poll_interval=1) is True
+    assert fake.noops == 2
+
+
+def test_compress_uid_set_collapses_consecutive_runs() -> None:
+    assert _compress_uid_set([7, 3, 1, 2, 3, 9, 10, 11]) == "1:3,7,9:11"
+    assert _compress_uid_set([]) == ""
+
+
+def test_bulk_flag_and_move_send_one_command_per_folder() -> None:
+    fake = _FakeIMAPClient({})
+    client = ImapMailClient("imap.example.com", "user", "password")
+    client._client = fake
+
+    client.mark_seen_many([str(uid) for uid in range(1, 501)])
+    client.move_many(["4", "5", "9"], "Newsletters")
+    client.archive_processed(["10", "11"])
+    client.mark_seen_many([])
+
+    assert fake.commands == [
+        ("STORE", "1:500", "\\Seen"),
+        ("MOVE", "4:5,9", "Newsletters"),
+        ("STORE", "10:11", "\\Seen"),
+        ("MOVE", "10:11", "Archive"),
+    ]
+    assert fake.selects == [("INBOX", False)]
+
+
+def test_get_contents_downloads_only_inline_text_parts() -> None:
+    structure = parse_fetch_response(
+        [
+            b'1 (UID 9 BODYSTRUCTURE ((("TEXT" "PLAIN" ("CHARSET" "utf-8") NIL NIL'
+            b' "QUOTED-PRINTABLE" 20 1 NIL NIL NIL NIL)("TEXT" "HTML" ("CHARSET" "utf-8")'
+            b' NIL NIL "BASE64" 24 1 NIL NIL NIL NIL) "ALTERNATIVE" ("BOUNDARY" "x")'
+            b' NIL NIL NIL)("APPLICATION" "PDF" ("NAME" "flyer.pdf") NIL NIL "BASE64"'
+            b' 5000000 NIL ("ATTACHMENT" ("FILENAME" "flyer.pdf")) NIL NIL)("TEXT"'
+            b' "PLAIN" ("CHARSET" "us-ascii") NIL NIL "7BIT" 12 1 NIL ("ATTACHMENT"'
+            b' ("FILENAME" "notes.txt")) NIL NIL) "MIXED" ("BOUNDARY" "y") NIL NIL NIL))'
+        ],
+        uid_is_key=True,
+    )[9][b"BODYSTRUCTURE"]
+
+    class _StructuredIMAPClient(_FakeIMAPClient):
+        def fetch(self, uids: list[int], data: list[str]) -> dict[int, dict[bytes, object]]:
+            self.fetches.append((list(uids), list(data)))
+            if data == ["BODYSTRUCTURE", "BODY.PEEK[HEADER]"]:
+                header = b"Subject: Newsletter\r\nTo: a@example.com\r\n\r\n"
+                return {9: {b"BODYSTRUCTURE": structure, b"BODY[HEADER]": header}}
+            return {
+                9: {
+                    b"BODY[1.1]": b"Caf=C3=A9 tonight",
+                    b"BODY[1.2]<0>": b"PHA+SGk8L3A+",
+                }
+            }
+
+    fake = _StructuredIMAPClient({})
+    client = ImapMailClient("imap.example.com", "user", "password", max_message_bytes=32)
+    client._client = fake
+
+    content = client.get_content("9")
+
+    assert content.subject == "Newsletter"
+    assert content.text == "Caf\u00e9 tonight"
+    assert content.html == "<p>Hi</p>"
+    # The PDF and the attached .txt are skipped; the HTML part is capped at the budget.
+    assert fake.fetches[1] == ([9], ["BODY.PEEK[1.1]", "BODY.PEEK[1.2]<0.12>"])
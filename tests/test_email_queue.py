@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+from datetime import UTC, datetime, timedelta
+
+from prefect.logging import disable_run_logger
+from sqlalchemy import select
+from sqlalchemy.orm import Session, sessionmaker
+
+from town_digest.models import Email, EmailStatus
+from town_digest.pipelines import process_email_queue as process_email_queue_module
+from town_digest.utils.email_queue import claim_emails, complete_claims, fail_claims
+
+NOW = datetime(2026, 3, 2, 12, tzinfo=UTC)
+
+
+def _queue(db_session: Session, count: int) -> list[Email]:
+    emails = [
+        Email(
+            subject=f"Newsletter {index}",
+            message_id=f"<queue-{index}@example.com>",
+            received_at=datetime(2026, 3, 1, tzinfo=UTC) + timedelta(minutes=index),
+        )
+        for index in range(count)
+    ]
+    db_session.add_all(emails)
+    db_session.flush()
+    return emails
+
+
+def _factory(db_session: Session) -> sessionmaker:
+    return sessionmaker(bind=db_session.connection(), autoflush=False, expire_on_commit=False)
+
+
+def test_workers_claim_disjoint_batches_oldest_first(db_session: Session) -> None:
+    emails = _queue(db_session, 5)
+    factory = _factory(db_session)
+
+    with factory() as session:
+        first = claim_emails(session, "worker-a", limit=2, now=NOW)
+    with factory() as session:
+        second = claim_emails(session, "worker-b", limit=10, now=NOW)
+    with factory() as session:
+        third = claim_emails(session, "worker-c", limit=10, now=NOW)
+
+    assert first == [emails[0].id, emails[1].id]
+    assert second == [email.id for email in emails[2:]]
+    assert third == []
+    db_session.expire_all()
+    claimed = db_session.get(Email, emails[0].id)
+    assert (claimed.status, claimed.claimed_by, claimed.attempts) == (
+        EmailStatus.CLAIMED,
+        "worker-a",
+        1,
+    )
+    assert claimed.lease_expires_at.replace(tzinfo=UTC) > NOW
+
+
+def test_expired_leases_are_reclaimed_until_attempts_run_out(db_session: Session) -> None:
+    (email,) = _queue(db_session, 1)
+    factory = _factory(db_session)
+    lease = timedelta(minutes=1)
+
+    with factory() as session:
+        assert claim_emails(session, "crashed", lease=lease, max_attempts=2, now=NOW)
+    with factory() as session:
+        assert claim_emails(session, "other", lease=lease, max_attempts=2, now=NOW) == []
+    later = NOW + timedelta(minutes=2)
+    with factory() as session:
+        assert claim_emails(session, "other", lease=lease, max_attempts=2, now=later) == [email.id]
+    with factory() as session:
+        assert claim_emails(session, "third", max_attempts=2, now=later + lease * 2) == []
+
+    db_session.expire_all()
+    stored = db_session.get(Email, email.id)
+    assert (stored.status, stored.attempts) == (EmailStatus.FAILED, 2)
+    assert stored.last_error == "Lease expired after 2 attempts."
+
+
+def test_failed_claims_wait_for_a_retry_and_completions_need_the_lease(
+    db_session: Session,
+) -> None:
+    retried, done = _queue(db_session, 2)
+    factory = _factory(db_session)
+    with factory() as session:
+        claim_emails(session, "worker-a", now=NOW)
+
+    with factory() as session:
+        fail_claims(
+            session, "worker-a", {retried.id: "boom"}, retry_delay=timedelta(minutes=5), now=NOW
+        )
+        assert complete_claims(session, "worker-b", [done.id]) == 0
+        assert complete_claims(session, "worker-a", [done.id]) == 1
+    with factory() as session:
+        assert claim_emails(session, "worker-b", now=NOW + timedelta(minutes=1)) == []
+    with factory() as session:
+        assert claim_emails(session, "worker-b", now=NOW + timedelta(minutes=6)) == [retried.id]
+
+    db_session.expire_all()
+    assert db_session.get(Email, done.id).status == EmailStatus.PROCESSED
+    stored = db_session.get(Email, retried.id)
+    assert (stored.status, stored.attempts, stored.last_error) == (
+        EmailStatus.CLAIMED,
+        2,
+        "boom",
+    )
+
+
+def test_process_email_queue_drains_batches_and_records_failures(
+    db_session: Session, monkeypatch
+) -> None:
+    emails = _queue(db_session, 3)
+    factory = _factory(db_session)
+    batches: list[list[int]] = []
+
+    def fake_ingest(email_ids: list[int], max_concurrency: int | None) -> dict[int, str]:
+        batches.append(email_ids)
+        return {emails[1].id: "ValueError('no luck')"}
+
+    monkeypatch.setattr(process_email_queue_module, "get_session_factory", lambda: factory)
+    monkeypatch.setattr(process_email_queue_module, "ingest_emails_in_parallel", fake_ingest)
+    monkeypatch.setenv("EMAIL_QUEUE_MAX_ATTEMPTS", "1")
+
+    with disable_run_logger():
+        processed = process_email_queue_module.process_email_queue.fn(
+            batch_size=2, worker_id="worker-a"
+        )
+
+    assert processed == 2
+    assert batches == [[emails[0].id, emails[1].id], [emails[2].id]]
+    db_session.expire_all()
+    assert db_session.scalars(select(Email.status).order_by(Email.id)).all() == [
+        EmailStatus.PROCESSED,
+        EmailStatus.FAILED,
+        EmailStatus.PROCESSED,
+    ]
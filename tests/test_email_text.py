@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+from town_digest.utils.email_text import compact_email_text, html_to_compact_text
+
+NEWSLETTER_HTML = """
+<html><head><style>.button { color: red; }</style><title>Newsletter</title></head>
+<body>
+  <div style="display: none; max-height: 0">Preview text for inbox clients</div>
+  <table width="600"><tr><td><img src="https://track.example.com/open.gif" width="1"></td></tr>
+  <tr><td>
+    <h1>Township&nbsp;News</h1>
+    <p>Council meets <b>Tuesday</b> at 7pm. Read the
+       <a href="https://town.example.gov/agenda?id=3&amp;utm_source=newsletter">agenda</a>.</p>
+    <ul><li>Leaf pickup starts Monday</li><li>Library closed Friday</li></ul>
+  </td></tr>
+  <tr><td>
+    <p><a href="https://list.example.com/u?id=1">Unsubscribe</a> |
+       <a href="https://list.example.com/p">Update your preferences</a></p>
+    <p>Copyright &copy; 2026 Township, All rights reserved.</p>
+  </td></tr></table>
+  <div class="gmail_quote">On Mon, Feb 16, 2026 Jane wrote:<blockquote>Old reply</blockquote></div>
+</body></html>
+"""
+
+
+def test_html_to_compact_text_keeps_content_and_links_and_drops_boilerplate() -> None:
+    assert html_to_compact_text(NEWSLETTER_HTML) == (
+        "# Township News\n"
+        "\n"
+        "Council meets Tuesday at 7pm. Read the [agenda](https://town.example.gov/agenda?id=3).\n"
+        "\n"
+        "- Leaf pickup starts Monday\n"
+        "- Library closed Friday"
+    )
+
+
+def test_html_to_compact_text_keeps_quote_when_it_is_the_only_content() -> None:
+    html = (
+        '<div class="gmail_quote"><blockquote type="cite"><p>Forwarded news</p></blockquote></div>'
+    )
+
+    assert html_to_compact_text(html) == "Forwarded news"
+
+
+def test_compact_email_text_cleans_plain_text_and_reports_token_counts() -> None:
+    body_text = (
+        "FYI\n"
+        "\n"
+        "---------- Forwarded message ---------\n"
+        "From: Township <news@example.org>\n"
+        "Date: Mon, Feb 16, 2026\n"
+        "Subject: This week\n"
+        "\n"
+        "Road closure on Main St.\n"
+        "> earlier reply\n"
+        "Click here to unsubscribe.\n"
+    )
+
+    compact = compact_email_text(body_text, None)
+
+    assert compact.text == "FYI\n\nRoad closure on Main St."
+    assert compact.tokens_before == 48
+    assert compact.tokens_after == 8
+
+    html_compact = compact_email_text(body_text, NEWSLETTER_HTML)
+    assert html_compact.tokens_after < html_compact.tokens_before // 3
+
+
+def test_html_to_compact_text_keeps_gmail_forwards_and_drops_gmail_replies() -> None:
+    forward = (
+        '<div dir="ltr">FYI for the digest<br><br>'
+        '<div class="gmail_quote gmail_quote_container">'
+        '<div dir="ltr" class="gmail_attr">---------- Forwarded message ---------<br>'
+        'From: <strong class="gmail_sendername" dir="auto">Township</strong> '
+        '<span dir="auto">&lt;<a href="mailto:news@example.org">news@example.org</a>&gt;</span>'
+        "<br>Date: Mon, Feb 16, 2026 at 9:00 AM<br>Subject: This week<br>"
+        'To: &lt;<a href="mailto:list@example.org">list@example.org</a>&gt;<br></div><br><br>'
+        "<h1>Township News</h1><p>Road closure on Main St.</p>"
+        '<blockquote class="gmail_quote">An old reply inside the newsletter</blockquote>'
+        "</div></div>"
+    )
+    reply = (
+        '<div dir="ltr">Thanks, see you there.</div><br>'
+        '<div class="gmail_quote"><div dir="ltr" class="gmail_attr">'
+        "On Mon, Feb 16, 2026 at 9:00 AM Township &lt;news@example.org&gt; wrote:<br></div>"
+        '<blockquote class="gmail_quote" style="margin:0px 0px 0px 0.8ex">'
+        "<p>Road closure on Main St.</p></blockquote></div>"
+    )
+
+    assert compact_email_text(None, forward).text == (
+        "FYI for the digest\n\n# Township News\n\nRoad closure on Main St."
+    )
+    assert compact_email_text(None, reply).text == "Thanks, see you there."
@@ -8,24 +8,6 @@ import pytest
 from town_digest.utils import events_extractor
 
 
-class _FakeResponse:
-    def __init__(self, output_text: str) -> None:
-        self.output_text = output_text
-
-
-class _FakeResponsesAPI:
-    def __init__(self, output_text: str) -> None:
-        self._output_text = output_text
-
-    def create(self, **_: object) -> _FakeResponse:
-        return _FakeResponse(self._output_text)
-
-
-class _FakeOpenAIClient:
-    def __init__(self, output_text: str) -> None:
-        self.responses = _FakeResponsesAPI(output_text)
-
-
 def test_extract_events_from_email_text_returns_empty_for_blank_input() -> None:
     drafts = events_extractor.extract_events_from_email_text("   ")
 
@@ -33,7 +15,7 @@ def test_extract_events_from_email_text_returns_empty_for_blank_input() -> None:
 
 
 def test_extract_events_from_email_text_normalizes_and_parses_fields(
-    monkeypatch: pytest.MonkeyPatch,
+    monkeypatch: pytest.MonkeyPatch, fake_openai_client: type
 ) -> None:
     output_text = json.dumps(
         {
@@ -58,7 +40,7 @@ def test_extract_events_from_email_text_normalizes_and_parses_fields(
     monkeypatch.setattr(
         events_extractor,
         "build_openai_client",
-        lambda: _FakeOpenAIClient(output_text),
+        lambda: fake_openai_client(output_text),
     )
 
     drafts = events_extractor.extract_events_from_email_text("newsletter text")
@@ -75,7 +57,7 @@ def test_extract_events_from_email_text_normalizes_and_parses_fields(
 
 
 def test_extract_events_from_email_text_raises_for_invalid_start_date(
-    monkeypatch: pytest.MonkeyPatch,
+    monkeypatch: pytest.MonkeyPatch, fake_openai_client: type
 ) -> None:
     output_text = json.dumps(
         {
@@ -93,7 +75,7 @@ def test_extract_events_from_email_text_raises_for_invalid_start_date(
     monkeypatch.setattr(
         events_extractor,
         "build_openai_client",
-        lambda: _FakeOpenAIClient(output_text),
+        lambda: fake_openai_client(output_text),
     )
 
     with pytest.raises(ValueError, match="invalid start_date"):
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import json
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import delete, select
+from sqlalchemy.orm import sessionmaker
+
+from town_digest.models import LlmExtractionCacheEntry
+from town_digest.utils import newsletter_extractor
+from town_digest.utils.extraction_cache import ExtractionCache, extraction_cache_key
+
+
+@pytest.fixture()
+def cache_factory(engine: object) -> sessionmaker:
+    session_factory = sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+    with session_factory() as session:
+        session.execute(delete(LlmExtractionCacheEntry))
+        session.commit()
+    return session_factory
+
+
+def test_extraction_cache_key_ignores_whitespace_but_not_model_or_prompt() -> None:
+    key = extraction_cache_key("Council  meets\nTuesday", model="m", prompt_version="v1")
+
+    assert key == extraction_cache_key(" Council meets Tuesday ", model="m", prompt_version="v1")
+    assert key != extraction_cache_key("Council meets Tuesday", model="n", prompt_version="v1")
+    assert key != extraction_cache_key("Council meets Tuesday", model="m", prompt_version="v2")
+
+
+def test_extraction_cache_expires_and_evicts_least_recently_used(
+    cache_factory: sessionmaker,
+) -> None:
+    cache = ExtractionCache(cache_factory, ttl=timedelta(days=1), max_entries=2)
+    for key in ("a", "b"):
+        cache.put(key, model="m", prompt_version="v1", output_text=key.upper())
+    assert cache.get("a") == "A"
+
+    cache.put("c", model="m", prompt_version="v1", output_text="C")
+
+    assert [cache.get(key) for key in ("a", "b", "c")] == ["A", None, "C"]
+
+    expired = ExtractionCache(cache_factory, ttl=timedelta(seconds=-1), max_entries=2)
+    expired.put("a", model="m", prompt_version="v1", output_text="stale")
+
+    assert cache.get("a") is None
+    with cache_factory() as session:
+        assert session.scalars(select(LlmExtractionCacheEntry.cache_key)).all() == ["c"]
+
+
+def test_extract_newsletter_items_reuses_cached_response(
+    monkeypatch: pytest.MonkeyPatch, cache_factory: sessionmaker, fake_openai_client: type
+) -> None:
+    cache = ExtractionCache(cache_factory, ttl=timedelta(days=1), max_entries=10)
+    monkeypatch.setattr(newsletter_extractor, "get_extraction_cache", lambda: cache)
+    client = fake_openai_client(
+        json.dumps({"events": [], "announcements": [{"title": None, "body": "Hi"}]})
+    )
+
+    first = newsletter_extractor.extract_newsletter_items("Same  newsletter", client=client)
+    second = newsletter_extractor.extract_newsletter_items("Same newsletter\n", client=client)
+    newsletter_extractor.extract_newsletter_items("Same newsletter", model="other", client=client)
+
+    assert first == second == {"events": [], "announcements": [{"title": None, "body": "Hi"}]}
+    assert len(client.responses.calls) == 2
+
+
+def test_extract_newsletter_items_does_not_cache_invalid_output(
+    monkeypatch: pytest.MonkeyPatch, cache_factory: sessionmaker, fake_openai_client: type
+) -> None:
+    cache = ExtractionCache(cache_factory, ttl=timedelta(days=1), max_entries=10)
+    monkeypatch.setattr(newsletter_extractor, "get_extraction_cache", lambda: cache)
+    client = fake_openai_client(json.dumps({"events": [{"start_date": "someday"}]}))
+
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            newsletter_extractor.extract_newsletter_items("Bad newsletter", client=client)
+
+    assert len(client.responses.calls) == 2
+    with cache_factory() as session:
+        assert session.scalars(select(LlmExtractionCacheEntry.cache_key)).all() == []
@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import json
+from datetime import date, time
+
+import pytest
+
+from town_digest.utils import newsletter_extractor
+from town_digest.utils.extraction_chunks import merge_extractions, split_extraction_text
+
+
+def test_split_extraction_text_keeps_short_text_whole() -> None:
+    assert split_extraction_text("short newsletter", max_tokens=100) == ["short newsletter"]
+
+
+def test_split_extraction_text_breaks_at_headings_with_overlap() -> None:
+    text = "\n\n".join(
+        [
+            "# Schools",
+            "a" * 60,
+            "b" * 60,
+            "# Parks",
+            "c" * 60,
+            "d" * 60,
+        ]
+    )
+
+    chunks = split_extraction_text(text, max_tokens=40, overlap_tokens=16)
+
+    assert chunks == [
+        "\n\n".join(["# Schools", "a" * 60, "b" * 60]),
+        "\n\n".join(["b" * 60, "# Parks", "c" * 60]),
+        "\n\n".join(["c" * 60, "d" * 60]),
+    ]
+    assert all(len(chunk) <= 40 * 4 for chunk in chunks)
+
+
+def test_split_extraction_text_splits_oversized_blocks() -> None:
+    chunks = split_extraction_text("x" * 250, max_tokens=25)
+
+    assert chunks == ["x" * 100, "x" * 100, "x" * 50]
+
+
+def test_merge_extractions_merges_items_seen_in_overlapping_chunks() -> None:
+    first = {
+        "events": [
+            {
+                "title": "Spring Fair",
+                "description": None,
+                "location": "Town Green",
+                "start_date": date(2026, 5, 2),
+                "start_time": None,
+            }
+        ],
+        "announcements": [
+            {"title": None, "body": "The transfer station is closed on Memorial Day."}
+        ],
+    }
+    second = {
+        "events": [
+            {
+                "title": "spring fair",
+                "description": "Rides and food trucks.",
+                "location": None,
+                "start_date": date(2026, 5, 2),
+                "start_time": time(10),
+            }
+        ],
+        "announcements": [
+            {"title": None, "body": "The transfer station is closed on Memorial Day weekend."},
+            {"title": "Road Work", "body": "Main St is repaved next week."},
+        ],
+    }
+
+    merged = merge_extractions([first, second])
+
+    assert merged["events"] == [
+        {
+            "title": "Spring Fair",
+            "description": "Rides and food trucks.",
+            "location": "Town Green",
+            "start_date": date(2026, 5, 2),
+            "start_time": time(10),
+        }
+    ]
+    assert [announcement["body"] for announcement in merged["announcements"]] == [
+        "The transfer station is closed on Memorial Day weekend.",
+        "Main St is repaved next week.",
+    ]
+
+
+def test_merge_extractions_keeps_sessions_at_different_times_apart() -> None:
+    def session(start_time: time | None, description: str | None = None) -> dict:
+        return {
+            "title": "Budget Workshop",
+            "description": description,
+            "location": None,
+            "start_date": date(2026, 4, 9),
+            "start_time": start_time,
+        }
+
+    first = {"events": [session(time(10)), session(time(19))], "announcements": []}
+    second = {
+        "events": [session(None, "Bring questions."), session(time(19), "Evening session.")],
+        "announcements": [],
+    }
+
+    merged = merge_extractions([first, second])
+
+    assert [(event["start_time"], event["description"]) for event in merged["events"]] == [
+        (time(10), "Bring questions."),
+        (time(19), "Evening session."),
+    ]
+
+
+def _section_output(request: dict) -> str:
+    section = request["input"][1]["content"].split("\n", 1)[0].lstrip("# ")
+    return json.dumps(
+        {"events": [], "announcements": [{"title": section, "body": f"About {section}"}]}
+    )
+
+
+def test_extract_newsletter_items_extracts_long_text_in_chunks(
+    monkeypatch: pytest.MonkeyPatch, fake_openai_client: type
+) -> None:
+    monkeypatch.setenv("EXTRACTION_CHUNK_TOKENS", "40")
+    monkeypatch.setenv("EXTRACTION_CHUNK_OVERLAP_TOKENS", "0")
+    client = fake_openai_client(_section_output)
+    text = "\n\n".join(f"# Section {index}\n\n{'z' * 100}" for index in range(3))
+
+    extraction = newsletter_extractor.extract_newsletter_items(text, client=client)
+
+    assert len(client.responses.calls) == 3
+    assert [item["title"] for item in extraction["announcements"]] == [
+        "Section 0",
+        "Section 1",
+        "Section 2",
+    ]
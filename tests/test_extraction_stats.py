@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import json
+from datetime import UTC, datetime
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.orm import Session, sessionmaker
+
+from town_digest.models import Edition, Email, EmailStatus, ExtractionStat
+from town_digest.utils import extraction_stats, newsletter_extractor
+from town_digest.utils.extraction_stats import (
+    estimate_cost_usd,
+    record_extraction_usage,
+    summarize_extraction_stats,
+)
+from town_digest.utils.newsletter_extractor import ExtractionUsage
+
+
+@pytest.fixture()
+def session_factory(db_session: Session, monkeypatch: pytest.MonkeyPatch) -> sessionmaker:
+    factory = sessionmaker(bind=db_session.connection(), expire_on_commit=False)
+    monkeypatch.setattr(extraction_stats, "get_session_factory", lambda: factory)
+    return factory
+
+
+def _email(edition: Edition | None, sender: str, message_id: str) -> Email:
+    return Email(
+        edition=edition,
+        from_email=sender,
+        message_id=message_id,
+        received_at=datetime(2025, 1, 1, 12, 0, tzinfo=UTC),
+        status=EmailStatus.RECEIVED,
+    )
+
+
+def test_extract_newsletter_items_reports_usage_per_request(fake_openai_client: type) -> None:
+    usage: list[ExtractionUsage] = []
+    client = fake_openai_client(
+        json.dumps({"events": [], "announcements": []}),
+        usage=SimpleNamespace(input_tokens=1200, output_tokens=80),
+    )
+
+    newsletter_extractor.extract_newsletter_items(
+        "Council meets Tuesday.",
+        model="gpt-5-mini",
+        client=client,
+        use_cache=False,
+        usage=usage,
+    )
+
+    assert len(usage) == 1
+    assert usage[0].model == "gpt-5-mini"
+    assert (usage[0].input_tokens, usage[0].output_tokens) == (1200, 80)
+    assert usage[0].retries == 0
+    assert not usage[0].cached
+    assert usage[0].duration_seconds >= 0
+
+
+def test_estimate_cost_usd_uses_list_prices() -> None:
+    assert estimate_cost_usd("gpt-5-mini", 1_000_000, 1_000_000) == pytest.approx(2.25)
+    assert estimate_cost_usd("unknown-model", 10, 10) is None
+
+
+def test_summarize_extraction_stats_groups_recorded_usage(
+    db_session: Session, session_factory: sessionmaker
+) -> None:
+    edition = Edition(name="East Windsor", slug="east-windsor", state="NJ")
+    first = _email(edition, "clerk@example.com", "<stats-1@example.com>")
+    second = _email(edition, "library@example.com", "<stats-2@example.com>")
+    unrouted = _email(None, "clerk@example.com", "<stats-3@example.com>")
+    db_session.add_all([edition, first, second, unrouted])
+    db_session.flush()
+
+    record_extraction_usage(
+        {
+            first.id: [
+                ExtractionUsage("gpt-5-mini", 2.0, input_tokens=4000, output_tokens=400),
+                ExtractionUsage("gpt-5-mini", 0.0, cached=True),
+            ],
+            second.id: [
+                ExtractionUsage("gpt-5-mini", 1.0, input_tokens=1000, output_tokens=100, retries=1)
+            ],
+            unrouted.id: [ExtractionUsage("custom-model", 3.0, input_tokens=500, output_tokens=50)],
+        }
+    )
+    assert len(db_session.scalars(select(ExtractionStat)).all()) == 4
+
+    by_edition = summarize_extraction_stats(db_session, group_by="edition")
+    assert [row.key for row in by_edition] == ["East Windsor", "(no edition)"]
+    east_windsor = by_edition[0]
+    assert (east_windsor.emails, east_windsor.requests, east_windsor.cached_requests) == (2, 3, 1)
+    assert (east_windsor.input_tokens, east_windsor.output_tokens) == (5000, 500)
+    assert east_windsor.retries == 1
+    assert east_windsor.average_duration_seconds == pytest.approx(1.5)
+    assert east_windsor.cost_usd == pytest.approx(0.00225)
+    assert by_edition[1].cost_usd is None
+
+    by_sender = summarize_extraction_stats(db_session, group_by="sender")
+    clerk = next(row for row in by_sender if row.key == "clerk@example.com")
+    assert (clerk.emails, clerk.input_tokens, clerk.cost_usd) == (2, 4500, None)
+
+    by_day = summarize_extraction_stats(db_session, group_by="day")
+    assert len(by_day) == 1
+    assert by_day[0].requests == 4
+
+    later = summarize_extraction_stats(
+        db_session, group_by="day", since=datetime(2999, 1, 1, tzinfo=UTC)
+    )
+    assert later == []
@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+from datetime import UTC, datetime, timedelta
+
+from sqlalchemy.orm import Session
+
+from town_digest.models import Announcement, Edition, Email, EmailStatus, ExtractionStat
+from town_digest.utils import newsletter_extractor
+from town_digest.utils.extraction_triage import SenderHistory, load_sender_history, triage_email
+
+_NEWSLETTER = (
+    "Town Council Update\n\n"
+    "The council meets Tuesday, March 4 at 7 pm in the municipal building to discuss the "
+    "budget. Leaf collection continues through the end of the month on the usual routes."
+)
+_NO_DATES = (
+    "Town Council Update\n\n"
+    "The new recycling bins have arrived and residents can pick them up at public works. "
+    "Please bring proof of residency and keep your old bin for yard waste."
+)
+
+
+def test_triage_skips_short_and_transactional_email() -> None:
+    assert triage_email("Thanks!").kinds == ()
+
+    confirmation = triage_email(
+        "Please click the link below to confirm your subscription to the Town Digest mailing "
+        "list. If you did not request this, ignore this message.",
+        subject="Confirm your subscription",
+    )
+    assert confirmation.kinds == ()
+    assert confirmation.reason == "transactional email"
+
+
+def test_triage_requires_dates_for_event_extraction() -> None:
+    assert triage_email(_NEWSLETTER).kinds == ("events", "announcements")
+
+    decision = triage_email(_NO_DATES)
+    assert decision.kinds == ("announcements",)
+    assert decision.skipped == ("events",)
+
+
+def test_triage_uses_sender_history() -> None:
+    mostly_events = SenderHistory(
+        event_emails=6, with_events=5, announcement_emails=6, with_announcements=0
+    )
+    assert triage_email(_NO_DATES, history=mostly_events).kinds == ("events",)
+
+    too_little = SenderHistory(event_emails=2, announcement_emails=2)
+    assert triage_email(_NEWSLETTER, history=too_little).kinds == ("events", "announcements")
+
+
+def test_triage_keeps_events_when_dates_are_found_whatever_the_history() -> None:
+    never_events = SenderHistory(
+        event_emails=5, with_events=0, announcement_emails=5, with_announcements=5
+    )
+
+    assert triage_email(
+        "Spring Fair on May 3 at 10am on the town green, with food trucks, crafts, music and "
+        "games for all ages. Volunteers can sign up at the recreation office.",
+        history=never_events,
+    ).kinds == ("events", "announcements")
+
+
+def test_load_sender_history_counts_only_emails_asked_for_each_kind(
+    db_session: Session,
+) -> None:
+    edition = Edition(name="East Windsor", slug="east-windsor", state="NJ")
+    received = datetime(2025, 1, 1, 12, 0, tzinfo=UTC)
+    emails = [
+        Email(
+            edition=edition,
+            from_email="clerk@example.com",
+            message_id=f"<triage-{index}@example.com>",
+            received_at=received + timedelta(days=index),
+            status=EmailStatus.PROCESSED,
+        )
+        for index in range(4)
+    ]
+    db_session.add_all([edition, *emails])
+    db_session.flush()
+    for email, kinds in zip(emails, ("events,announcements", "announcements", None), strict=False):
+        db_session.add(
+            ExtractionStat(
+                email_id=email.id,
+                model="gpt-5-mini",
+                input_tokens=100,
+                output_tokens=10,
+                duration_seconds=1.0,
+                retries=0,
+                cached=False,
+                kinds=kinds,
+            )
+        )
+    db_session.add(Announcement(edition=edition, body="Bins arrived", emails=[emails[0]]))
+    db_session.flush()
+
+    history = load_sender_history(db_session, "clerk@example.com")
+
+    assert history == SenderHistory(
+        event_emails=1, with_events=0, announcement_emails=2, with_announcements=1
+    )
+    assert load_sender_history(db_session, "nobody@example.com") == SenderHistory()
+    assert load_sender_history(db_session, None) is None
+
+
+def test_sender_history_recovers_after_triage_skips_every_kind(db_session: Session) -> None:
+    sender = "clerk@example.com"
+    received = datetime(2025, 1, 1, 12, 0, tzinfo=UTC)
+    requested: list[tuple[str, ...]] = []
+    for index in range(30):
+        kinds = ("announcements",) if index < 5 else None
+        if kinds is None:
+            history = load_sender_history(db_session, sender)
+            kinds = triage_email(_NO_DATES, history=history).kinds
+        requested.append(kinds)
+        email = Email(
+            from_email=sender,
+            message_id=f"<recover-{index}@example.com>",
+            received_at=received + timedelta(days=index),
+            status=EmailStatus.PROCESSED,
+        )
+        db_session.add(email)
+        db_session.flush()
+        if kinds:
+            # Skipped emails record no stats, like in ingest_email.
+            db_session.add(
+                ExtractionStat(
+                    email_id=email.id,
+                    model="gpt-5-mini",
+                    input_tokens=100,
+                    output_tokens=10,
+                    duration_seconds=1.0,
+                    retries=0,
+                    cached=False,
+                    kinds=",".join(kinds),
+                )
+            )
+            db_session.flush()
+
+    assert requested[5] == ()
+    assert ("announcements",) in requested[6:]
+
+
+def test_extract_concurrently_requests_only_triaged_kinds(monkeypatch) -> None:
+    requested: list[tuple[str, ...]] = []
+
+    def fake_extract(email_text: str, *, kinds, **_: object):
+        requested.append(tuple(kinds))
+        return {"events": [], "announcements": []}
+
+    monkeypatch.setattr(newsletter_extractor, "extract_newsletter_items", fake_extract)
+
+    newsletter_extractor.extract_newsletter_items_concurrently(
+        ["a", "b"], max_workers=1, kinds=[("events",), ()]
+    )
+
+    assert requested == [("events",), ()]
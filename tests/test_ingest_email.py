@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import threading
+import time
+from datetime import UTC, date, datetime
+
+from prefect.logging import disable_run_logger
+from prefect.states import Completed, Failed, State
+from sqlalchemy import select, text
+from sqlalchemy.orm import Session, sessionmaker
+
+from town_digest.models import Edition, Email, EmailAlias, EmailStatus, ExtractionStat
+from town_digest.pipelines import ingest_email as ingest_email_module
+from town_digest.utils.alias_router import get_alias_router
+from town_digest.utils.newsletter_extractor import ExtractionUsage, NewsletterExtraction
+from town_digest.utils.statement_counter import count_statements
+
+
+def test_ingest_emails_in_parallel_bounds_concurrency_and_isolates_failures(
+    monkeypatch,
+) -> None:
+    lock = threading.Lock()
+    running = 0
+    peak = 0
+
+    def fake_ingest_email(email_id: int, *, return_state: bool) -> State:
+        nonlocal running, peak
+        assert return_state
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        time.sleep(0.1)
+        with lock:
+            running -= 1
+        if email_id == 2:
+            return Failed(message="OpenAI timed out")
+        if email_id == 4:
+            raise RuntimeError("database unavailable")
+        return Completed()
+
+    monkeypatch.setattr(ingest_email_module, "ingest_email", fake_ingest_email)
+
+    started = time.perf_counter()
+    with disable_run_logger():
+        failures = ingest_email_module.ingest_emails_in_parallel.fn(
+            [1, 2, 3, 4, 5, 6], max_concurrency=3
+        )
+    elapsed = time.perf_counter() - started
+
+    assert failures == {2: "OpenAI timed out", 4: "RuntimeError('database unavailable')"}
+    assert peak == 3
+    # Two waves of three instead of six sequential emails.
+    assert elapsed < 0.5
+
+
+def test_ingest_email_routes_extracts_and_marks_processed_in_one_session(
+    db_session: Session, monkeypatch
+) -> None:
+    edition = Edition(name="East Windsor", slug="east-windsor", state="NJ")
+    alias = EmailAlias(address="tdigest+east-windsor@example.com", edition=edition)
+    email = Email(
+        subject="This week in town",
+        from_email="clerk@example.com",
+        to_emails="someone@example.com,tdigest+east-windsor@example.com",
+        message_id="<unit-of-work@example.com>",
+        received_at=datetime(2026, 3, 1, tzinfo=UTC),
+        body_text=(
+            "The council meets Tuesday, March 10 at 7 pm in the municipal building to "
+            "discuss the budget. Leaf collection continues through the end of the month."
+        ),
+    )
+    db_session.add_all([edition, alias, email])
+    db_session.flush()
+    # Aliases are loaded once per process, not per email.
+    get_alias_router(db_session)
+    sessions = 0
+    factory = sessionmaker(bind=db_session.connection(), autoflush=False, expire_on_commit=False)
+
+    def session_factory() -> sessionmaker:
+        nonlocal sessions
+        sessions += 1
+        return factory
+
+    def fake_extract(email_text: str, *, kinds, usage) -> NewsletterExtraction:
+        assert "council meets" in email_text
+        usage.append(ExtractionUsage("gpt-5-mini", 1.5, input_tokens=80, output_tokens=30))
+        return {
+            "events": [
+                {
+                    "title": "Council meeting",
+                    "description": None,
+                    "location": "Municipal building",
+                    "start_date": date(2026, 3, 10),
+                    "start_time": None,
+                }
+            ],
+            "announcements": [{"title": None, "body": "Leaf collection continues."}],
+        }
+
+    monkeypatch.setattr(ingest_email_module, "get_session_factory", session_factory)
+    monkeypatch.setattr(ingest_email_module, "extract_newsletter_items", fake_extract)
+
+    with count_statements() as count, disable_run_logger():
+        ingest_email_module.ingest_email.fn(email.id)
+
+    db_session.expire_all()
+    stored = db_session.get(Email, email.id)
+    assert sessions == 1
+    assert (stored.edition_id, stored.email_alias_id) == (edition.id, alias.id)
+    assert stored.status == EmailStatus.PROCESSED
+    assert [event.title for event in stored.events] == ["Council meeting"]
+    assert [item.body for item in stored.announcements] == ["Leaf collection continues."]
+    assert db_session.scalars(
+        select(ExtractionStat.input_tokens).where(ExtractionStat.email_id == email.id)
+    ).all() == [80]
+    # Email and two sender-history reads; the email update, two item inserts, two link
+    # inserts and the stats insert.
+    assert count.statements <= 9
+
+
+def test_persist_models_marks_emails_processed_with_their_models(
+    db_session: Session, monkeypatch
+) -> None:
+    edition = Edition(name="East Windsor", slug="east-windsor", state="NJ")
+    email = Email(
+        edition=edition,
+        message_id="<batch@example.com>",
+        received_at=datetime(2026, 3, 1, tzinfo=UTC),
+    )
+    db_session.add_all([edition, email])
+    db_session.flush()
+    db_session.expunge_all()
+    factory = sessionmaker(bind=db_session.connection(), autoflush=False, expire_on_commit=False)
+    monkeypatch.setattr(ingest_email_module, "get_session_factory", lambda: factory)
+    models = ingest_email_module.build_models(
+        email, {"events": [], "announcements": [{"title": None, "body": "Pool opens."}]}
+    )
+
+    ingest_email_module.persist_models.fn(models, [email.id])
+
+    db_session.expire_all()
+    stored = db_session.get(Email, email.id)
+    assert stored.status == EmailStatus.PROCESSED
+    assert [item.body for item in stored.announcements] == ["Pool opens."]
+    # The migrations compare against the stored enum names.
+    assert (
+        db_session.scalar(text("SELECT status FROM emails WHERE id = :id"), {"id": email.id})
+        == "PROCESSED"
+    )
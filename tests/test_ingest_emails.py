@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+from dataclasses import replace
+from datetime import UTC, datetime, timedelta
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session, sessionmaker
+
+from town_digest.models import Email, EmailStatus
+from town_digest.pipelines import ingest_emails as ingest_emails_module
+from town_digest.utils.email_client import EmailContent, SyncCheckpoint
+from town_digest.utils.email_queue import claim_emails
+
+
+def test_sync_checkpoint_round_trips_through_database(monkeypatch, engine) -> None:
+    session_factory = sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+    monkeypatch.setattr(ingest_emails_module, "get_session_factory", lambda: session_factory)
+    monkeypatch.setenv("IMAP_USER", "tdigest-sync-test")
+
+    assert ingest_emails_module.load_sync_checkpoint.fn() is None
+
+    ingest_emails_module.save_sync_checkpoint.fn(SyncCheckpoint(uid_validity=7, last_uid=12))
+    ingest_emails_module.save_sync_checkpoint.fn(SyncCheckpoint(uid_validity=7, last_uid=15))
+
+    assert ingest_emails_module.load_sync_checkpoint.fn() == SyncCheckpoint(
+        uid_validity=7, last_uid=15
+    )
+    assert ingest_emails_module.load_sync_checkpoint.fn("Archive") is None
+
+
+class _FakeMailClient:
+    def __init__(self, uids: list[str]) -> None:
+        self.uids = uids
+        self.fetched: list[list[str]] = []
+
+    def list_new_uids(
+        self, checkpoint: SyncCheckpoint | None, folder: str, limit: int
+    ) -> tuple[SyncCheckpoint, list[str]]:
+        return SyncCheckpoint(uid_validity=3, last_uid=int(self.uids[-1])), self.uids
+
+    def get_contents(
+        self, email_ids: list[str], folder: str, batch_size: int
+    ) -> list[EmailContent]:
+        self.fetched.append(list(email_ids))
+        return [
+            EmailContent(
+                id=email_id,
+                subject=f"Message {email_id}",
+                from_address="sender@example.com",
+                to_addresses=("tdigest+east-windsor@example.com",),
+                date=datetime(2026, 2, 16, tzinfo=UTC),
+                text="Body",
+                html=None,
+                headers={},
+            )
+            for email_id in email_ids
+        ]
+
+
+def test_iter_email_chunks_yields_bounded_chunks_with_checkpoints() -> None:
+    client = _FakeMailClient(["4", "5", "6", "9", "10"])
+
+    chunks = list(ingest_emails_module.iter_email_chunks(client, None, chunk_size=2))
+
+    assert [checkpoint for checkpoint, _ in chunks] == [
+        SyncCheckpoint(uid_validity=3, last_uid=5),
+        SyncCheckpoint(uid_validity=3, last_uid=9),
+        SyncCheckpoint(uid_validity=3, last_uid=10),
+    ]
+    assert [[email.id for email in emails] for _, emails in chunks] == [
+        ["4", "5"],
+        ["6", "9"],
+        ["10"],
+    ]
+    assert client.fetched == [["4", "5"], ["6", "9"], ["10"]]
+
+
+def test_message_id_is_the_mailbox_scoped_uid_even_with_a_header() -> None:
+    email = _FakeMailClient(["4"]).get_contents(["4"], "INBOX", 1)[0]
+
+    assert ingest_emails_module._message_id(email, 3, "tdigest@mail.example.com") == (
+        "<3.4@tdigest@mail.example.com>"
+    )
+    with_header = replace(email, headers={"Message-Id": " <abc@example.org> "})
+    assert ingest_emails_module._message_id(with_header, 3, "tdigest@mail.example.com") == (
+        "<3.4@tdigest@mail.example.com>"
+    )
+
+
+def test_persist_keeps_both_alias_copies_and_dedupes_within_a_batch(
+    db_session: Session, monkeypatch
+) -> None:
+    factory = sessionmaker(bind=db_session.connection(), autoflush=False, expire_on_commit=False)
+    monkeypatch.setattr(ingest_emails_module, "get_session_factory", lambda: factory)
+    copies = [
+        replace(email, headers={"Message-ID": "<issue-12@news.example.org>"})
+        for email in _FakeMailClient(["4", "5"]).get_contents(["4", "5", "4"], "INBOX", 3)
+    ]
+
+    stored = ingest_emails_module._persist_email_contents(copies, 3, "tdigest@mail.example.com")
+    again = ingest_emails_module._persist_email_contents(copies, 3, "tdigest@mail.example.com")
+    # The server reset UIDVALIDITY and reused the UIDs for new messages.
+    reset = ingest_emails_module._persist_email_contents(copies, 8, "tdigest@mail.example.com")
+
+    assert [email.message_id for email in stored] == [
+        "<3.4@tdigest@mail.example.com>",
+        "<3.5@tdigest@mail.example.com>",
+    ]
+    assert again == []
+    assert [email.message_id for email in reset] == [
+        "<8.4@tdigest@mail.example.com>",
+        "<8.5@tdigest@mail.example.com>",
+    ]
+
+
+def test_new_emails_are_claimed_before_in_process_ingestion(
+    db_session: Session, monkeypatch
+) -> None:
+    emails = [
+        Email(
+            message_id=f"<claim-{index}@example.com>",
+            received_at=datetime(2026, 3, 1, tzinfo=UTC) + timedelta(minutes=index),
+        )
+        for index in range(3)
+    ]
+    db_session.add_all(emails)
+    db_session.flush()
+    done, broken, taken = (email.id for email in emails)
+    factory = sessionmaker(bind=db_session.connection(), autoflush=False, expire_on_commit=False)
+    monkeypatch.setattr(ingest_emails_module, "get_session_factory", lambda: factory)
+    with factory() as session:
+        assert claim_emails(session, "queue-worker", email_ids=[taken]) == [taken]
+    ingested: list[list[int]] = []
+
+    def fake_ingest(email_ids: list[int]) -> dict[int, str]:
+        ingested.append(email_ids)
+        with factory() as session:
+            statuses = session.scalars(select(Email.status).where(Email.id.in_(email_ids)))
+            assert set(statuses) == {EmailStatus.CLAIMED}
+        return {broken: "boom"}
+
+    monkeypatch.setattr(ingest_emails_module, "ingest_email_batch", fake_ingest)
+
+    ingest_emails_module._ingest_new_emails([done, broken, taken], None, enqueue_only=False)
+
+    assert ingested == [[done, broken]]
+    db_session.expire_all()
+    assert [db_session.get(Email, email_id).status for email_id in (done, broken, taken)] == [
+        EmailStatus.PROCESSED,
+        EmailStatus.RECEIVED,
+        EmailStatus.CLAIMED,
+    ]
+    assert db_session.get(Email, broken).last_error == "boom"
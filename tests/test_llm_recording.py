@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import json
+import os
+from collections.abc import Iterator
+from pathlib import Path
+
+import httpx
+import pytest
+from openai import NotFoundError, OpenAI
+
+from town_digest.benchmarks.extraction import benchmark_extraction
+from town_digest.utils.llm_recording import RecordingStore, RecordReplayTransport
+from town_digest.utils.newsletter_extractor import extract_newsletter_items
+from town_digest.utils.openai_client import build_openai_client, reset_openai_client
+
+_OUTPUT = {
+    "events": [
+        {
+            "title": "Budget hearing",
+            "description": None,
+            "location": "Town Hall",
+            "start_date": "2026-03-15",
+            "start_time": "18:30",
+        }
+    ],
+    "announcements": [],
+}
+
+
+def _openai_response(request: httpx.Request) -> httpx.Response:
+    return httpx.Response(
+        200,
+        json={
+            "id": "resp_1",
+            "object": "response",
+            "model": json.loads(request.content)["model"],
+            "output": [
+                {
+                    "type": "message",
+                    "id": "msg_1",
+                    "role": "assistant",
+                    "status": "completed",
+                    "content": [
+                        {"type": "output_text", "text": json.dumps(_OUTPUT), "annotations": []}
+                    ],
+                }
+            ],
+            "usage": {"input_tokens": 120, "output_tokens": 40, "total_tokens": 160},
+        },
+    )
+
+
+@pytest.fixture(autouse=True)
+def _fresh_client(monkeypatch: pytest.MonkeyPatch) -> Iterator[None]:
+    monkeypatch.setenv("LLM_CACHE_MAX_ENTRIES", "0")
+    monkeypatch.setenv("OPENAI_MAX_RETRIES", "0")
+    reset_openai_client()
+    yield
+    reset_openai_client()
+
+
+def test_recorded_responses_replay_offline(tmp_path: Path, monkeypatch) -> None:
+    live = httpx.MockTransport(_openai_response)
+    recorder = RecordReplayTransport(RecordingStore(tmp_path), mode="record", inner=live)
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    with httpx.Client(transport=recorder) as http_client:
+        client = OpenAI(api_key="test-key", http_client=http_client, max_retries=0)
+        recorded = extract_newsletter_items("Budget hearing March 15.", client=client)
+    assert len(list(tmp_path.glob("*.json"))) == 1
+
+    monkeypatch.delenv("OPENAI_API_KEY")
+    monkeypatch.setenv("OPENAI_RECORDING_MODE", "replay")
+    monkeypatch.setenv("OPENAI_RECORDINGS_DIR", str(tmp_path))
+
+    assert extract_newsletter_items("Budget hearing March 15.") == recorded
+    assert recorded["events"][0]["title"] == "Budget hearing"
+    with pytest.raises(NotFoundError, match="No recorded response"):
+        extract_newsletter_items("Something never recorded.")
+    assert build_openai_client().api_key == "replay"
+
+
+def test_replay_waits_the_configured_latency(tmp_path: Path) -> None:
+    request = httpx.Request("POST", "https://api.openai.com/v1/responses", json={"model": "m"})
+    RecordReplayTransport(
+        RecordingStore(tmp_path), mode="record", inner=httpx.MockTransport(_openai_response)
+    ).handle_request(request)
+    sleeps: list[float] = []
+    replay = RecordReplayTransport(
+        RecordingStore(tmp_path), mode="replay", latency=0.25, sleep=sleeps.append
+    )
+
+    response = replay.handle_request(
+        httpx.Request("POST", "https://api.openai.com/v1/responses", json={"model": "m"})
+    )
+
+    assert response.status_code == 200
+    assert response.json()["usage"]["output_tokens"] == 40
+    assert sleeps == [0.25]
+
+
+def test_benchmark_extraction_replays_recordings(tmp_path: Path, monkeypatch) -> None:
+    store = RecordingStore(tmp_path)
+    recorder = RecordReplayTransport(
+        store, mode="record", inner=httpx.MockTransport(_openai_response)
+    )
+    texts = ["Budget hearing March 15.", "Library talk April 2."]
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    monkeypatch.setattr("town_digest.utils.llm_recording.httpx.HTTPTransport", lambda **_: recorder)
+    recorded = benchmark_extraction(texts, recordings_dir=tmp_path, record=True)
+    monkeypatch.delenv("OPENAI_API_KEY")
+
+    def shared_client() -> OpenAI:
+        raise AssertionError("The benchmark must not use the process-wide client.")
+
+    monkeypatch.setattr("town_digest.utils.newsletter_extractor.build_openai_client", shared_client)
+    result = benchmark_extraction(texts, recordings_dir=tmp_path, max_workers=2)
+
+    assert recorded.failures == 0
+    assert (result.emails, result.requests, result.failures) == (2, 2, 0)
+    assert "OPENAI_RECORDING_MODE" not in os.environ
+    assert (result.input_tokens, result.output_tokens) == (240, 80)
+    assert result.emails_per_second > 0
@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+from datetime import UTC, datetime
+
+import pytest
+
+from town_digest.models import Email
+from town_digest.models import email as email_module
+from town_digest.utils.message_store import MessageStore
+
+
+def test_message_store_round_trips_and_deduplicates(tmp_path) -> None:
+    store = MessageStore(tmp_path)
+
+    digest = store.put_bodies("Plain body", "<p>HTML body</p>")
+
+    assert store.put_bodies("Plain body", "<p>HTML body</p>") == digest
+    assert store.get_bodies(digest) == ("Plain body", "<p>HTML body</p>")
+    assert len(list(tmp_path.rglob("*.z"))) == 1
+
+
+def test_message_store_rejects_unknown_and_malformed_digests(tmp_path) -> None:
+    store = MessageStore(tmp_path)
+
+    with pytest.raises(KeyError):
+        store.get("0" * 64)
+    with pytest.raises(ValueError, match="Invalid message digest"):
+        store.get("../../etc/passwd")
+
+
+def test_email_load_bodies_reads_from_message_store(monkeypatch, tmp_path) -> None:
+    store = MessageStore(tmp_path)
+    monkeypatch.setattr(email_module, "get_message_store", lambda: store)
+    email = Email(
+        subject="Town update",
+        received_at=datetime(2026, 1, 1, tzinfo=UTC),
+        body_digest=store.put_bodies(None, "<p>Stored</p>"),
+    )
+    inline = Email(
+        subject="Inline",
+        received_at=datetime(2026, 1, 1, tzinfo=UTC),
+        body_text="Inline body",
+    )
+
+    assert email.load_bodies() == (None, "<p>Stored</p>")
+    assert inline.load_bodies() == ("Inline body", None)
@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+from datetime import UTC, datetime, timedelta
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session, sessionmaker
+
+from town_digest.models import Announcement, Edition, Email, EmailSimhashBand, Event
+from town_digest.pipelines import ingest_emails as ingest_emails_module
+from town_digest.utils.email_client import EmailContent
+from town_digest.utils.near_duplicates import (
+    NEAR_DUPLICATE_MAX_DISTANCE,
+    find_near_duplicate,
+    fingerprint_email,
+    group_near_duplicates,
+    hamming_distance,
+    link_to_original,
+    simhash,
+)
+
+_PLACES = ("library", "firehouse", "senior center", "middle school", "town hall", "park")
+_TOPICS = ("budget", "zoning", "recycling", "road paving", "tree planting", "stormwater")
+_NEWSLETTER = " ".join(
+    f"The {place} hosts a {topic} session on the {day}th at {hour} pm, "
+    f"and residents can sign up online or call the {place} front desk."
+    for day, (place, topic) in enumerate(
+        ((place, topic) for place in _PLACES for topic in _TOPICS), start=1
+    )
+    for hour in (day % 5 + 3,)
+)
+_CORRECTED = _NEWSLETTER.replace("on the 7th at", "on the 8th at")
+_FORWARDED = "Fwd from a neighbor who thought you would like this. " + _NEWSLETTER
+_OTHER = " ".join(
+    f"School board minutes item {index} covers bus route {index * 3} and lunch menu changes."
+    for index in range(40)
+)
+
+
+def test_simhash_keeps_near_copies_within_the_distance_threshold() -> None:
+    original = simhash(_NEWSLETTER)
+
+    assert original is not None
+    assert hamming_distance(original, simhash(_CORRECTED)) <= NEAR_DUPLICATE_MAX_DISTANCE
+    assert hamming_distance(original, simhash(_FORWARDED)) <= NEAR_DUPLICATE_MAX_DISTANCE
+    assert hamming_distance(original, simhash(_OTHER)) > NEAR_DUPLICATE_MAX_DISTANCE
+    assert simhash("Thanks for subscribing!") is None
+
+
+def _email(edition: Edition, message_id: str, received_at: datetime) -> Email:
+    return Email(edition=edition, message_id=message_id, received_at=received_at)
+
+
+def test_find_near_duplicate_links_the_earlier_extracted_copy(db_session: Session) -> None:
+    edition = Edition(name="East Windsor", slug="east-windsor", state="NJ")
+    other_edition = Edition(name="Jersey City", slug="jersey-city", state="NJ")
+    received = datetime(2026, 3, 1, 8, 0, tzinfo=UTC)
+    original = _email(edition, "<dup-original@example.com>", received)
+    original.events.append(
+        Event(edition=edition, title="Council meeting", start_date=received.date())
+    )
+    original.announcements.append(Announcement(edition=edition, body="Market returns in May"))
+    unrelated = _email(edition, "<dup-other@example.com>", received)
+    unrelated.announcements.append(Announcement(edition=edition, body="Bus routes"))
+    elsewhere = _email(other_edition, "<dup-elsewhere@example.com>", received)
+    elsewhere.announcements.append(Announcement(edition=other_edition, body="Elsewhere"))
+    copy = _email(edition, "<dup-copy@example.com>", received + timedelta(hours=2))
+    emails_and_texts = [
+        (original, _NEWSLETTER),
+        (unrelated, _OTHER),
+        (elsewhere, _NEWSLETTER),
+        (copy, _CORRECTED),
+    ]
+    for email, text in emails_and_texts:
+        fingerprint_email(email, text)
+    db_session.add_all([email for email, _ in emails_and_texts])
+    db_session.flush()
+
+    assert find_near_duplicate(db_session, copy) is original
+    assert find_near_duplicate(db_session, original) is None
+
+    assert link_to_original(db_session, copy, original) == 2
+    assert link_to_original(db_session, copy, original) == 0
+    assert [event.title for event in copy.events] == ["Council meeting"]
+
+
+def test_group_near_duplicates_maps_copies_within_a_backlog_to_the_first_email() -> None:
+    received = datetime(2026, 3, 1, 8, 0, tzinfo=UTC)
+    texts = [
+        (1, 1, received + timedelta(hours=1), _CORRECTED),
+        (2, 1, received, _NEWSLETTER),
+        (3, 1, received + timedelta(hours=2), _FORWARDED),
+        (4, 2, received + timedelta(hours=3), _NEWSLETTER),
+        (5, 1, received + timedelta(hours=4), _OTHER),
+        (6, 1, received + timedelta(days=45), _NEWSLETTER),
+    ]
+    emails = []
+    for email_id, edition_id, received_at, text in texts:
+        email = Email(
+            id=email_id,
+            edition_id=edition_id,
+            message_id=f"<backlog-{email_id}@example.com>",
+            received_at=received_at,
+        )
+        fingerprint_email(email, text)
+        emails.append(email)
+
+    originals = group_near_duplicates(emails)
+
+    # Other editions, other texts and copies outside the window are extracted themselves.
+    assert {copy_id: original.id for copy_id, original in originals.items()} == {1: 2, 3: 2}
+
+
+def test_persist_emails_stores_fingerprints(db_session: Session, monkeypatch) -> None:
+    factory = sessionmaker(bind=db_session.connection(), expire_on_commit=False)
+    monkeypatch.setattr(ingest_emails_module, "get_session_factory", lambda: factory)
+    monkeypatch.delenv("MESSAGE_STORE_PATH", raising=False)
+
+    def content(email_id: str, text: str) -> EmailContent:
+        return EmailContent(
+            id=email_id,
+            subject="Weekly update",
+            from_address="clerk@example.com",
+            to_addresses=("tdigest+east-windsor@example.com",),
+            date=datetime(2026, 3, 1, tzinfo=UTC),
+            text=text,
+            html=None,
+            headers={"Message-ID": f"<fingerprint-{email_id}@example.com>"},
+        )
+
+    emails = ingest_emails_module._persist_email_contents(
+        [content("1", _NEWSLETTER), content("2", "Short note")], 1, mailbox="test"
+    )
+
+    assert emails[0].simhash is not None
+    assert emails[1].simhash is None
+    bands = db_session.scalars(
+        select(EmailSimhashBand).where(
+            EmailSimhashBand.email_id.in_([email.id for email in emails])
+        )
+    ).all()
+    assert {band.email_id for band in bands} == {emails[0].id}
+    assert len(bands) == 8
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import json
+from datetime import date
+
+import pytest
+
+from town_digest.utils import announcement_extractor, newsletter_extractor
+
+
+def test_extract_newsletter_items_returns_both_kinds_from_one_request(
+    fake_openai_client: type,
+) -> None:
+    client = fake_openai_client(
+        json.dumps(
+            {
+                "events": [
+                    {
+                        "title": " Library Book Sale ",
+                        "description": None,
+                        "location": " Main Library ",
+                        "start_date": "2026-04-04",
+                        "start_time": None,
+                    }
+                ],
+                "announcements": [
+                    {"title": " Road Closure ", "body": " Main St is closed this week. "},
+                    {"title": "Empty", "body": "  "},
+                ],
+            }
+        )
+    )
+
+    extraction = newsletter_extractor.extract_newsletter_items("newsletter text", client=client)
+
+    assert extraction == {
+        "events": [
+            {
+                "title": "Library Book Sale",
+                "description": None,
+                "location": "Main Library",
+                "start_date": date(2026, 4, 4),
+                "start_time": None,
+            }
+        ],
+        "announcements": [{"title": "Road Closure", "body": "Main St is closed this week."}],
+    }
+    assert len(client.responses.calls) == 1
+    text_format = client.responses.calls[0]["text"]["format"]
+    assert text_format["name"] == "newsletter_extraction"
+    assert text_format["schema"]["required"] == ["events", "announcements"]
+
+
+def test_extract_newsletter_items_skips_request_for_blank_input(fake_openai_client: type) -> None:
+    client = fake_openai_client("{}")
+
+    extraction = newsletter_extractor.extract_newsletter_items("  ", client=client)
+
+    assert extraction == {"events": [], "announcements": []}
+    assert client.responses.calls == []
+
+
+def test_extract_newsletter_items_rejects_missing_list(fake_openai_client: type) -> None:
+    client = fake_openai_client(json.dumps({"events": []}))
+
+    with pytest.raises(ValueError, match="'announcements' must be a list"):
+        newsletter_extractor.extract_newsletter_items("newsletter text", client=client)
+
+
+def test_announcement_wrapper_requests_only_announcements(
+    monkeypatch: pytest.MonkeyPatch, fake_openai_client: type
+) -> None:
+    client = fake_openai_client(json.dumps({"announcements": [{"title": None, "body": "Hi"}]}))
+    monkeypatch.setattr(announcement_extractor, "build_openai_client", lambda: client)
+
+    drafts = announcement_extractor.extract_announcements_from_email_text("newsletter text")
+
+    assert drafts == [{"title": None, "body": "Hi"}]
+    text_format = client.responses.calls[0]["text"]["format"]
+    assert text_format["name"] == "announcement_extraction"
+    assert text_format["schema"] == announcement_extractor.ANNOUNCEMENTS_JSON_SCHEMA
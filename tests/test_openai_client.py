@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+from collections.abc import Iterator
+
+import pytest
+
+from town_digest.utils.openai_client import build_openai_client, reset_openai_client
+
+
+@pytest.fixture(autouse=True)
+def _fresh_client() -> Iterator[None]:
+    reset_openai_client()
+    yield
+    reset_openai_client()
+
+
+def test_build_openai_client_is_shared_and_configured_from_environment(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    monkeypatch.setenv("OPENAI_BASE_URL", "http://127.0.0.1:8089/v1")
+    monkeypatch.setenv("OPENAI_TIMEOUT_SECONDS", "30")
+    monkeypatch.setenv("OPENAI_CONNECT_TIMEOUT_SECONDS", "2.5")
+    monkeypatch.setenv("OPENAI_MAX_RETRIES", "0")
+
+    client = build_openai_client()
+
+    assert build_openai_client() is client
+    assert str(client.base_url) == "http://127.0.0.1:8089/v1/"
+    assert client.timeout.read == 30.0
+    assert client.timeout.connect == 2.5
+    assert client.max_retries == 0
+
+    reset_openai_client()
+
+    assert client.is_closed()
+    assert build_openai_client() is not client
+
+
+def test_build_openai_client_requires_api_key(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+
+    with pytest.raises(ValueError, match="OPENAI_API_KEY is required"):
+        build_openai_client()
@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+import json
+
+import httpx
+import openai
+import pytest
+
+from town_digest.utils import newsletter_extractor
+from town_digest.utils.rate_limiter import RateLimiter
+
+
+class _FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+        self.sleeps: list[float] = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def _limiter(clock: _FakeClock, **budgets: int) -> RateLimiter:
+    return RateLimiter(clock=clock, sleep=clock.sleep, **budgets)
+
+
+def test_rate_limiter_spreads_requests_over_the_minute() -> None:
+    clock = _FakeClock()
+    limiter = _limiter(clock, requests_per_minute=2)
+
+    for _ in range(3):
+        limiter.acquire()
+
+    assert clock.sleeps == [30.0]
+
+
+def test_rate_limiter_budgets_tokens_and_caps_oversized_requests() -> None:
+    clock = _FakeClock()
+    limiter = _limiter(clock, tokens_per_minute=600)
+
+    limiter.acquire(500)
+    limiter.acquire(200)
+    limiter.acquire(10_000)
+
+    assert clock.sleeps == pytest.approx([10.0, 60.0])
+
+
+def test_rate_limiter_backs_off_after_rate_limit_responses() -> None:
+    clock = _FakeClock()
+    limiter = _limiter(clock)
+
+    assert limiter.record_rate_limited() == 1.0
+    assert limiter.record_rate_limited() == 2.0
+    limiter.acquire()
+    assert clock.sleeps == [2.0]
+
+    limiter.record_success()
+    assert limiter.record_rate_limited(retry_after=7.5) == 7.5
+    assert limiter.record_rate_limited() == 2.0
+
+
+def _rate_limit_error() -> openai.RateLimitError:
+    request = httpx.Request("POST", "https://api.openai.com/v1/responses")
+    response = httpx.Response(429, headers={"retry-after": "3"}, request=request)
+    return openai.RateLimitError("Rate limit reached", response=response, body=None)
+
+
+def test_extract_newsletter_items_retries_after_rate_limit(
+    monkeypatch: pytest.MonkeyPatch, fake_openai_client: type
+) -> None:
+    clock = _FakeClock()
+    monkeypatch.setattr(newsletter_extractor, "get_openai_rate_limiter", lambda: _limiter(clock))
+    client = fake_openai_client(
+        json.dumps({"events": [], "announcements": []}),
+        errors=[_rate_limit_error(), _rate_limit_error()],
+    )
+
+    extraction = newsletter_extractor.extract_newsletter_items("newsletter", client=client)
+
+    assert extraction == {"events": [], "announcements": []}
+    assert len(client.responses.calls) == 3
+    assert clock.sleeps == [3.0, 3.0]
+    assert client.options == {"max_retries": 0}
+
+
+def test_rate_limits_reach_the_limiter_instead_of_sdk_retries(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    clock = _FakeClock()
+    monkeypatch.setattr(newsletter_extractor, "get_openai_rate_limiter", lambda: _limiter(clock))
+    requests: list[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        if len(requests) == 1:
+            return httpx.Response(429, headers={"retry-after": "3"}, json={})
+        text = json.dumps({"events": [], "announcements": []})
+        return httpx.Response(
+            200,
+            json={
+                "id": "resp_1",
+                "object": "response",
+                "output": [
+                    {
+                        "type": "message",
+                        "id": "msg_1",
+                        "role": "assistant",
+                        "status": "completed",
+                        "content": [{"type": "output_text", "text": text, "annotations": []}],
+                    }
+                ],
+            },
+        )
+
+    client = openai.OpenAI(
+        api_key="test",
+        max_retries=2,
+        http_client=httpx.Client(transport=httpx.MockTransport(handler)),
+    )
+    usage: list[newsletter_extractor.ExtractionUsage] = []
+
+    extraction = newsletter_extractor.extract_newsletter_items(
+        "newsletter", client=client, use_cache=False, usage=usage
+    )
+
+    assert extraction == {"events": [], "announcements": []}
+    assert len(requests) == 2
+    assert clock.sleeps == [3.0]
+    assert usage[0].retries == 1
+
+
+def test_extract_newsletter_items_retries_transient_errors_up_to_the_configured_max(
+    monkeypatch: pytest.MonkeyPatch, fake_openai_client: type
+) -> None:
+    clock = _FakeClock()
+    monkeypatch.setattr(newsletter_extractor, "get_openai_rate_limiter", lambda: _limiter(clock))
+    monkeypatch.setattr(newsletter_extractor, "sleep", clock.sleep)
+    monkeypatch.setenv("OPENAI_MAX_RETRIES", "2")
+    request = httpx.Request("POST", "https://api.openai.com/v1/responses")
+
+    def transient_errors() -> list[Exception]:
+        return [
+            openai.InternalServerError(
+                "Server error", response=httpx.Response(502, request=request), body=None
+            ),
+            openai.APITimeoutError(request=request),
+        ]
+
+    client = fake_openai_client(
+        json.dumps({"events": [], "announcements": []}), errors=transient_errors()
+    )
+    usage: list[newsletter_extractor.ExtractionUsage] = []
+
+    extraction = newsletter_extractor.extract_newsletter_items(
+        "newsletter", client=client, use_cache=False, usage=usage
+    )
+
+    assert extraction == {"events": [], "announcements": []}
+    assert len(client.responses.calls) == 3
+    assert clock.sleeps == [0.5, 1.0]
+    assert usage[0].retries == 0
+
+    monkeypatch.setenv("OPENAI_MAX_RETRIES", "1")
+    failing = fake_openai_client("{}", errors=transient_errors())
+    with pytest.raises(openai.APITimeoutError):
+        newsletter_extractor.extract_newsletter_items("newsletter", client=failing, use_cache=False)
+    assert len(failing.responses.calls) == 2
+
+
+def test_extract_newsletter_items_concurrently_keeps_order_and_isolates_failures(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    def fake_extract(email_text: str, **_: object) -> dict[str, list]:
+        if email_text == "broken":
+            raise ValueError("bad response")
+        return {"events": [], "announcements": [{"title": None, "body": email_text}]}
+
+    monkeypatch.setattr(newsletter_extractor, "extract_newsletter_items", fake_extract)
+
+    results = newsletter_extractor.extract_newsletter_items_concurrently(
+        ["first", "broken", "third"], max_workers=3
+    )
+
+    assert results[0]["announcements"][0]["body"] == "first"
+    assert isinstance(results[1], ValueError)
+    assert results[2]["announcements"][0]["body"] == "third"
@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import threading
+
+from imapclient.exceptions import IMAPClientAbortError
+
+from town_digest.pipelines import watch_emails as watch_emails_module
+
+
+class _FakeWatchClient:
+    def __init__(self, outcomes: list[bool | Exception], stop: threading.Event) -> None:
+        self.outcomes = outcomes
+        self.stop = stop
+        self.disconnects = 0
+
+    def connect(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+    def disconnect(self) -> None:
+        self.disconnects += 1
+
+    def wait_for_new_mail(self, folder: str, *, timeout: float, poll_interval: float) -> bool:
+        outcome = self.outcomes.pop(0)
+        if not self.outcomes:
+            self.stop.set()
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+def test_watch_emails_ingests_on_start_on_new_mail_and_after_reconnect(monkeypatch) -> None:
+    runs: list[int] = []
+    monkeypatch.setattr(
+        watch_emails_module,
+        "ingest_emails",
+        lambda stream, chunk_size: runs.append(chunk_size),
+    )
+    monkeypatch.setattr(watch_emails_module, "RECONNECT_DELAY_SECONDS", 0)
+    stop = threading.Event()
+    client = _FakeWatchClient([False, True, IMAPClientAbortError("EOF"), False], stop)
+
+    watch_emails_module.watch_emails(stop_event=stop, client=client, chunk_size=5)
+
+    # Start-up catch-up, the EXISTS wake-up, and the catch-up after reconnecting.
+    assert runs == [5, 5, 5]
+    assert client.disconnects == 1